@@ -0,0 +1,32 @@
+"""
+Benchmarks of thornfield's hot paths.
+
+Run ``python -m benchmarks run -o results.json`` from the repository root,
+and ``python -m benchmarks compare base.json results.json`` to compare two runs.
+"""
+from contextlib import contextmanager
+from typing import Callable, Dict, ContextManager, NamedTuple
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[], ContextManager[Callable]]
+    is_async: bool
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, is_async: bool = False):
+    """
+    Registers a generator function that prepares a benchmark, yields the operation
+    to measure (an async function if ``is_async``), and then cleans up.
+    """
+
+    def inner(setup):
+        if name in BENCHMARKS:
+            raise ValueError(f"Benchmark {name} is already registered")
+        BENCHMARKS[name] = Benchmark(name, contextmanager(setup), is_async)
+        return setup
+
+    return inner
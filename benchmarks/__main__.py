@@ -0,0 +1,66 @@
+import argparse
+import sys
+from fnmatch import fnmatch
+
+from . import BENCHMARKS
+from . import (
+    bench_cacher,
+    bench_memory_cache,
+    bench_decorators,
+    bench_backends,
+    bench_startup,
+    bench_concurrency,
+    bench_shared_memory,
+)
+from . import memory
+from .runner import run, compare, load, save
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("-o", "--output", help="A JSON file to save the results to")
+    run_parser.add_argument(
+        "-k", "--filter", default="*", help="A glob of the benchmarks to run"
+    )
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="The minimal time of each repetition, in seconds",
+    )
+
+    compare_parser = commands.add_parser("compare", help="Compare two saved runs")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="The relative slowdown considered a regression",
+    )
+
+    memory_parser = commands.add_parser(
+        "memory", help="Measure the memory per entry of MemoryCache"
+    )
+    memory_parser.add_argument("--entries", type=int, default=100000)
+
+    args = parser.parse_args()
+    if args.command == "memory":
+        memory.measure(args.entries)
+        return 0
+    if args.command == "run":
+        benchmarks = [b for n, b in BENCHMARKS.items() if fnmatch(n, args.filter)]
+        results = run(benchmarks, repeat=args.repeat, min_time=args.min_time)
+        if args.output:
+            save(results, args.output)
+        return 0
+    ok = compare(load(args.base), load(args.new), threshold=args.threshold)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
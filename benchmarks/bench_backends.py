@@ -0,0 +1,182 @@
+"""
+``RedisCache``, ``ShardedRedisCache`` and ``PostgresqlCache`` against the local stand-ins in ``stand_ins``,
+and ``SqliteCache`` in a temporary file.
+"""
+
+import os
+from contextlib import contextmanager, ExitStack
+from tempfile import TemporaryDirectory
+
+from thornfield.caches.cache_compression_decorator import CacheCompressionDecorator
+from thornfield.caches.cache_serialization_decorator import CacheSerializationDecorator
+from thornfield.caches.postgresql_cache import PostgresqlCache
+from thornfield.caches.redis_cache import RedisCache
+from thornfield.caches.sharded_redis_cache import ShardedRedisCache
+from thornfield.caches.sqlite_cache import SqliteCache
+from . import benchmark
+from .stand_ins import RespServer, SqliteConnectionPool
+
+_KEYS = [f"key{i}" for i in range(100)]
+_VALUE = "x" * 100
+# A typical cached result, e.g. a row
+_RECORD = {"id": 12345, "name": "thornfield", "tags": ["a", "b", "c"], "score": 0.75}
+
+
+def _redis_cache(server: RespServer) -> RedisCache:
+    cache = RedisCache(port=server.port)
+    cache.set_many([(k, _VALUE) for k in _KEYS], 0)
+    return cache
+
+
+def _postgresql_cache() -> PostgresqlCache:
+    cache = PostgresqlCache(SqliteConnectionPool(), "bench")
+    cache.set_many([(k, _VALUE) for k in _KEYS], 0)
+    return cache
+
+
+@contextmanager
+def _sqlite_cache(max_entries=None):
+    with TemporaryDirectory() as directory:
+        cache = SqliteCache(
+            os.path.join(directory, "cache.db"), max_entries=max_entries
+        )
+        cache.set_many([(k, _VALUE) for k in _KEYS], 0)
+        yield cache
+
+
+@benchmark("redis/get")
+def redis_get():
+    with RespServer() as server:
+        cache = _redis_cache(server)
+        yield lambda: cache.get("key1")
+
+
+@benchmark("redis/set")
+def redis_set():
+    with RespServer() as server:
+        cache = _redis_cache(server)
+        yield lambda: cache.set("key1", _VALUE, 60000)
+
+
+@benchmark("redis/get_many_100")
+def redis_get_many():
+    with RespServer() as server:
+        cache = _redis_cache(server)
+        yield lambda: cache.get_many(_KEYS)
+
+
+@benchmark("redis/set_many_100")
+def redis_set_many():
+    with RespServer() as server:
+        cache = _redis_cache(server)
+        items = [(k, _VALUE) for k in _KEYS]
+        yield lambda: cache.set_many(items, 60000)
+
+
+@benchmark("redis/get_serialized")
+def redis_get_serialized():
+    with RespServer() as server:
+        cache = CacheSerializationDecorator(RedisCache(port=server.port))
+        cache.set(("key", 1), _RECORD, 0)
+        yield lambda: cache.get(("key", 1))
+
+
+@benchmark("redis/get_serialized_binary")
+def redis_get_serialized_binary():
+    with RespServer() as server:
+        cache = CacheSerializationDecorator(
+            RedisCache(port=server.port, binary=True), binary=True
+        )
+        cache.set(("key", 1), _RECORD, 0)
+        yield lambda: cache.get(("key", 1))
+
+
+@benchmark("redis/get_compressed_binary")
+def redis_get_compressed_binary():
+    with RespServer() as server:
+        cache = CacheSerializationDecorator(
+            CacheCompressionDecorator(
+                RedisCache(port=server.port, binary=True), binary=True
+            ),
+            binary=True,
+        )
+        cache.set(("key", 1), _RECORD, 0)
+        yield lambda: cache.get(("key", 1))
+
+
+@contextmanager
+def _sharded_redis_cache(nodes: int):
+    with ExitStack() as stack:
+        servers = [stack.enter_context(RespServer()) for _ in range(nodes)]
+        cache = ShardedRedisCache([f"127.0.0.1:{s.port}" for s in servers])
+        cache.set_many([(k, _VALUE) for k in _KEYS], 0)
+        yield cache
+
+
+@benchmark("sharded_redis/get")
+def sharded_redis_get():
+    with _sharded_redis_cache(3) as cache:
+        yield lambda: cache.get("key1")
+
+
+@benchmark("sharded_redis/get_many_100")
+def sharded_redis_get_many():
+    with _sharded_redis_cache(3) as cache:
+        yield lambda: cache.get_many(_KEYS)
+
+
+@benchmark("postgresql/get")
+def postgresql_get():
+    cache = _postgresql_cache()
+    yield lambda: cache.get("key1")
+
+
+@benchmark("postgresql/set")
+def postgresql_set():
+    cache = _postgresql_cache()
+    yield lambda: cache.set("key1", _VALUE, 60000)
+
+
+@benchmark("postgresql/get_many_100")
+def postgresql_get_many():
+    cache = _postgresql_cache()
+    yield lambda: cache.get_many(_KEYS)
+
+
+@benchmark("postgresql/set_many_100")
+def postgresql_set_many():
+    cache = _postgresql_cache()
+    items = [(k, _VALUE) for k in _KEYS]
+    yield lambda: cache.set_many(items, 60000)
+
+
+@benchmark("sqlite/get")
+def sqlite_get():
+    with _sqlite_cache() as cache:
+        yield lambda: cache.get("key1")
+
+
+@benchmark("sqlite/set")
+def sqlite_set():
+    with _sqlite_cache() as cache:
+        yield lambda: cache.set("key1", _VALUE, 60000)
+
+
+@benchmark("sqlite/set_bounded")
+def sqlite_set_bounded():
+    with _sqlite_cache(max_entries=1000) as cache:
+        keys = iter(range(10**9))
+        yield lambda: cache.set(next(keys), _VALUE, 60000)
+
+
+@benchmark("sqlite/get_many_100")
+def sqlite_get_many():
+    with _sqlite_cache() as cache:
+        yield lambda: cache.get_many(_KEYS)
+
+
+@benchmark("sqlite/set_many_100")
+def sqlite_set_many():
+    with _sqlite_cache() as cache:
+        items = [(k, _VALUE) for k in _KEYS]
+        yield lambda: cache.set_many(items, 60000)
@@ -0,0 +1,120 @@
+"""
+The overhead ``Cacher`` adds to a call, compared to calling the function directly.
+"""
+from thornfield import Cacher
+from thornfield.caches.cache import Cache
+from thornfield.caches.memory_cache import MemoryCache
+from thornfield.constants import NOT_FOUND
+from thornfield.typing import Cached, NotCached
+from . import benchmark
+
+
+class NullCache(Cache):
+    """
+    A cache that never has the key, to measure misses without the cost of a real cache.
+    """
+
+    def get(self, key):
+        return NOT_FOUND
+
+    def set(self, key, value, expiration: int) -> None:
+        pass
+
+
+def _func(a, b, c=3):
+    return a
+
+
+async def _afunc(a, b, c=3):
+    return a
+
+
+def _annotated_func(a: Cached, b: Cached, c=3):
+    return a
+
+
+def _not_cached_func(a, b: NotCached, c=3):
+    return a
+
+
+@benchmark("cacher/bare_function")
+def bare_function():
+    yield lambda: _func(1, 2)
+
+
+@benchmark("cacher/hit")
+def hit():
+    foo = Cacher(None).cached(MemoryCache())(_func)
+    foo(1, 2)
+    yield lambda: foo(1, 2)
+
+
+@benchmark("cacher/hit_kwargs")
+def hit_kwargs():
+    foo = Cacher(None).cached(MemoryCache())(_func)
+    foo(1, b=2)
+    yield lambda: foo(1, b=2)
+
+
+@benchmark("cacher/hit_cached_annotations")
+def hit_cached_annotations():
+    foo = Cacher(None).cached(MemoryCache())(_annotated_func)
+    foo(1, 2)
+    yield lambda: foo(1, 2)
+
+
+@benchmark("cacher/hit_not_cached_annotations")
+def hit_not_cached_annotations():
+    foo = Cacher(None).cached(MemoryCache())(_not_cached_func)
+    foo(1, 2)
+    yield lambda: foo(1, 2)
+
+
+@benchmark("cacher/hit_method")
+def hit_method():
+    class Foo:
+        @Cacher(None).cached(MemoryCache())
+        def bar(self, a, b):
+            return a
+
+    foo = Foo()
+    foo.bar(1, 2)
+    yield lambda: foo.bar(1, 2)
+
+
+@benchmark("cacher/hit_stats")
+def hit_stats():
+    foo = Cacher(None, collect_stats=True).cached(MemoryCache())(_func)
+    foo(1, 2)
+    yield lambda: foo(1, 2)
+
+
+@benchmark("cacher/miss")
+def miss():
+    foo = Cacher(None).cached(NullCache())(_func)
+    yield lambda: foo(1, 2)
+
+
+@benchmark("cacher/miss_single_flight")
+def miss_single_flight():
+    foo = Cacher(None).cached(NullCache(), single_flight=True)(_func)
+    yield lambda: foo(1, 2)
+
+
+@benchmark("cacher/async_bare_function", is_async=True)
+def async_bare_function():
+    yield lambda: _afunc(1, 2)
+
+
+@benchmark("cacher/async_hit", is_async=True)
+def async_hit():
+    cache = MemoryCache()
+    foo = Cacher(None).cached(cache)(_afunc)
+    cache.set((1, 2, 3), 1, 0)
+    yield lambda: foo(1, 2)
+
+
+@benchmark("cacher/async_miss", is_async=True)
+def async_miss():
+    foo = Cacher(None).cached(NullCache())(_afunc)
+    yield lambda: foo(1, 2)
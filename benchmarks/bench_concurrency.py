@@ -0,0 +1,58 @@
+"""
+Throughput of the memory caches accessed by several threads at once.
+Each operation is a round in which every thread does ``_OPS_PER_THREAD`` reads,
+and sets the keys it misses, so the time of an operation is the time of the whole round.
+"""
+from threading import Barrier, Thread
+
+from thornfield.caches.memory_cache import MemoryCache
+from thornfield.caches.sharded_memory_cache import ShardedMemoryCache
+from thornfield.constants import NOT_FOUND
+from . import benchmark
+
+_THREADS = 8
+_OPS_PER_THREAD = 1000
+_KEYS = 2000
+
+_CACHES = {
+    "memory": lambda: MemoryCache(max_entries=_KEYS // 2),
+    "sharded": lambda: ShardedMemoryCache(max_entries=_KEYS // 2),
+}
+
+
+def _register(name: str):
+    @benchmark(f"concurrency/{name}_{_THREADS}_threads")
+    def threads():
+        cache = _CACHES[name]()
+        start = Barrier(_THREADS + 1)
+        end = Barrier(_THREADS + 1)
+        stopped = False
+
+        def work(offset: int):
+            keys = [(offset * 31 + i * 7) % _KEYS for i in range(_OPS_PER_THREAD)]
+            while True:
+                start.wait()
+                if stopped:
+                    return
+                for key in keys:
+                    if cache.get(key) is NOT_FOUND:
+                        cache.set(key, key, 60000)
+                end.wait()
+
+        workers = [Thread(target=work, args=(i,), daemon=True) for i in range(_THREADS)]
+        for w in workers:
+            w.start()
+
+        def round_():
+            start.wait()
+            end.wait()
+
+        yield round_
+        stopped = True
+        start.wait()
+        for w in workers:
+            w.join()
+
+
+for _name in _CACHES:
+    _register(_name)
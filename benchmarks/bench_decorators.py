@@ -0,0 +1,63 @@
+"""
+The serialization and compression decorators, over a cache that stores values as they are.
+"""
+import json
+
+from thornfield.caches.cache_compression_decorator import CacheCompressionDecorator
+from thornfield.caches.cache_serialization_decorator import CacheSerializationDecorator
+from thornfield.caches.memory_cache import MemoryCache
+from . import benchmark
+
+SIZES = {"small": 1, "medium": 100, "large": 10000}
+
+
+def _value(size: int) -> dict:
+    return {"ids": list(range(size)), "names": [f"name{i}" for i in range(size)]}
+
+
+def _serialization_cache() -> CacheSerializationDecorator:
+    return CacheSerializationDecorator(MemoryCache(), json.dumps, json.loads)
+
+
+def _register(size_name: str, size: int):
+    @benchmark(f"serialization/get_{size_name}")
+    def serialization_get():
+        cache = _serialization_cache()
+        cache.set((1,), _value(size), 0)
+        yield lambda: cache.get((1,))
+
+    @benchmark(f"serialization/set_{size_name}")
+    def serialization_set():
+        cache = _serialization_cache()
+        value = _value(size)
+        yield lambda: cache.set((1,), value, 0)
+
+    @benchmark(f"serialization/default_get_{size_name}")
+    def default_serialization_get():
+        cache = CacheSerializationDecorator(MemoryCache())
+        cache.set((1,), _value(size), 0)
+        yield lambda: cache.get((1,))
+
+    @benchmark(f"compression/get_{size_name}")
+    def compression_get():
+        cache = CacheCompressionDecorator(MemoryCache())
+        cache.set("1", json.dumps(_value(size)), 0)
+        yield lambda: cache.get("1")
+
+    @benchmark(f"compression/set_{size_name}")
+    def compression_set():
+        cache = CacheCompressionDecorator(MemoryCache())
+        value = json.dumps(_value(size))
+        yield lambda: cache.set("1", value, 0)
+
+    @benchmark(f"serialization_compression/get_{size_name}")
+    def chain_get():
+        cache = CacheSerializationDecorator(
+            CacheCompressionDecorator(MemoryCache()), json.dumps, json.loads
+        )
+        cache.set((1,), _value(size), 0)
+        yield lambda: cache.get((1,))
+
+
+for _name, _size in SIZES.items():
+    _register(_name, _size)
@@ -0,0 +1,117 @@
+import os
+from tempfile import TemporaryDirectory
+
+from thornfield.caches.memory_cache import MemoryCache
+from . import benchmark
+
+_KEYS = 1000
+
+
+def _filled(expiration: int) -> MemoryCache:
+    cache = MemoryCache()
+    for i in range(_KEYS):
+        cache.set((i,), i, expiration)
+    return cache
+
+
+@benchmark("memory_cache/get_hit")
+def get_hit():
+    cache = _filled(0)
+    yield lambda: cache.get((500,))
+
+
+@benchmark("memory_cache/get_hit_expiring")
+def get_hit_expiring():
+    cache = _filled(60000)
+    yield lambda: cache.get((500,))
+
+
+@benchmark("memory_cache/get_miss")
+def get_miss():
+    cache = _filled(0)
+    yield lambda: cache.get((-1,))
+
+
+@benchmark("memory_cache/set")
+def set_():
+    cache = _filled(0)
+    yield lambda: cache.set((500,), 1, 0)
+
+
+@benchmark("memory_cache/set_expiring")
+def set_expiring():
+    cache = _filled(60000)
+    yield lambda: cache.set((500,), 1, 60000)
+
+
+@benchmark("memory_cache/get_many_100")
+def get_many():
+    cache = _filled(0)
+    keys = [(i,) for i in range(0, _KEYS, 10)]
+    yield lambda: cache.get_many(keys)
+
+
+@benchmark("memory_cache/set_many_100")
+def set_many():
+    cache = _filled(0)
+    items = [((i,), i) for i in range(0, _KEYS, 10)]
+    yield lambda: cache.set_many(items, 0)
+
+
+def _register_bounded(policy: str):
+    @benchmark(f"memory_cache/get_hit_{policy}")
+    def bounded_get_hit():
+        cache = MemoryCache(max_entries=_KEYS, policy=policy)
+        for i in range(_KEYS):
+            cache.set((i,), i, 0)
+        yield lambda: cache.get((500,))
+
+    @benchmark(f"memory_cache/set_evicting_{policy}")
+    def bounded_set_evicting():
+        cache = MemoryCache(max_entries=_KEYS, policy=policy)
+        keys = iter(range(10**9))
+        yield lambda: cache.set((next(keys),), 1, 0)
+
+
+for _policy in ("lru", "lfu", "tinylfu"):
+    _register_bounded(_policy)
+
+
+@benchmark("memory_cache/set_evicting_max_bytes")
+def set_evicting_max_bytes():
+    cache = MemoryCache(max_bytes=100 * _KEYS)
+    keys = iter(range(10**9))
+    yield lambda: cache.set((next(keys),), 1, 0)
+
+
+@benchmark("memory_cache/set_reclaiming")
+def set_reclaiming():
+    # Each entry expires a millisecond after it's set, so writes keep reclaiming entries
+    cache = MemoryCache(expiry_resolution=1)
+    keys = iter(range(10**9))
+    yield lambda: cache.set((next(keys),), 1, 1)
+
+
+@benchmark("memory_cache/get_hit_time_to_idle")
+def get_hit_time_to_idle():
+    cache = MemoryCache(time_to_idle=60000)
+    for i in range(_KEYS):
+        cache.set((i,), i, 0)
+    yield lambda: cache.get((500,))
+
+
+def _restore(lazy: bool):
+    with TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.snapshot")
+        _filled(60000).snapshot(path)
+        yield lambda: MemoryCache().restore(path, lazy=lazy)
+
+
+@benchmark("memory_cache/restore_1000")
+def restore():
+    yield from _restore(False)
+
+
+@benchmark("memory_cache/restore_1000_lazy")
+def restore_lazy():
+    yield from _restore(True)
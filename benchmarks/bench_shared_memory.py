@@ -0,0 +1,24 @@
+import os
+from tempfile import TemporaryDirectory
+
+from thornfield.caches.shared_memory_cache import SharedMemoryCache
+from . import benchmark
+
+_KEYS = 1000
+
+
+def _register(name: str, op):
+    @benchmark(f"shared_memory/{name}")
+    def bench():
+        with TemporaryDirectory() as directory:
+            cache = SharedMemoryCache(os.path.join(directory, "cache"), size=1 << 22)
+            for i in range(_KEYS):
+                cache.set((i,), i, 60000)
+            yield lambda: op(cache)
+            del cache
+
+
+_register("get_hit", lambda cache: cache.get((500,)))
+_register("get_miss", lambda cache: cache.get((-1,)))
+_register("set", lambda cache: cache.set((500,), 1, 0))
+_register("set_expiring", lambda cache: cache.set((500,), 1, 60000))
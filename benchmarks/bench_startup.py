@@ -0,0 +1,68 @@
+"""
+The time it takes to import thornfield and to decorate functions,
+which add up for services that cache many functions and start often.
+"""
+import os
+import subprocess
+import sys
+
+from thornfield import Cacher
+from thornfield.caches.memory_cache import MemoryCache
+from . import benchmark
+
+_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def _run_python(code: str) -> None:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [_SRC, env.get("PYTHONPATH")]))
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+def _func(a, b, c=3):
+    return a
+
+
+async def _afunc(a, b, c=3):
+    return a
+
+
+@benchmark("startup/interpreter")
+def interpreter():
+    yield lambda: _run_python("pass")
+
+
+@benchmark("startup/import_thornfield")
+def import_thornfield():
+    yield lambda: _run_python("import thornfield")
+
+
+@benchmark("startup/import_caches")
+def import_caches():
+    yield lambda: _run_python("from thornfield.caches import MemoryCache")
+
+
+@benchmark("startup/decorate")
+def decorate():
+    cacher = Cacher(lambda _: MemoryCache())
+    yield lambda: cacher.cached(_func)
+
+
+@benchmark("startup/decorate_with_options")
+def decorate_with_options():
+    cacher = Cacher(lambda _: MemoryCache())
+    yield lambda: cacher.cached(
+        expiration=1000, single_flight=True, stale_ttl=1000, expiration_jitter=0.1
+    )(_func)
+
+
+@benchmark("startup/decorate_async")
+def decorate_async():
+    cacher = Cacher(lambda _: MemoryCache())
+    yield lambda: cacher.cached(_afunc)
+
+
+@benchmark("startup/decorate_batch")
+def decorate_batch():
+    cacher = Cacher(lambda _: MemoryCache())
+    yield lambda: cacher.cached_batch("a")(_func)
@@ -0,0 +1,46 @@
+"""
+Measures the memory ``MemoryCache`` takes per entry, beyond the keys and values themselves.
+"""
+import gc
+import tracemalloc
+from typing import Callable, Dict, Tuple
+
+from thornfield.caches.memory_cache import MemoryCache
+
+_ENTRIES = 100000
+_HOUR = 60 * 60 * 1000
+
+# The layouts of the entries - a cache factory and the expiration of the entries
+LAYOUTS: Dict[str, Tuple[Callable[[int], MemoryCache], int]] = {
+    "unbounded": (lambda n: MemoryCache(), 0),
+    "unbounded_expiring": (lambda n: MemoryCache(), _HOUR),
+    "time_to_idle": (lambda n: MemoryCache(time_to_idle=_HOUR), 0),
+    "lru": (lambda n: MemoryCache(max_entries=n), 0),
+    "lru_expiring": (lambda n: MemoryCache(max_entries=n), _HOUR),
+    "lfu": (lambda n: MemoryCache(max_entries=n, policy="lfu"), 0),
+    "tinylfu": (lambda n: MemoryCache(max_entries=n, policy="tinylfu"), 0),
+    "max_bytes": (lambda n: MemoryCache(max_bytes=1000 * n), 0),
+}
+
+
+def measure(
+    entries: int = _ENTRIES, log: Callable[[str], None] = print
+) -> Dict[str, float]:
+    """
+    :return: The bytes per entry of each layout in ``LAYOUTS``.
+    """
+    results = {}
+    keys = [(i,) for i in range(entries)]
+    for name, (create, expiration) in LAYOUTS.items():
+        cache = create(entries)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            for key in keys:
+                cache.set(key, key, expiration)
+            results[name] = tracemalloc.get_traced_memory()[0] / entries
+        finally:
+            tracemalloc.stop()
+        del cache
+        log(f"{name:<50} {results[name]:>8.1f} B/entry")
+    return results
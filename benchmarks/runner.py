@@ -0,0 +1,170 @@
+import asyncio
+import gc
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from statistics import median
+from time import perf_counter
+from typing import Callable, Dict, Any, Optional, Iterable
+
+from . import Benchmark
+
+
+def run(
+    benchmarks: Iterable[Benchmark],
+    repeat: int = 5,
+    min_time: float = 0.2,
+    log: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    """
+    Times each benchmark ``repeat`` times, each time running its operation
+    enough times to take at least ``min_time`` seconds.
+
+    :return: The results with the environment they were measured in,
+        in the format expected by ``compare``.
+    """
+    results = {}
+    for b in benchmarks:
+        loop = asyncio.new_event_loop() if b.is_async else None
+        try:
+            with b.setup() as op:
+                timer = _atimer(op, loop) if b.is_async else _timer(op)
+                number = _calibrate(timer, min_time)
+                times = [timer(number) / number for _ in range(repeat)]
+        finally:
+            if loop is not None:
+                loop.close()
+        results[b.name] = {
+            "min_ns": min(times) * 1e9,
+            "median_ns": median(times) * 1e9,
+            "loops": number,
+        }
+        log(f"{b.name:<50} {_format_ns(results[b.name]['median_ns']):>12}")
+    return {"environment": _environment(), "results": results}
+
+
+def compare(
+    base: Dict[str, Any],
+    new: Dict[str, Any],
+    threshold: float = 0.1,
+    log: Callable[[str], None] = print,
+) -> bool:
+    """
+    Compares the medians of two runs.
+
+    :param threshold: The relative slowdown above which a benchmark is considered a regression.
+    :return: Whether there are no regressions.
+    """
+    if base["environment"].get("machine") != new["environment"].get("machine"):
+        log("Warning: the runs were measured on different machines")
+    ok = True
+    base_results, new_results = base["results"], new["results"]
+    for name in sorted(base_results.keys() | new_results.keys()):
+        if name not in base_results or name not in new_results:
+            status = "new" if name in new_results else "removed"
+            log(f"{name:<50} {status:>38}")
+            continue
+        before = base_results[name]["median_ns"]
+        after = new_results[name]["median_ns"]
+        ratio = after / before
+        mark = ""
+        if ratio > 1 + threshold:
+            mark = "  REGRESSION"
+            ok = False
+        elif ratio < 1 - threshold:
+            mark = "  improvement"
+        log(
+            f"{name:<50} {_format_ns(before):>12} {_format_ns(after):>12}"
+            f" {ratio:>10.2f}x{mark}"
+        )
+    return ok
+
+
+def _timer(op: Callable[[], Any]) -> Callable[[int], float]:
+    def timer(number: int) -> float:
+        r = range(number)
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = perf_counter()
+            for _ in r:
+                op()
+            return perf_counter() - start
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    return timer
+
+
+def _atimer(
+    op: Callable[[], Any], loop: asyncio.AbstractEventLoop
+) -> Callable[[int], float]:
+    async def run_ops(number: int) -> float:
+        r = range(number)
+        start = perf_counter()
+        for _ in r:
+            await op()
+        return perf_counter() - start
+
+    def timer(number: int) -> float:
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return loop.run_until_complete(run_ops(number))
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    return timer
+
+
+def _calibrate(timer: Callable[[int], float], min_time: float) -> int:
+    number = 1
+    while True:
+        if timer(number) >= min_time:
+            return number
+        number *= 10 if number < 1000 else 2
+
+
+def _environment() -> Dict[str, Optional[str]]:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "machine": f"{platform.system()} {platform.machine()} {platform.processor()}",
+        "commit": _git_commit(),
+        "time": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(results: Dict[str, Any], path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
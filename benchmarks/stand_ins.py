@@ -0,0 +1,212 @@
+"""
+Local stand-ins for the Redis and PostgreSQL servers, so the backends can be benchmarked
+without external services. They measure the client side - thornfield, the client library
+and a local round trip - not the performance of the real servers.
+"""
+
+import re
+import socket
+import sqlite3
+import threading
+from socketserver import ThreadingTCPServer, StreamRequestHandler
+from time import time
+from typing import Dict, Optional, Tuple, List
+
+
+class RespServer(ThreadingTCPServer):
+    """
+    An in-memory server speaking the subset of the Redis protocol that ``RedisCache`` uses.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _RespHandler)
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self.lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+class _RespHandler(StreamRequestHandler):
+    server: RespServer
+
+    def setup(self) -> None:
+        super().setup()
+        self._null = b"$-1\r\n"
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self) -> None:
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            self.wfile.write(self._execute(command))
+            self.wfile.flush()
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:])
+        args = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _execute(self, command: List[bytes]) -> bytes:
+        name = command[0].upper()
+        data = self.server.data
+        with self.server.lock:
+            if name == b"GET":
+                return self._bulk(self._get(command[1]))
+            if name == b"MGET":
+                values = [self._bulk(self._get(k)) for k in command[1:]]
+                return b"*%d\r\n" % len(values) + b"".join(values)
+            if name == b"SET":
+                expires_at = None
+                if len(command) > 4 and command[3].upper() == b"PX":
+                    expires_at = time() + int(command[4]) / 1000
+                data[command[1]] = (command[2], expires_at)
+                return b"+OK\r\n"
+            if name in (b"DEL", b"UNLINK"):
+                removed = sum(data.pop(k, None) is not None for k in command[1:])
+                return b":%d\r\n" % removed
+            if name == b"FLUSHDB":
+                data.clear()
+                return b"+OK\r\n"
+            if name == b"HELLO":
+                protocol = command[1] if len(command) > 1 else b"2"
+                if protocol == b"3":
+                    self._null = b"_\r\n"
+                return b"%%1\r\n$5\r\nproto\r\n:%s\r\n" % protocol
+            if name == b"PING":
+                return b"+PONG\r\n"
+            if name in (b"SELECT", b"CLIENT", b"AUTH"):
+                return b"+OK\r\n"
+        return b"-ERR unknown command\r\n"
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        entry = self.server.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time():
+            del self.server.data[key]
+            return None
+        return value
+
+    def _bulk(self, value: Optional[bytes]) -> bytes:
+        if value is None:
+            return self._null
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class SqliteConnectionPool:
+    """
+    A ``psycopg2``-like connection pool over an in-memory SQLite database,
+    translating the PostgreSQL syntax ``PostgresqlCache`` uses.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._connection = _SqliteConnection()
+
+    def getconn(self):
+        return self._connection
+
+    def putconn(self, conn) -> None:
+        pass
+
+
+class _SqliteConnection:
+    def __init__(self) -> None:
+        super().__init__()
+        self._db = sqlite3.connect(":memory:", check_same_thread=False)
+        self.prepared: Dict[str, str] = {}
+
+    def cursor(self):
+        return _SqliteCursor(self._db.cursor(), self.prepared)
+
+    def commit(self) -> None:
+        self._db.commit()
+
+    def rollback(self) -> None:
+        self._db.rollback()
+
+
+class _SqliteCursor:
+    _ANY = re.compile(r"=any\(%s\)")
+    _UNNEST = re.compile(r"unnest\(%s, %s\) as u\(k, v\)")
+    _CAST = re.compile(r"::\w+(\[\])?")
+    _PARAM = re.compile(r"\$(\d+)")
+    _TABLES = "information_schema.tables where table_name"
+
+    def __init__(self, cursor: sqlite3.Cursor, prepared: Dict[str, str]) -> None:
+        super().__init__()
+        self._cursor = cursor
+        self._prepared = prepared
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self._cursor.close()
+
+    def execute(self, query: str, params: tuple) -> None:
+        params = list(params)
+        if query.startswith("prepare "):
+            name, _, query = query[len("prepare ") :].partition(" as ")
+            self._prepared[name] = query
+            self._rows, self.rowcount = [], 0
+            return
+        if query.startswith("execute "):
+            query = self._prepared[query.split()[1]]
+            params = [params[int(n) - 1] for n in self._PARAM.findall(query)]
+            query = self._PARAM.sub("%s", query)
+        query = self._CAST.sub("", query)
+        match = self._UNNEST.search(query)
+        if match:
+            index = query[: match.start()].count("%s")
+            keys, values = params[index : index + 2]
+            rows = ", ".join(["(%s, %s)"] * len(keys))
+            query = self._UNNEST.sub(
+                f"(select column1 as k, column2 as v from (values {rows})) where true",
+                query,
+                count=1,
+            )
+            params[index : index + 2] = [p for row in zip(keys, values) for p in row]
+        match = self._ANY.search(query)
+        if match:
+            index = query[: match.start()].count("%s")
+            values = params.pop(index)
+            placeholders = ", ".join(["%s"] * len(values))
+            query = self._ANY.sub(f" in ({placeholders})", query, count=1)
+            params[index:index] = values
+        query = query.replace(self._TABLES, "sqlite_master where name")
+        query = query.replace("%s", "?")
+        self._cursor.execute(query, params)
+        self._rows = self._cursor.fetchall()
+        self.rowcount = len(self._rows) if self._rows else self._cursor.rowcount
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
@@ -0,0 +1,64 @@
+from asyncio import (
+    AbstractEventLoop,
+    CancelledError,
+    Future,
+    ensure_future,
+    get_event_loop,
+    shield,
+)
+from functools import partial
+from typing import Callable, Dict, Any, TypeVar, Awaitable
+
+T = TypeVar("T")
+
+
+class _AsyncCall:
+    def __init__(self, loop: AbstractEventLoop, task: Future) -> None:
+        super().__init__()
+        self.loop = loop
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """
+    Makes sure only one coroutine at a time is awaited for a given key.
+    Other tasks calling with the same key await the running call and get its result.
+
+    The call runs in its own task, so cancelling one of the waiting tasks doesn't
+    cancel it for the others. It is cancelled only when all waiting tasks are cancelled.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._calls: Dict[Any, _AsyncCall] = {}
+
+    async def do(self, key, func: Callable[[], Awaitable[T]]) -> T:
+        try:
+            hash(key)
+        except TypeError:
+            return await func()
+
+        loop = get_event_loop()
+        call = self._calls.get(key)
+        if call is None or call.loop is not loop:
+            call = _AsyncCall(loop, ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(partial(self._remove, key, call))
+
+        call.waiters += 1
+        try:
+            return await shield(call.task)
+        except CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _remove(self, key, call: _AsyncCall, task: Future) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not task.cancelled():
+            # Marks the exception as retrieved, in case all waiters were cancelled
+            task.exception()
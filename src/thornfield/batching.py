@@ -0,0 +1,107 @@
+from typing import Callable, Any, List, Tuple, Dict, Sequence
+
+from .constants import NOT_FOUND
+from .errors import CachingError
+from .key_builder import create_key_builder, get_key_arg_names, get_arg_spec
+
+
+class BatchSplitter:
+    """
+    Splits a call of a function that gets a batch of elements in ``batch_arg``
+    into a cache key per element, and creates the arguments for calling it
+    with only some of the elements.
+
+    The batch can be a ``list``, a ``tuple`` or a ``numpy`` array.
+    """
+
+    def __init__(self, func: Callable, batch_arg: str) -> None:
+        super().__init__()
+        func_args = get_arg_spec(func).args
+        key_args = get_key_arg_names(func)
+        if batch_arg not in key_args:
+            raise CachingError(
+                f'"{batch_arg}" is not a cached argument of {func.__qualname__}'
+            )
+        self._batch_arg = batch_arg
+        self._arg_index = func_args.index(batch_arg)
+        self._key_index = key_args.index(batch_arg)
+        self._make_key = create_key_builder(func)
+
+    def split(self, args: tuple, kwargs: dict) -> Tuple[Any, List[tuple]]:
+        """
+        :return: The batch, and the cache key of each of its elements.
+        """
+        if len(args) > self._arg_index:
+            batch = args[self._arg_index]
+        else:
+            batch = kwargs[self._batch_arg]
+        key = self._make_key(args, kwargs)
+        before, after = key[: self._key_index], key[self._key_index + 1 :]
+        elements = batch.tolist() if _is_ndarray(batch) else batch
+        return batch, [before + (e,) + after for e in elements]
+
+    def with_elements(
+        self, args: tuple, kwargs: dict, batch, indices: List[int]
+    ) -> Tuple[tuple, dict]:
+        """
+        :return: ``args`` and ``kwargs`` with the batch replaced by its elements in ``indices``.
+        """
+        if _is_ndarray(batch):
+            sub_batch = batch[indices]
+        elif isinstance(batch, tuple):
+            sub_batch = tuple(batch[i] for i in indices)
+        else:
+            sub_batch = [batch[i] for i in indices]
+
+        if len(args) > self._arg_index:
+            i = self._arg_index
+            return args[:i] + (sub_batch,) + args[i + 1 :], kwargs
+        kwargs = dict(kwargs)
+        kwargs[self._batch_arg] = sub_batch
+        return args, kwargs
+
+
+def get_missing(keys: List[tuple], results: List) -> Dict[tuple, List[int]]:
+    """
+    :return: The keys that were not found, each with its positions in the batch.
+    """
+    missing = {}
+    for i, (key, result) in enumerate(zip(keys, results)):
+        if result is NOT_FOUND:
+            missing.setdefault(key, []).append(i)
+    return missing
+
+
+def merge(
+    results: List, missing: Dict[tuple, List[int]], computed: Sequence
+) -> List[Tuple[tuple, Any]]:
+    """
+    Puts the values computed for the missing keys in ``results``.
+
+    :return: Pairs of missing key and its computed value.
+    """
+    computed = computed.tolist() if _is_ndarray(computed) else list(computed)
+    if len(computed) != len(missing):
+        raise CachingError(
+            f"Expected {len(missing)} results for the batch but got {len(computed)}"
+        )
+    for positions, value in zip(missing.values(), computed):
+        for i in positions:
+            results[i] = value
+    return list(zip(missing, computed))
+
+
+def assemble(batch, results: List):
+    """
+    :return: ``results`` as a ``numpy`` array if ``batch`` is one, otherwise as a ``list``.
+    """
+    if _is_ndarray(batch):
+        import numpy
+
+        return numpy.asarray(results)
+    return results
+
+
+def _is_ndarray(obj) -> bool:
+    t = type(obj)
+    return t.__name__ == "ndarray" and t.__module__ == "numpy"
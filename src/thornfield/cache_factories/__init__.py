@@ -1,2 +1,30 @@
-from .postgresql_cache_factory import PostgresqlCacheFactory
-from .redis_cache_factory import RedisCacheFactory
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .postgresql_cache_factory import PostgresqlCacheFactory
+    from .redis_cache_factory import RedisCacheFactory
+    from .shared_memory_cache_factory import SharedMemoryCacheFactory
+    from .sqlite_cache_factory import SqliteCacheFactory
+
+# The factories import their client libraries, so they are imported only when first used
+_LAZY = {
+    "PostgresqlCacheFactory": ".postgresql_cache_factory",
+    "RedisCacheFactory": ".redis_cache_factory",
+    "SharedMemoryCacheFactory": ".shared_memory_cache_factory",
+    "SqliteCacheFactory": ".sqlite_cache_factory",
+}
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,10 +4,12 @@ from typing import Union, Optional, Callable
 
 from .cache_factory import CacheFactory
 from ..caches.cache import Cache
+from ..caches.async_postgresql_cache import AsyncPostgresqlCache
 from ..caches.postgresql_cache import PostgresqlCache
 from ..postgresql_key_value_adapter import (
     PostgresqlKeyValueAdapter,
     ConnectionPool,
+    AsyncConnectionPool,
 )
 
 
@@ -17,9 +19,15 @@ class PostgresqlCacheFactory(CacheFactory):
         connection_pool: ConnectionPool,
         index_table: str = "_index",
         decorator: Optional[Callable[[Cache], Cache]] = None,
+        async_connection_pool: Optional[AsyncConnectionPool] = None,
     ) -> None:
+        """
+        :param async_connection_pool: If passed, creates ``AsyncPostgresqlCache`` instances
+            that use it, so that cached async functions don't block the event loop.
+        """
         super().__init__(decorator)
         self.connection_pool = connection_pool
+        self.async_connection_pool = async_connection_pool
         self.index_table = index_table
         self._pkv_adapter = None
 
@@ -33,16 +41,17 @@ class PostgresqlCacheFactory(CacheFactory):
 
     def _create(self, func: Union[MethodType, FunctionType]) -> PostgresqlCache:
         table = self._normalize_table_name(self._func_to_key(func))
+        if self.async_connection_pool is not None:
+            return AsyncPostgresqlCache(
+                connection_pool=self.connection_pool,
+                async_connection_pool=self.async_connection_pool,
+                table=table,
+            )
         return PostgresqlCache(connection_pool=self.connection_pool, table=table)
 
     def _normalize_table_name(self, table_name: str) -> str:
         table_name = table_name.lower()
         if len(table_name) > 63:
-            n = self._adapter.get(table_name)
-            if not n:
-                used = {int(self._adapter.get(k)) for k in self._adapter.keys()}
-                n = min({i + 1 for i in range(len(used) + 1)}.difference(used))
-                self._adapter.set(table_name, str(n))
-            return f"cache_{n}"
+            return f"cache_{self._adapter.get_or_allocate(table_name)}"
         else:
             return re.sub(r"[^\w]", "_", table_name)
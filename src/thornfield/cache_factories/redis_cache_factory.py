@@ -1,11 +1,41 @@
+import re
+from base64 import urlsafe_b64encode
+from hashlib import blake2b
+from itertools import islice
 from types import MethodType, FunctionType
 from typing import Union, Optional, Callable
 
-from redis import Redis
-
 from .cache_factory import CacheFactory
 from ..caches.cache import Cache
 from ..caches.redis_cache import RedisCache
+from ..errors import CachingError
+
+try:
+    from redis import Redis, ResponseError
+except ModuleNotFoundError:
+    Redis = ResponseError = None
+
+# The key of the last allocated DB in the index, which is DB 0
+_LAST_DB = "thornfield:last_db"
+_SCAN_BATCH = 1000
+# The number of DBs of a Redis server with the default configuration
+_DEFAULT_DATABASES = 16
+# Returns the DB of KEYS[1], allocating the next one by the counter KEYS[2] if it has none,
+# or -1 if all the ARGV[1] DBs are allocated
+_ALLOCATE_DB = """
+local db = redis.call('get', KEYS[1])
+if db then
+    return tonumber(db)
+end
+if tonumber(redis.call('get', KEYS[2]) or '0') + 1 >= tonumber(ARGV[1]) then
+    return -1
+end
+db = redis.call('incr', KEYS[2])
+redis.call('set', KEYS[1], db)
+return db
+"""
+# The keys of caches created with key_prefix=True, which are in DB 0 as well
+_PREFIXED_KEY = re.compile(rb"[A-Za-z0-9_-]{8}:")
 
 
 class RedisCacheFactory(CacheFactory):
@@ -15,20 +45,131 @@ class RedisCacheFactory(CacheFactory):
         port: int = 6379,
         password: Optional[str] = None,
         decorator: Optional[Callable[[Cache], Cache]] = None,
+        asynchronous: bool = False,
+        key_prefix: bool = False,
+        binary: bool = False,
     ) -> None:
+        """
+        :param asynchronous: If ``True``, creates ``AsyncRedisCache`` instances,
+            so that cached async functions don't block the event loop.
+        :param key_prefix: If ``True``, the caches of all the functions are in DB 0 and share
+            one connection pool, and the keys of each function start with a prefix derived from
+            its name. Otherwise, each function has its own DB and connection pool.
+        :param binary: Passed to the caches, see ``RedisCache``.
+        """
         super().__init__(decorator)
+        if Redis is None:
+            raise CachingError('Package "redis" is not installed')
         self.host = host
         self.port = port
         self.password = password
+        self.asynchronous = asynchronous
+        self.key_prefix = key_prefix
+        self.binary = binary
         self._index = Redis(host, port, db=0, password=password)
+        self._client = self._async_client = None
+        self._database_count = None
+
+    def clear(self, func: Union[MethodType, FunctionType]) -> None:
+        """
+        Deletes the cached values of ``func``, a batch at a time, see ``RedisCache.clear``.
+        """
+        self._create(func).clear()
 
     def _create(self, func: Union[MethodType, FunctionType]) -> RedisCache:
         key = self._func_to_key(func)
+        if self.key_prefix:
+            return self._create_prefixed(key)
         db = self._index.get(key)
-        if db is None:
-            used = {int(self._index.get(k)) for k in self._index.keys("*")}
-            db = min({i + 1 for i in range(len(used) + 1)}.difference(used))
-            self._index.set(key, db)
-        return RedisCache(
-            host=self.host, port=self.port, db=db, password=self.password,
+        db = self._allocate_db(key) if db is None else int(db)
+        if self.asynchronous:
+            from ..caches.async_redis_cache import AsyncRedisCache
+
+            cache_cls = AsyncRedisCache
+        else:
+            cache_cls = RedisCache
+        return cache_cls(
+            host=self.host,
+            port=self.port,
+            db=db,
+            password=self.password,
+            binary=self.binary,
         )
+
+    def _allocate_db(self, key: str) -> int:
+        """
+        Numbers the DBs by a counter, in a script that increments it only if ``key`` has no DB,
+        so that processes creating the same cache at the same time agree on its DB
+        and don't use up DB numbers.
+        """
+        if not self._index.exists(_LAST_DB):
+            self._initialize_last_db()
+        databases = self._databases()
+        allocate = self._index.register_script(_ALLOCATE_DB)
+        db = int(allocate(keys=[key, _LAST_DB], args=[databases]))
+        if db < 0:
+            raise CachingError(
+                f"All the {databases} DBs of Redis are allocated, use key_prefix=True"
+            )
+        return db
+
+    def _initialize_last_db(self) -> None:
+        # The DBs of an index created by an older version, which had no counter, mustn't be reused.
+        # DB 0 may also hold cached values, so only the keys and values that can be
+        # an entry of the index are counted.
+        databases = self._databases()
+        last_db = 0
+        keys = self._index.scan_iter(count=_SCAN_BATCH)
+        while True:
+            batch = list(islice(keys, _SCAN_BATCH))
+            if not batch:
+                break
+            batch = [k for k in batch if not _PREFIXED_KEY.match(k)]
+            values = self._index.mget(batch) if batch else []
+            dbs = [int(v) for v in values if v and v.isdigit()]
+            last_db = max([last_db] + [db for db in dbs if db < databases])
+        self._index.set(_LAST_DB, last_db, nx=True)
+
+    def _databases(self) -> int:
+        if self._database_count is None:
+            try:
+                count = int(self._index.config_get("databases")["databases"])
+            except (ResponseError, KeyError, ValueError):
+                # CONFIG is disabled on some managed servers
+                count = _DEFAULT_DATABASES
+            self._database_count = count
+        return self._database_count
+
+    def _create_prefixed(self, key: str) -> RedisCache:
+        if self._client is None:
+            self._client = Redis(
+                self.host,
+                self.port,
+                password=self.password,
+                decode_responses=not self.binary,
+            )
+        prefix = self._prefix(key)
+        if not self.asynchronous:
+            return RedisCache(prefix=prefix, client=self._client, binary=self.binary)
+
+        from ..caches.async_redis_cache import AsyncRedisCache, AsyncRedis
+
+        if self._async_client is None and AsyncRedis is not None:
+            self._async_client = AsyncRedis(
+                host=self.host,
+                port=self.port,
+                password=self.password,
+                decode_responses=not self.binary,
+            )
+        return AsyncRedisCache(
+            prefix=prefix,
+            client=self._client,
+            async_client=self._async_client,
+            binary=self.binary,
+        )
+
+    @staticmethod
+    def _prefix(key: str) -> str:
+        # 48 bits of the hash, so that prefixes are short but practically never collide
+        digest = blake2b(key.encode(), digest_size=6).digest()
+        return urlsafe_b64encode(digest).decode() + ":"
@@ -0,0 +1,39 @@
+from types import MethodType, FunctionType
+from typing import Union, Optional, Callable
+
+from .cache_factory import CacheFactory
+from ..caches.cache import Cache
+from ..caches.shared_memory_cache import SharedMemoryCache
+
+
+class SharedMemoryCacheFactory(CacheFactory):
+    """
+    Creates a ``SharedMemoryCache`` for each function, all in the same file,
+    each in a namespace named after its function.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = 64 * 1024 * 1024,
+        slot_size: int = 512,
+        ways: int = 8,
+        decorator: Optional[Callable[[Cache], Cache]] = None,
+    ) -> None:
+        """
+        See ``SharedMemoryCache`` for the parameters.
+        """
+        super().__init__(decorator)
+        self.path = path
+        self.size = size
+        self.slot_size = slot_size
+        self.ways = ways
+
+    def _create(self, func: Union[MethodType, FunctionType]) -> SharedMemoryCache:
+        return SharedMemoryCache(
+            self.path,
+            size=self.size,
+            slot_size=self.slot_size,
+            ways=self.ways,
+            namespace=self._func_to_key(func),
+        )
@@ -0,0 +1,37 @@
+from types import MethodType, FunctionType
+from typing import Union, Optional, Callable
+
+from .cache_factory import CacheFactory
+from ..caches.cache import Cache
+from ..caches.sqlite_cache import SqliteCache
+
+
+class SqliteCacheFactory(CacheFactory):
+    """
+    Creates a ``SqliteCache`` for each function, all in the same database file,
+    each in a table named after its function.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        decorator: Optional[Callable[[Cache], Cache]] = None,
+    ) -> None:
+        """
+        :param max_entries: The maximal number of entries of each function.
+        :param max_bytes: The maximal total size of the values of each function.
+        """
+        super().__init__(decorator)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def _create(self, func: Union[MethodType, FunctionType]) -> SqliteCache:
+        return SqliteCache(
+            self.path,
+            table=self._func_to_key(func),
+            max_entries=self.max_entries,
+            max_bytes=self.max_bytes,
+        )
@@ -1,14 +1,29 @@
 import logging
 from functools import partial, wraps
-from inspect import getsource, iscoroutinefunction, getfullargspec
+from inspect import iscoroutinefunction
 from types import MethodType
-from typing import Optional, Callable, Any, Dict, List, cast
+from typing import Optional, Callable, Any, List, Tuple, Type, Dict, cast
 
+from thornfield.caches.async_cache import AsyncCache
 from thornfield.caches.cache import Cache
+from .batching import BatchSplitter, get_missing, merge, assemble
 from .caching_data import CachingData
 from .constants import NOT_FOUND
 from .errors import CachingError
-from .typing import NotCached, Cached, NormalCallable
+from .key_builder import create_key_builder
+from .refresher import Refresher
+from .result_policy import ResultPolicy
+from .single_flight import SingleFlight
+from .stats import (
+    CacheStats,
+    FunctionStats,
+    StatsExporter,
+    StatsRegistry,
+    instrument_cache,
+    instrument_function,
+    instrument_validator,
+)
+from .typing import NormalCallable
 
 _CACHE_ATTR = "cache"
 _CACHING_DATA_ATTR = "caching_data"
@@ -16,31 +31,116 @@ _logger = logging.getLogger("thornfield.cacher")
 
 
 class Cacher:
-    def __init__(self, cache_impl: Optional[Callable[[NormalCallable], Cache]]) -> None:
+    def __init__(
+        self,
+        cache_impl: Optional[Callable[[NormalCallable], Cache]],
+        refresh_workers: int = 4,
+        collect_stats: bool = False,
+        stats_exporter: Optional[StatsExporter] = None,
+        stats_export_interval: float = 60,
+    ) -> None:
         """
 
         :param cache_impl: An optional factory function that gets
             the cached method and returns an implementation of ``Cache``.
+        :param refresh_workers: The maximal number of threads refreshing stale values
+            of functions cached with ``stale_ttl``.
+        :param collect_stats: Whether to count hits, misses, validator rejections and cache errors,
+            and measure the time spent in the cache and in the cached functions.
+            Functions cached before it is enabled are not counted.
+        :param stats_exporter: An optional ``callable`` that is called with the result of ``stats``
+            every ``stats_export_interval`` seconds, in a daemon thread.
+            Implies ``collect_stats``.
+        :param stats_export_interval: Time in seconds between calls to ``stats_exporter``.
         """
         super().__init__()
         self._cache_impl = cache_impl
+        self._refresher = Refresher(refresh_workers)
+        self._stats: Optional[StatsRegistry] = None
+        if collect_stats or stats_exporter is not None:
+            self._stats = StatsRegistry(stats_exporter, stats_export_interval)
+
+    def stats(self, reset: bool = False) -> Dict[str, CacheStats]:
+        """
+        :param reset: Whether to reset the statistics after reading them.
+        :return: The statistics of each cached function, by its qualified name.
+            Empty if ``collect_stats`` is disabled.
+        """
+        if self._stats is None:
+            return {}
+        return self._stats.snapshot(reset)
 
     def cached(
         self,
         cache: Optional[Cache] = None,
         validator: Optional[Callable[[Any], bool]] = None,
         expiration: int = 0,
+        single_flight: bool = False,
+        stale_ttl: int = 0,
+        expiration_jitter: float = 0,
+        negative_ttl: int = 0,
+        cache_exceptions: Tuple[Type[BaseException], ...] = (),
+        exception_ttl: int = 0,
     ):
         """
         :param cache: The ``Cache`` to use. If ``None``, ``self.cache_impl`` is called to create one.
         :param validator: A ``callable`` that will be called on the return value of the cached function.
             The value will be cached only if ``validator`` returns ``True``.
         :param expiration: Expiration time for each key, in milliseconds.
+        :param single_flight: If ``True``, concurrent calls (threads, or tasks for async functions)
+            with the same key that miss the cache wait for a single call of the function
+            instead of each calling it.
+        :param stale_ttl: Time in milliseconds to keep values after they expire.
+            During that time the expired value is returned, and refreshed in the background.
+        :param expiration_jitter: A fraction of ``expiration`` by which the expiration of each value
+            is randomly shortened, so that values cached together don't expire together.
+        :param negative_ttl: If not ``0``, values rejected by ``validator`` are cached
+            for this time in milliseconds.
+        :param cache_exceptions: Exception types that are cached when raised by the function,
+            and raised again when their key is hit.
+        :param exception_ttl: Expiration time for cached exceptions, in milliseconds.
+        """
+        if callable(cache):
+            return self.cached()(cast(NormalCallable, cache))
+        return partial(
+            self._cached,
+            cache=cache,
+            validator=validator,
+            expiration=expiration,
+            single_flight=single_flight,
+            stale_ttl=stale_ttl,
+            expiration_jitter=expiration_jitter,
+            negative_ttl=negative_ttl,
+            cache_exceptions=cache_exceptions,
+            exception_ttl=exception_ttl,
+        )
+
+    def cached_batch(
+        self,
+        batch_arg: str,
+        cache: Optional[Cache] = None,
+        validator: Optional[Callable[[Any], bool]] = None,
+        expiration: int = 0,
+    ):
+        """
+        Caches a function that gets a batch of elements and returns a result per element, in the same order.
+        Each element is cached separately, and the function is called only with the elements that
+        aren't in the cache.
+
+        :param batch_arg: The name of the argument that holds the batch -
+            a ``list``, a ``tuple`` or a ``numpy`` array of hashable elements.
+            The result is a ``numpy`` array if the batch is one, otherwise a ``list``.
+        :param cache: The ``Cache`` to use. If ``None``, ``self.cache_impl`` is called to create one.
+        :param validator: A ``callable`` that will be called on the result of each element.
+            The result will be cached only if ``validator`` returns ``True``.
+        :param expiration: Expiration time for each key, in milliseconds.
         """
-        if isinstance(cache, Callable):
-            return self._cached(cast(NormalCallable, cache), None, None, 0)
         return partial(
-            self._cached, cache=cache, validator=validator, expiration=expiration
+            self._cached_batch,
+            batch_arg=batch_arg,
+            cache=cache,
+            validator=validator,
+            expiration=expiration,
         )
 
     def cache_method(
@@ -50,6 +150,12 @@ class Cacher:
         validator: Optional[Callable[[Any], bool]] = None,
         expiration: int = 0,
         use_base_method: bool = True,
+        single_flight: bool = False,
+        stale_ttl: int = 0,
+        expiration_jitter: float = 0,
+        negative_ttl: int = 0,
+        cache_exceptions: Tuple[Type[BaseException], ...] = (),
+        exception_ttl: int = 0,
     ):
         """
 
@@ -60,6 +166,18 @@ class Cacher:
         :param expiration: Expiration time for each key, in milliseconds.
         :param use_base_method: If ``method`` is an implementation of a base method,
             whether to pass to ``self.cache_impl`` it or the base method.
+        :param single_flight: If ``True``, concurrent calls (threads, or tasks for async functions)
+            with the same key that miss the cache wait for a single call of the function
+            instead of each calling it.
+        :param stale_ttl: Time in milliseconds to keep values after they expire.
+            During that time the expired value is returned, and refreshed in the background.
+        :param expiration_jitter: A fraction of ``expiration`` by which the expiration of each value
+            is randomly shortened, so that values cached together don't expire together.
+        :param negative_ttl: If not ``0``, values rejected by ``validator`` are cached
+            for this time in milliseconds.
+        :param cache_exceptions: Exception types that are cached when raised by the function,
+            and raised again when their key is hit.
+        :param exception_ttl: Expiration time for cached exceptions, in milliseconds.
         :return:
         """
         func_passed_to_cache = None
@@ -74,6 +192,12 @@ class Cacher:
             cache=cache,
             validator=validator,
             expiration=expiration,
+            single_flight=single_flight,
+            stale_ttl=stale_ttl,
+            expiration_jitter=expiration_jitter,
+            negative_ttl=negative_ttl,
+            cache_exceptions=cache_exceptions,
+            exception_ttl=exception_ttl,
             func_passed_to_cache=func_passed_to_cache,
         )
         setattr(
@@ -86,25 +210,19 @@ class Cacher:
         if wrapped is None or caching_data is None:
             return NOT_FOUND
 
-        is_instance_func = args and hasattr(args[0], func.__name__)
-        func_args = caching_data.func_args
-        if len(args) < len(func_args) and func_args[0] == "self":
-            func_args = func_args[1:]
-        key = self._get_key(
-            is_instance_func,
-            func_args,
-            args,
-            kwargs,
-            caching_data.func_defaults,
-            caching_data.func_annotations,
-        )
+        if isinstance(func, MethodType):
+            args = (func.__self__,) + args
+        key = caching_data.make_key(args, kwargs)
         func_cache: Optional[Cache] = getattr(wrapped, _CACHE_ATTR, None)
         if func_cache is None:
             func_cache = caching_data.cache or self._cache_impl(
                 caching_data.func_passed_to_cache or func
             )
             setattr(wrapped, _CACHE_ATTR, func_cache)
-        return func_cache.get(key)
+        result = func_cache.get(key)
+        if result is NOT_FOUND or not caching_data.policy.wraps:
+            return result
+        return caching_data.policy.from_entry(result)[0]
 
     def _cached(
         self,
@@ -112,90 +230,319 @@ class Cacher:
         cache: Optional[Cache],
         validator: Optional[Callable[[Any], bool]],
         expiration: int,
+        single_flight: bool = False,
+        stale_ttl: int = 0,
+        expiration_jitter: float = 0,
+        negative_ttl: int = 0,
+        cache_exceptions: Tuple[Type[BaseException], ...] = (),
+        exception_ttl: int = 0,
         func_passed_to_cache: Optional[NormalCallable] = None,
     ):
         if cache is None and self._cache_impl is None:
             raise CachingError("No cache and no cache creator provided.")
+        func_stats, compute, validator = self._instrument(func, validator)
+        policy = ResultPolicy(
+            validator,
+            expiration,
+            stale_ttl=stale_ttl,
+            expiration_jitter=expiration_jitter,
+            negative_ttl=negative_ttl,
+            cache_exceptions=cache_exceptions,
+            exception_ttl=exception_ttl,
+        )
+        is_async = iscoroutinefunction(func)
+        if not single_flight:
+            flight = None
+        elif is_async:
+            # Imported here, so that asyncio is imported only if it's used
+            from .async_single_flight import AsyncSingleFlight
 
-        spec = getfullargspec(func)
-        func_args = spec.args
-        func_annotations = spec.annotations
-        if spec.defaults:
-            func_defaults = dict(zip(func_args[-len(spec.defaults) :], spec.defaults))
+            flight = AsyncSingleFlight()
         else:
-            func_defaults = {}
+            flight = SingleFlight()
+        make_key = create_key_builder(func)
+        get_cache = self._create_cache_getter(
+            func, cache, func_passed_to_cache, func_stats
+        )
 
         def _x(*args, **kwargs):
-            is_instance_func = args and hasattr(args[0], func.__name__)
-            key = self._get_key(
-                is_instance_func,
-                func_args,
-                args,
-                kwargs,
-                func_defaults,
-                func_annotations,
-            )
-            func_cache = getattr(func, _CACHE_ATTR, None)
-            if func_cache is None:
-                func_cache = cache or self._cache_impl(func_passed_to_cache or func)
-                setattr(func, _CACHE_ATTR, func_cache)
-            try:
-                result = func_cache.get(key)
-            except CachingError as e:
-                result = NOT_FOUND
-                _logger.exception("Error getting value from cache", exc_info=e)
+            key = make_key(args, kwargs)
+            func_cache = get_cache()
+            result = self._get_result(func_cache, key)
+            if result is not NOT_FOUND and policy.wraps:
+                result, is_stale = policy.from_entry(result)
+                if is_stale:
+                    refresh = partial(
+                        self._call_and_set,
+                        compute,
+                        args,
+                        kwargs,
+                        func_cache,
+                        key,
+                        policy,
+                    )
+                    self._refresher.refresh((func, key), refresh)
+            if result is NOT_FOUND:
+                call = partial(
+                    self._call_and_set,
+                    compute,
+                    args,
+                    kwargs,
+                    func_cache,
+                    key,
+                    policy,
+                )
+                result = call() if flight is None else flight.do(key, call)
+            return result
 
+        async def _ax(*args, **kwargs):
+            key = make_key(args, kwargs)
+            func_cache = get_cache()
+            if isinstance(func_cache, AsyncCache):
+                result = await self._aget_result(func_cache, key)
+            else:
+                result = self._get_result(func_cache, key)
+            if result is not NOT_FOUND and policy.wraps:
+                result, is_stale = policy.from_entry(result)
+                if is_stale:
+                    refresh = partial(
+                        self._acall_and_set,
+                        compute,
+                        args,
+                        kwargs,
+                        func_cache,
+                        key,
+                        policy,
+                    )
+                    self._refresher.arefresh((func, key), refresh)
             if result is NOT_FOUND:
-                result = func(*args, **kwargs)
-                if validator is None or validator(result):
-                    try:
-                        func_cache.set(key, result, expiration)
-                    except CachingError as e:
-                        _logger.exception("Error setting value to cache", exc_info=e)
+                call = partial(
+                    self._acall_and_set,
+                    compute,
+                    args,
+                    kwargs,
+                    func_cache,
+                    key,
+                    policy,
+                )
+                result = await (call() if flight is None else flight.do(key, call))
             return result
 
-        source = self._get_inner_code(getsource(_x), func)
-        g = dict(globals())
-        g.update(locals())
-        exec(compile(source, "", "exec"), g, locals())
-        inner = locals()["x"]
+        inner = _ax if is_async else _x
         inner.caching_data = CachingData(
-            func_args=func_args,
-            func_annotations=func_annotations,
-            func_defaults=func_defaults,
+            make_key=make_key,
+            policy=policy,
             cache=cache,
             func_passed_to_cache=func_passed_to_cache,
         )
         return wraps(func)(inner)
 
+    def _cached_batch(
+        self,
+        func: NormalCallable,
+        batch_arg: str,
+        cache: Optional[Cache],
+        validator: Optional[Callable[[Any], bool]],
+        expiration: int,
+    ):
+        if cache is None and self._cache_impl is None:
+            raise CachingError("No cache and no cache creator provided.")
+        splitter = BatchSplitter(func, batch_arg)
+        func_stats, compute, validator = self._instrument(func, validator)
+        get_cache = self._create_cache_getter(func, cache, None, func_stats)
+
+        def _x(*args, **kwargs):
+            batch, keys = splitter.split(args, kwargs)
+            func_cache = get_cache()
+            results = self._get_many_results(func_cache, keys)
+            missing = get_missing(keys, results)
+            if missing:
+                indices = [positions[0] for positions in missing.values()]
+                args, kwargs = splitter.with_elements(args, kwargs, batch, indices)
+                computed = merge(results, missing, compute(*args, **kwargs))
+                self._set_many_results(func_cache, computed, validator, expiration)
+            return assemble(batch, results)
+
+        async def _ax(*args, **kwargs):
+            batch, keys = splitter.split(args, kwargs)
+            func_cache = get_cache()
+            is_async_cache = isinstance(func_cache, AsyncCache)
+            if is_async_cache:
+                results = await self._aget_many_results(func_cache, keys)
+            else:
+                results = self._get_many_results(func_cache, keys)
+            missing = get_missing(keys, results)
+            if missing:
+                indices = [positions[0] for positions in missing.values()]
+                args, kwargs = splitter.with_elements(args, kwargs, batch, indices)
+                computed = merge(results, missing, await compute(*args, **kwargs))
+                if is_async_cache:
+                    await self._aset_many_results(
+                        func_cache, computed, validator, expiration
+                    )
+                else:
+                    self._set_many_results(func_cache, computed, validator, expiration)
+            return assemble(batch, results)
+
+        inner = _ax if iscoroutinefunction(func) else _x
+        return wraps(func)(inner)
+
+    def _create_cache_getter(
+        self,
+        func: NormalCallable,
+        cache: Optional[Cache],
+        func_passed_to_cache: Optional[NormalCallable],
+        func_stats: Optional[FunctionStats] = None,
+    ) -> Callable[[], Cache]:
+        def get_cache() -> Cache:
+            func_cache = getattr(func, _CACHE_ATTR, None)
+            if func_cache is None:
+                func_cache = cache or self._cache_impl(func_passed_to_cache or func)
+                setattr(func, _CACHE_ATTR, func_cache)
+            return func_cache
+
+        if func_stats is None:
+            return get_cache
+
+        instrumented: List[Cache] = []
+
+        def get_instrumented_cache() -> Cache:
+            func_cache = get_cache()
+            if not instrumented or instrumented[0] is not func_cache:
+                instrumented[:] = [func_cache, instrument_cache(func_cache, func_stats)]
+            return instrumented[1]
+
+        return get_instrumented_cache
+
+    def _instrument(
+        self, func: NormalCallable, validator: Optional[Callable[[Any], bool]]
+    ) -> Tuple[
+        Optional[FunctionStats], NormalCallable, Optional[Callable[[Any], bool]]
+    ]:
+        if self._stats is None:
+            return None, func, validator
+        func_stats = self._stats.register(func)
+        return (
+            func_stats,
+            instrument_function(func, func_stats),
+            instrument_validator(validator, func_stats),
+        )
+
     @classmethod
-    def _get_inner_code(cls, base, func):
-        source = base[base.index("(") :]
-        if iscoroutinefunction(func):
-            source = f"async def x {source}"
-            i = source.index("func(")
-            source = f"{source[:i]}await {source[i:]}"
-        else:
-            source = f"def x {source}"
-        return source
+    def _call_and_set(
+        cls,
+        func: NormalCallable,
+        args: tuple,
+        kwargs: dict,
+        func_cache: Cache,
+        key: tuple,
+        policy: ResultPolicy,
+    ):
+        try:
+            result = func(*args, **kwargs)
+        except policy.cached_exceptions as e:
+            cls._set_entry(func_cache, key, policy.exception_to_entry(e))
+            raise
+        cls._set_entry(func_cache, key, policy.to_entry(result))
+        return result
 
     @classmethod
-    def _get_key(
+    async def _acall_and_set(
         cls,
-        is_instance_func: bool,
-        func_args: List[str],
+        func: NormalCallable,
         args: tuple,
         kwargs: dict,
-        defaults: Dict[str, Any],
-        annotations: Dict[str, Any],
-    ) -> tuple:
-        key_args = func_args[1:] if is_instance_func else func_args
-        if any(a is NotCached for a in annotations.values()):
-            key_args = filter(lambda a: annotations.get(a) is not NotCached, key_args)
-        elif any(a is Cached for a in annotations.values()):
-            key_args = filter(lambda a: annotations.get(a) is Cached, key_args)
-        arg_values = dict(zip(func_args, args))
-        arg_values.update(kwargs)
-        return tuple(
-            arg_values[a] if a in arg_values else defaults[a] for a in key_args
-        )
+        func_cache: Cache,
+        key: tuple,
+        policy: ResultPolicy,
+    ):
+        try:
+            result = await func(*args, **kwargs)
+        except policy.cached_exceptions as e:
+            await cls._aset_entry(func_cache, key, policy.exception_to_entry(e))
+            raise
+        await cls._aset_entry(func_cache, key, policy.to_entry(result))
+        return result
+
+    @staticmethod
+    def _get_result(func_cache: Cache, key: tuple):
+        try:
+            return func_cache.get(key)
+        except CachingError as e:
+            _logger.exception("Error getting value from cache", exc_info=e)
+            return NOT_FOUND
+
+    @staticmethod
+    async def _aget_result(func_cache: AsyncCache, key: tuple):
+        try:
+            return await func_cache.aget(key)
+        except CachingError as e:
+            _logger.exception("Error getting value from cache", exc_info=e)
+            return NOT_FOUND
+
+    @staticmethod
+    def _set_entry(func_cache: Cache, key: tuple, entry: Optional[Tuple[Any, int]]):
+        if entry is not None:
+            try:
+                func_cache.set(key, *entry)
+            except CachingError as e:
+                _logger.exception("Error setting value to cache", exc_info=e)
+
+    @staticmethod
+    async def _aset_entry(
+        func_cache: Cache, key: tuple, entry: Optional[Tuple[Any, int]]
+    ):
+        if entry is not None:
+            try:
+                if isinstance(func_cache, AsyncCache):
+                    await func_cache.aset(key, *entry)
+                else:
+                    func_cache.set(key, *entry)
+            except CachingError as e:
+                _logger.exception("Error setting value to cache", exc_info=e)
+
+    @staticmethod
+    def _get_many_results(func_cache: Cache, keys: List[tuple]) -> List:
+        try:
+            return func_cache.get_many(keys)
+        except CachingError as e:
+            _logger.exception("Error getting values from cache", exc_info=e)
+            return [NOT_FOUND] * len(keys)
+
+    @staticmethod
+    async def _aget_many_results(func_cache: AsyncCache, keys: List[tuple]) -> List:
+        try:
+            return await func_cache.aget_many(keys)
+        except CachingError as e:
+            _logger.exception("Error getting values from cache", exc_info=e)
+            return [NOT_FOUND] * len(keys)
+
+    @staticmethod
+    def _set_many_results(
+        func_cache: Cache,
+        items: List[Tuple[tuple, Any]],
+        validator: Optional[Callable[[Any], bool]],
+        expiration: int,
+    ) -> None:
+        if validator is not None:
+            items = [(k, v) for k, v in items if validator(v)]
+        if items:
+            try:
+                func_cache.set_many(items, expiration)
+            except CachingError as e:
+                _logger.exception("Error setting values to cache", exc_info=e)
+
+    @staticmethod
+    async def _aset_many_results(
+        func_cache: AsyncCache,
+        items: List[Tuple[tuple, Any]],
+        validator: Optional[Callable[[Any], bool]],
+        expiration: int,
+    ) -> None:
+        if validator is not None:
+            items = [(k, v) for k, v in items if validator(v)]
+        if items:
+            try:
+                await func_cache.aset_many(items, expiration)
+            except CachingError as e:
+                _logger.exception("Error setting values to cache", exc_info=e)
@@ -1,3 +1,46 @@
-from .memory_cache import MemoryCache
-from .postgresql_cache import PostgresqlCache
-from .redis_cache import RedisCache
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .async_cache import AsyncCache
+    from .async_postgresql_cache import AsyncPostgresqlCache
+    from .async_redis_cache import AsyncRedisCache
+    from .memory_cache import MemoryCache
+    from .postgresql_cache import PostgresqlCache
+    from .redis_cache import RedisCache
+    from .sharded_memory_cache import ShardedMemoryCache
+    from .sharded_redis_cache import ShardedRedisCache
+    from .shared_memory_cache import SharedMemoryCache
+    from .sqlite_cache import SqliteCache
+    from .tiered_cache import TieredCache
+    from .warm_up import warm_up
+
+# The backends import their client libraries, so they are imported only when first used
+_LAZY = {
+    "AsyncCache": ".async_cache",
+    "AsyncPostgresqlCache": ".async_postgresql_cache",
+    "AsyncRedisCache": ".async_redis_cache",
+    "MemoryCache": ".memory_cache",
+    "PostgresqlCache": ".postgresql_cache",
+    "RedisCache": ".redis_cache",
+    "ShardedMemoryCache": ".sharded_memory_cache",
+    "ShardedRedisCache": ".sharded_redis_cache",
+    "SharedMemoryCache": ".shared_memory_cache",
+    "SqliteCache": ".sqlite_cache",
+    "TieredCache": ".tiered_cache",
+    "warm_up": ".warm_up",
+}
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+from typing import Sequence, List, Tuple, Any
+
+
+class AsyncCache(ABC):
+    """
+    A cache that can be accessed without blocking the event loop.
+    Used by ``Cacher`` when caching async functions.
+    """
+
+    @abstractmethod
+    async def aget(self, key):
+        pass
+
+    @abstractmethod
+    async def aset(self, key, value, expiration: int) -> None:
+        pass
+
+    async def aget_many(self, keys: Sequence) -> List:
+        return [await self.aget(key) for key in keys]
+
+    async def aset_many(
+        self, items: Sequence[Tuple[Any, Any]], expiration: int
+    ) -> None:
+        for key, value in items:
+            await self.aset(key, value, expiration)
@@ -0,0 +1,65 @@
+from typing import AnyStr, Sequence, List, Tuple
+
+from .async_cache import AsyncCache
+from .postgresql_cache import PostgresqlCache
+from ..constants import NOT_FOUND
+from ..errors import CachingError
+from ..postgresql_key_value_adapter import (
+    AsyncPostgresqlKeyValueAdapter,
+    ConnectionPool,
+    AsyncConnectionPool,
+)
+
+
+class AsyncPostgresqlCache(PostgresqlCache, AsyncCache):
+    def __init__(
+        self,
+        connection_pool: ConnectionPool,
+        async_connection_pool: AsyncConnectionPool,
+        table: str,
+    ) -> None:
+        self._async_connection_pool = async_connection_pool
+        super().__init__(connection_pool, table)
+
+    def _create_adapter(
+        self, connection_pool: ConnectionPool, table: str
+    ) -> AsyncPostgresqlKeyValueAdapter:
+        return AsyncPostgresqlKeyValueAdapter(
+            connection_pool, self._async_connection_pool, table
+        )
+
+    async def aget(self, key: str):
+        t = self._get_curr_time()
+        try:
+            value = await self._adapter.aget(key, t)
+            if value is None:
+                return NOT_FOUND
+            return value
+        except Exception as e:
+            raise CachingError(f"Could not get {key}", exc=e)
+
+    async def aset(self, key: str, value: AnyStr, expiration: int) -> None:
+        if expiration:
+            expiration = self._get_curr_time() + expiration
+        try:
+            await self._adapter.aset(key, value, expiration)
+        except Exception as e:
+            raise CachingError(f"Could not set {key} as {value}", exc=e)
+
+    async def aget_many(self, keys: Sequence[str]) -> List:
+        t = self._get_curr_time()
+        try:
+            values = await self._adapter.aget_many(keys, t)
+        except Exception as e:
+            raise CachingError(f"Could not get {len(keys)} keys", exc=e)
+        return [NOT_FOUND if v is None else v for v in values]
+
+    async def aset_many(
+        self, items: Sequence[Tuple[str, AnyStr]], expiration: int
+    ) -> None:
+        if expiration:
+            expiration = self._get_curr_time() + expiration
+        try:
+            await self._adapter.aset_many(items, expiration)
+        except Exception as e:
+            raise CachingError(f"Could not set {len(items)} keys", exc=e)
@@ -0,0 +1,90 @@
+from typing import Optional, AnyStr, Sequence, List, Tuple
+
+from .async_cache import AsyncCache
+from .redis_cache import RedisCache
+from ..constants import NOT_FOUND
+from ..errors import CachingError
+
+try:
+    from redis.asyncio import Redis as AsyncRedis
+except ModuleNotFoundError:
+    AsyncRedis = None
+
+
+class AsyncRedisCache(RedisCache, AsyncCache):
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: Optional[str] = None,
+        prefix: str = "",
+        client: Optional["Redis"] = None,
+        async_client: Optional["AsyncRedis"] = None,
+        binary: bool = False,
+        **kwargs,
+    ) -> None:
+        """
+        :param async_client: Like ``client``, a ``redis.asyncio`` client to share.
+        """
+        super().__init__(
+            host=host,
+            port=port,
+            db=db,
+            password=password,
+            prefix=prefix,
+            client=client,
+            binary=binary,
+            **kwargs,
+        )
+        if AsyncRedis is None:
+            raise CachingError('Package "redis" with asyncio support is not installed')
+        if async_client is None:
+            async_client = AsyncRedis(
+                host=host,
+                port=port,
+                db=db,
+                password=password,
+                decode_responses=not binary,
+                **kwargs,
+            )
+        self._async_redis = async_client
+
+    async def aget(self, key: str) -> AnyStr:
+        try:
+            value = await self._async_redis.get(self._prefix + key)
+            if value is None:
+                return NOT_FOUND
+            return value
+        except Exception as e:
+            raise CachingError(f"Could not get {key}", exc=e)
+
+    async def aset(self, key: str, value: AnyStr, expiration: int) -> None:
+        try:
+            await self._async_redis.set(
+                self._prefix + key, value, px=expiration or None
+            )
+        except Exception as e:
+            raise CachingError(f"Could not set {key} as {value}", exc=e)
+
+    async def aget_many(self, keys: Sequence[str]) -> List[AnyStr]:
+        if not keys:
+            return []
+        try:
+            values = await self._async_redis.mget([self._prefix + k for k in keys])
+        except Exception as e:
+            raise CachingError(f"Could not get {len(keys)} keys", exc=e)
+        return [NOT_FOUND if v is None else v for v in values]
+
+    async def aset_many(
+        self, items: Sequence[Tuple[str, AnyStr]], expiration: int
+    ) -> None:
+        if not items:
+            return
+        try:
+            pipeline = self._async_redis.pipeline(transaction=False)
+            for key, value in items:
+                pipeline.set(self._prefix + key, value, px=expiration or None)
+            await pipeline.execute()
+        except Exception as e:
+            raise CachingError(f"Could not set {len(items)} keys", exc=e)
@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
 from time import time
+from typing import Sequence, List, Tuple, Any
 
 from .volatile_value import VolatileValue
 from ..constants import NOT_FOUND
+from ..errors import CachingError
 
 
 class Cache(ABC):
@@ -14,6 +16,28 @@ class Cache(ABC):
     def set(self, key, value, expiration: int) -> None:
         pass
 
+    def get_many(self, keys: Sequence) -> List:
+        """
+        :return: The values of ``keys``, in the same order, with ``NOT_FOUND`` for missing keys.
+        """
+        return [self.get(key) for key in keys]
+
+    def set_many(self, items: Sequence[Tuple[Any, Any]], expiration: int) -> None:
+        """
+        :param items: Pairs of key and value.
+        :param expiration: Expiration time for each key, in milliseconds.
+        """
+        for key, value in items:
+            self.set(key, value, expiration)
+
+    def hottest_keys(self, count: int) -> List:
+        """
+        :return: Up to ``count`` keys that are likely to be read soon, the hottest first,
+            for warming up another cache with ``warm_up``.
+        :raise CachingError: If the cache doesn't track its hottest keys.
+        """
+        raise CachingError(f"{type(self).__name__} doesn't support hottest_keys")
+
     @staticmethod
     def _to_volatile(value, expiration: int) -> VolatileValue:
         return VolatileValue(value, round(time() * 1000) + expiration)
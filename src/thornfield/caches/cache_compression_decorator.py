@@ -1,6 +1,7 @@
-from typing import Callable, AnyStr, Optional
+from typing import Callable, AnyStr, Optional, Sequence, List, Tuple, Any
 from zlib import compress as default_compress, decompress as default_decompress
 
+from .async_cache import AsyncCache
 from .cache import Cache
 from ..constants import NOT_FOUND
 
@@ -11,20 +12,28 @@ class CacheCompressionDecorator(Cache):
         cache: Cache,
         compress: Optional[Callable[[str], AnyStr]] = ...,
         decompress: Optional[Callable[[AnyStr], str]] = ...,
+        binary: bool = False,
     ) -> None:
+        """
+        :param binary: Whether values are ``bytes``, e.g. from a binary ``CacheSerializationDecorator``.
+            The default compression then compresses them as they are, instead of compressing
+            text encoded as UTF-8.
+        """
         super().__init__()
         self._cache = cache
         if compress is None:
             self._compress = self._noop
         elif compress is ...:
-            self._compress = self._default_compress
+            self._compress = default_compress if binary else self._default_compress
         else:
             self._compress = compress
 
         if decompress is None:
             self._decompress = self._noop
         elif decompress is ...:
-            self._decompress = self._default_decompress
+            self._decompress = (
+                default_decompress if binary else self._default_decompress
+            )
         else:
             self._decompress = decompress
 
@@ -35,6 +44,16 @@ class CacheCompressionDecorator(Cache):
     def set(self, key, value, expiration: int) -> None:
         self._cache.set(key, self._compress(value), expiration)
 
+    def get_many(self, keys: Sequence) -> List:
+        values = self._cache.get_many(keys)
+        return [v if v is NOT_FOUND else self._decompress(v) for v in values]
+
+    def set_many(self, items: Sequence[Tuple[Any, Any]], expiration: int) -> None:
+        self._cache.set_many([(k, self._compress(v)) for k, v in items], expiration)
+
+    def hottest_keys(self, count: int) -> List:
+        return self._cache.hottest_keys(count)
+
     @staticmethod
     def _noop(x):
         return x
@@ -46,3 +65,27 @@ class CacheCompressionDecorator(Cache):
     @staticmethod
     def _default_decompress(data: bytes) -> str:
         return default_decompress(data).decode("UTF-8")
+
+
+class AsyncCacheCompressionDecorator(CacheCompressionDecorator, AsyncCache):
+    """
+    A ``CacheCompressionDecorator`` for a cache that is also an ``AsyncCache``.
+    """
+
+    async def aget(self, key):
+        value = await self._cache.aget(key)
+        return value if value is NOT_FOUND else self._decompress(value)
+
+    async def aset(self, key, value, expiration: int) -> None:
+        await self._cache.aset(key, self._compress(value), expiration)
+
+    async def aget_many(self, keys: Sequence) -> List:
+        values = await self._cache.aget_many(keys)
+        return [v if v is NOT_FOUND else self._decompress(v) for v in values]
+
+    async def aset_many(
+        self, items: Sequence[Tuple[Any, Any]], expiration: int
+    ) -> None:
+        await self._cache.aset_many(
+            [(k, self._compress(v)) for k, v in items], expiration
+        )
@@ -1,6 +1,8 @@
 import json
-from typing import Optional, Callable, Any
+import pickle
+from typing import Optional, Callable, Any, Sequence, List, Tuple
 
+from .async_cache import AsyncCache
 from .cache import Cache
 from ..constants import NOT_FOUND
 from ..errors import CachingError
@@ -17,7 +19,14 @@ class CacheSerializationDecorator(Cache):
         cache: Cache,
         serializer: Optional[Callable[[Any], str]] = ...,
         deserializer: Optional[Callable[[Optional[str]], Any]] = ...,
+        binary: bool = False,
     ) -> None:
+        """
+        :param binary: If ``True``, values are pickled to ``bytes`` by default instead of converted
+            to JSON text, which is faster and more compact. Keys are still converted to JSON,
+            since equal keys must always be serialized the same.
+            Use it with a cache that keeps ``bytes``, e.g. ``RedisCache(binary=True)``.
+        """
         super().__init__()
         self._cache = cache
 
@@ -39,17 +48,41 @@ class CacheSerializationDecorator(Cache):
         else:
             self._deserialize = deserializer
 
+        self._serialize_value = self._serialize
+        self._deserialize_value = self._deserialize
+        if binary and serializer is ...:
+            self._serialize_value = self._pickle
+        if binary and deserializer is ...:
+            self._deserialize_value = pickle.loads
+
     def get(self, key):
         value = self._cache.get(self._serialize(key))
-        return value if value is NOT_FOUND else self._deserialize(value)
+        return value if value is NOT_FOUND else self._deserialize_value(value)
 
     def set(self, key, value, expiration: int) -> None:
-        self._cache.set(self._serialize(key), self._serialize(value), expiration)
+        self._cache.set(self._serialize(key), self._serialize_value(value), expiration)
+
+    def get_many(self, keys: Sequence) -> List:
+        values = self._cache.get_many([self._serialize(k) for k in keys])
+        return [v if v is NOT_FOUND else self._deserialize_value(v) for v in values]
+
+    def set_many(self, items: Sequence[Tuple[Any, Any]], expiration: int) -> None:
+        self._cache.set_many(
+            [(self._serialize(k), self._serialize_value(v)) for k, v in items],
+            expiration,
+        )
+
+    def hottest_keys(self, count: int) -> List:
+        return [self._deserialize(k) for k in self._cache.hottest_keys(count)]
 
     @staticmethod
     def _noop(x):
         return x
 
+    @staticmethod
+    def _pickle(obj) -> bytes:
+        return pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+
     @staticmethod
     def _default_serialize(obj) -> str:
         return json.dumps(serialize(obj, preserve_iterable_types=True))
@@ -59,3 +92,30 @@ class CacheSerializationDecorator(Cache):
         if data is None:
             return data
         return deserialize(json.loads(data))
+
+
+class AsyncCacheSerializationDecorator(CacheSerializationDecorator, AsyncCache):
+    """
+    A ``CacheSerializationDecorator`` for a cache that is also an ``AsyncCache``.
+    """
+
+    async def aget(self, key):
+        value = await self._cache.aget(self._serialize(key))
+        return value if value is NOT_FOUND else self._deserialize_value(value)
+
+    async def aset(self, key, value, expiration: int) -> None:
+        await self._cache.aset(
+            self._serialize(key), self._serialize_value(value), expiration
+        )
+
+    async def aget_many(self, keys: Sequence) -> List:
+        values = await self._cache.aget_many([self._serialize(k) for k in keys])
+        return [v if v is NOT_FOUND else self._deserialize_value(v) for v in values]
+
+    async def aset_many(
+        self, items: Sequence[Tuple[Any, Any]], expiration: int
+    ) -> None:
+        await self._cache.aset_many(
+            [(self._serialize(k), self._serialize_value(v)) for k, v in items],
+            expiration,
+        )
@@ -0,0 +1,314 @@
+import sys
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Callable, Union, Tuple
+
+SizeEstimator = Callable[[Any, Any], int]
+
+
+class EvictionPolicy(ABC):
+    """
+    Chooses which keys a bounded ``MemoryCache`` evicts.
+    All the methods are called under the cache's lock, and should take constant time.
+    """
+
+    @abstractmethod
+    def add(self, key) -> None:
+        """
+        Called when ``key`` is inserted.
+        """
+        pass
+
+    @abstractmethod
+    def access(self, key) -> None:
+        """
+        Called when ``key`` is read or overwritten.
+        """
+        pass
+
+    def miss(self, key) -> None:
+        """
+        Called when ``key`` is read but is not in the cache.
+        """
+        pass
+
+    @abstractmethod
+    def remove(self, key) -> None:
+        """
+        Called when ``key`` is removed from the cache, e.g. because it expired.
+        """
+        pass
+
+    @abstractmethod
+    def evict(self):
+        """
+        Removes a key from the policy.
+
+        :return: The key to evict from the cache.
+        """
+        pass
+
+
+class LruPolicy(EvictionPolicy):
+    """
+    Evicts the least recently used key.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._order = OrderedDict()
+
+    def add(self, key) -> None:
+        self._order[key] = None
+
+    def access(self, key) -> None:
+        self._order.move_to_end(key)
+
+    def remove(self, key) -> None:
+        del self._order[key]
+
+    def evict(self):
+        return self._order.popitem(last=False)[0]
+
+
+class LfuPolicy(EvictionPolicy):
+    """
+    Evicts the least frequently used key, and the least recently used among them.
+    Frequencies are kept only while the key is in the cache.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._frequencies: Dict[Any, int] = {}
+        self._buckets: Dict[int, OrderedDict] = {}
+        self._min_frequency = 0
+
+    def add(self, key) -> None:
+        self._frequencies[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_frequency = 1
+
+    def access(self, key) -> None:
+        frequency = self._frequencies[key]
+        self._remove_from_bucket(key, frequency)
+        self._frequencies[key] = frequency + 1
+        self._buckets.setdefault(frequency + 1, OrderedDict())[key] = None
+        if self._min_frequency == frequency and frequency not in self._buckets:
+            self._min_frequency = frequency + 1
+
+    def remove(self, key) -> None:
+        # The minimal frequency is found again lazily on eviction
+        self._remove_from_bucket(key, self._frequencies.pop(key))
+
+    def evict(self):
+        bucket = self._buckets.get(self._min_frequency)
+        if bucket is None:
+            self._min_frequency = min(self._buckets)
+            bucket = self._buckets[self._min_frequency]
+        key = bucket.popitem(last=False)[0]
+        if not bucket:
+            del self._buckets[self._min_frequency]
+        del self._frequencies[key]
+        return key
+
+    def _remove_from_bucket(self, key, frequency: int) -> None:
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+
+
+_NONE = object()
+_M64 = (1 << 64) - 1
+# Halves each 4-bit counter
+_HALVE = bytes(i >> 1 for i in range(256))
+
+
+class FrequencySketch:
+    """
+    A count-min sketch with 4 rows of 4-bit counters, estimating how often keys were seen.
+    All the counters are halved periodically, so that old popularity fades.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        super().__init__()
+        self.resize(capacity)
+
+    @property
+    def width(self) -> int:
+        return self._mask + 1
+
+    def resize(self, capacity: int) -> None:
+        """
+        Sizes the sketch for ``capacity`` keys, forgetting all the counts.
+        """
+        width = 1 << max(capacity - 1, 1).bit_length()
+        self._mask = width - 1
+        self._table = bytearray(width * 4)
+        self._sample_size = 10 * width
+        self._additions = 0
+
+    def increment(self, key) -> None:
+        table = self._table
+        for i in self._indices(key):
+            if table[i] < 15:
+                table[i] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._table = table.translate(_HALVE)
+            self._additions //= 2
+
+    def frequency(self, key) -> int:
+        table = self._table
+        a, b, c, d = self._indices(key)
+        return min(table[a], table[b], table[c], table[d])
+
+    def _indices(self, key) -> Tuple[int, int, int, int]:
+        # An index in each row, by double hashing
+        h = (hash(key) * 0x9E3779B97F4A7C15) & _M64
+        step = (h >> 32) | 1
+        mask = self._mask
+        width = mask + 1
+        return (
+            h & mask,
+            width + ((h + step) & mask),
+            2 * width + ((h + 2 * step) & mask),
+            3 * width + ((h + 3 * step) & mask),
+        )
+
+
+class TinyLfuPolicy(EvictionPolicy):
+    """
+    W-TinyLFU: new keys enter a small LRU window. Keys leaving the window are admitted to
+    the main cache only if they were seen more often than the key they would replace,
+    according to a ``FrequencySketch`` that also counts misses and evicted keys.
+    This keeps popular keys in the cache when many keys are read only once, e.g. in scans.
+
+    The main cache is a segmented LRU - keys read again move from its probation segment
+    to its protected segment, which gets most of the space.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        window_ratio: float = 0.01,
+        protected_ratio: float = 0.8,
+    ) -> None:
+        """
+        :param capacity: The expected number of entries, used for sizing the frequency sketch.
+            The sketch is resized if the cache grows beyond it.
+        :param window_ratio: The part of the entries kept in the window.
+        :param protected_ratio: The part of the main cache kept in its protected segment.
+        """
+        super().__init__()
+        self._sketch = FrequencySketch(capacity)
+        self._window_ratio = window_ratio
+        self._protected_ratio = protected_ratio
+        self._window = OrderedDict()
+        self._probation = OrderedDict()
+        self._protected = OrderedDict()
+        # A key moved from the window that wasn't yet compared with the victim of the main cache
+        self._candidate = _NONE
+
+    def __len__(self) -> int:
+        return len(self._window) + len(self._probation) + len(self._protected)
+
+    def add(self, key) -> None:
+        self._sketch.increment(key)
+        self._window[key] = None
+        size = len(self)
+        if size > self._sketch.width:
+            self._sketch.resize(2 * size)
+        if len(self._window) > max(1, int(size * self._window_ratio)):
+            # Moved on probation, until it's compared with the victim of the main cache
+            candidate = self._window.popitem(last=False)[0]
+            self._probation[candidate] = None
+            self._candidate = candidate
+
+    def access(self, key) -> None:
+        self._sketch.increment(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._probation:
+            del self._probation[key]
+            self._protected[key] = None
+            self._demote()
+            if self._candidate == key:
+                self._candidate = _NONE
+        else:
+            self._protected.move_to_end(key)
+
+    def miss(self, key) -> None:
+        self._sketch.increment(key)
+
+    def remove(self, key) -> None:
+        for segment in (self._window, self._probation, self._protected):
+            if segment.pop(key, _NONE) is not _NONE:
+                break
+        if self._candidate == key:
+            self._candidate = _NONE
+
+    def evict(self):
+        candidate, self._candidate = self._candidate, _NONE
+        victim = self._main_victim(candidate)
+        if victim is _NONE:
+            if candidate is not _NONE:
+                return self._pop_main(candidate)
+            return self._window.popitem(last=False)[0]
+        if candidate is _NONE:
+            return self._pop_main(victim)
+        if self._sketch.frequency(candidate) > self._sketch.frequency(victim):
+            return self._pop_main(victim)
+        return self._pop_main(candidate)
+
+    def _main_victim(self, candidate):
+        for segment in (self._probation, self._protected):
+            for key in segment:
+                if key is not candidate:
+                    return key
+        return _NONE
+
+    def _pop_main(self, key):
+        if self._probation.pop(key, _NONE) is _NONE:
+            del self._protected[key]
+        return key
+
+    def _demote(self) -> None:
+        main_size = len(self._probation) + len(self._protected)
+        max_protected = int(main_size * self._protected_ratio)
+        while len(self._protected) > max_protected:
+            self._probation[self._protected.popitem(last=False)[0]] = None
+
+
+PolicyFactory = Callable[[Optional[int]], EvictionPolicy]
+_POLICIES: Dict[str, PolicyFactory] = {
+    "lru": lambda capacity: LruPolicy(),
+    "lfu": lambda capacity: LfuPolicy(),
+    "tinylfu": lambda capacity: TinyLfuPolicy(capacity or 1024),
+}
+
+
+def create_policy(
+    policy: Union[str, EvictionPolicy], capacity: Optional[int]
+) -> EvictionPolicy:
+    if isinstance(policy, EvictionPolicy):
+        return policy
+    try:
+        return _POLICIES[policy](capacity)
+    except KeyError:
+        raise ValueError(
+            f"Unknown eviction policy {policy}, use one of {list(_POLICIES)}"
+        ) from None
+
+
+def estimate_size(key, value) -> int:
+    """
+    The default size estimator - the shallow size of ``key`` and ``value``,
+    and of the items of ``value`` if it's a ``list``, ``tuple``, ``set`` or ``dict``.
+    """
+    size = sys.getsizeof(key) + sys.getsizeof(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(sys.getsizeof(v) for v in value)
+    elif isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return size
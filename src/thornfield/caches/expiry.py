@@ -0,0 +1,100 @@
+from heapq import heappush, heappop
+from math import inf
+from typing import Dict, List, Optional
+
+
+class ExpiryWheel:
+    """
+    Schedules keys by their expiration time, in buckets of ``resolution`` milliseconds,
+    and returns the keys of the buckets whose time has passed.
+
+    Scheduling and taking a key are O(1), or O(log n) in the number of buckets when it creates
+    or empties a bucket, and the work of each call to ``take_due`` is bounded,
+    so expired keys can be reclaimed a few at a time without a dedicated thread.
+    A key whose expiration changed is not moved - the owner checks the keys it gets and
+    schedules again those that didn't expire, so a key can be in more than one bucket.
+    Buckets are lists, which take less memory per key than sets.
+    """
+
+    def __init__(self, resolution: int = 1000) -> None:
+        """
+        :param resolution: The time span of a bucket, in milliseconds.
+        """
+        super().__init__()
+        self._resolution = resolution
+        self._buckets: Dict[int, List] = {}
+        # A heap of the ticks of the buckets, for finding the first one after an idle gap
+        self._ticks: List[int] = []
+        self._cursor = None
+        # The time in milliseconds from which ``take_due`` may return keys
+        self.next_due = inf
+
+    def __len__(self) -> int:
+        return sum(len(b) for b in self._buckets.values())
+
+    def schedule(self, key, expiration: int, scheduled: Optional[int] = None) -> None:
+        """
+        :param expiration: The expiration time of ``key``, in milliseconds since the epoch.
+        :param scheduled: An expiration time ``key`` was already scheduled by, if any.
+            The key isn't added again to the same bucket.
+        """
+        tick = expiration // self._resolution
+        if scheduled is not None and scheduled // self._resolution == tick:
+            return
+        if self._cursor is None or tick < self._cursor:
+            self._set_cursor(tick)
+        bucket = self._buckets.get(tick)
+        if bucket is None:
+            self._buckets[tick] = [key]
+            heappush(self._ticks, tick)
+        else:
+            bucket.append(key)
+
+    def take_due(self, now: int, limit: int) -> List:
+        """
+        :param now: The current time, in milliseconds since the epoch.
+        :param limit: The maximal amount of work - keys returned and empty buckets passed.
+        :return: Keys of buckets that ended before ``now``, removed from the wheel.
+        """
+        due = []
+        current = now // self._resolution
+        buckets = self._buckets
+        work = 0
+        while self._cursor is not None and self._cursor < current and work < limit:
+            bucket = buckets.get(self._cursor)
+            if bucket is None:
+                work += 1
+            else:
+                while bucket and work < limit:
+                    due.append(bucket.pop())
+                    work += 1
+                if bucket:
+                    break
+                del buckets[self._cursor]
+                self._pop_taken_ticks()
+            self._advance(current)
+        return due
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._ticks.clear()
+        self._set_cursor(None)
+
+    def _advance(self, current: int) -> None:
+        if not self._buckets:
+            self._set_cursor(None)
+        elif current - self._cursor > len(self._buckets):
+            # Jumping over a long run of empty buckets
+            self._set_cursor(self._ticks[0])
+        else:
+            self._set_cursor(self._cursor + 1)
+
+    def _pop_taken_ticks(self) -> None:
+        # The taken bucket is usually the first one, so this is O(log n)
+        ticks = self._ticks
+        while ticks and ticks[0] not in self._buckets:
+            heappop(ticks)
+
+    def _set_cursor(self, tick) -> None:
+        self._cursor = tick
+        self.next_due = inf if tick is None else (tick + 1) * self._resolution
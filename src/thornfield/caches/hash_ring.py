@@ -0,0 +1,65 @@
+from bisect import bisect_right
+from hashlib import blake2b
+from typing import Iterable, List, Union
+
+
+class HashRing:
+    """
+    Consistent hashing: each node is hashed to ``virtual_nodes`` points on a ring, and a key
+    belongs to the first point after its own hash. Adding or removing a node only moves
+    the keys between that node and the others, about ``1 / len(nodes)`` of them.
+
+    Points are hashed with ``blake2b`` rather than ``hash``, so that all the processes
+    map a key to the same node.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), virtual_nodes: int = 160) -> None:
+        """
+        :param nodes: The names of the nodes, e.g. their addresses.
+        :param virtual_nodes: The number of points of each node.
+            More points spread the keys more evenly, and make adding and removing nodes slower.
+        """
+        super().__init__()
+        if virtual_nodes < 1:
+            raise ValueError("virtual_nodes must be positive")
+        self._virtual_nodes = virtual_nodes
+        self._nodes: List[str] = []
+        # The points and the node of each point, replaced together so that lookups don't lock
+        self._ring = ([], [])
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._nodes)
+
+    def add(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.append(node)
+        self._build()
+
+    def remove(self, node: str) -> None:
+        self._nodes.remove(node)
+        self._build()
+
+    def node(self, key: Union[str, bytes]) -> str:
+        points, owners = self._ring
+        if not points:
+            raise LookupError("The ring has no nodes")
+        i = bisect_right(points, _hash(key))
+        return owners[i if i < len(points) else 0]
+
+    def _build(self) -> None:
+        ring = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node in self._nodes
+            for i in range(self._virtual_nodes)
+        )
+        self._ring = ([p for p, _ in ring], [n for _, n in ring])
+
+
+def _hash(key: Union[str, bytes]) -> int:
+    if isinstance(key, str):
+        key = key.encode()
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
@@ -0,0 +1,254 @@
+import logging
+from abc import ABC, abstractmethod
+from select import select
+from threading import Lock, Thread
+from time import sleep
+from typing import Callable, List, Optional
+
+from ..errors import CachingError
+from ..fork_safety import reset_after_fork
+from ..postgresql_key_value_adapter import (
+    ConnectionPool,
+    ConnectionPoolWrapper,
+    FetchAmount,
+)
+
+try:
+    from redis import Redis
+except ModuleNotFoundError:
+    Redis = None
+
+_logger = logging.getLogger("thornfield.invalidators")
+# Seconds between attempts to reconnect, doubled after each failed attempt
+_MIN_RECONNECT_DELAY = 0.5
+_MAX_RECONNECT_DELAY = 30
+
+
+class Invalidator(ABC):
+    """
+    A channel for broadcasting invalidation messages between processes.
+    All the subscribers in a process share a single listening thread.
+
+    When the listening connection can't be opened or fails, the thread reconnects with exponential backoff,
+    and since messages sent in between are lost, it calls the ``on_reconnect`` callbacks.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._callbacks: List[Callable[[str], None]] = []
+        self._reconnect_callbacks: List[Callable[[], None]] = []
+        self._lock = Lock()
+        self._listening = False
+        reset_after_fork(self)
+
+    @abstractmethod
+    def publish(self, message: str) -> None:
+        pass
+
+    def subscribe(
+        self,
+        callback: Callable[[str], None],
+        on_reconnect: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        :param callback: Called with each message.
+        :param on_reconnect: Called after reconnecting, when messages may have been lost.
+        """
+        with self._lock:
+            self._callbacks.append(callback)
+            if on_reconnect is not None:
+                self._reconnect_callbacks.append(on_reconnect)
+        self._start_listening()
+
+    def _start_listening(self) -> None:
+        with self._lock:
+            if self._listening:
+                return
+            self._listening = True
+        try:
+            self._listen()
+        except BaseException:
+            # The next subscriber tries again
+            with self._lock:
+                self._listening = False
+            raise
+
+    def _after_fork(self) -> None:
+        # The listening thread doesn't exist in the child process,
+        # and its connection can't be shared, so a new one is created
+        self._lock = Lock()
+        self._listening = False
+        if self._callbacks:
+            Thread(target=self._listen_after_fork, daemon=True).start()
+
+    def _listen_after_fork(self) -> None:
+        try:
+            self._start_listening()
+        except Exception as e:
+            _logger.exception("Error listening to invalidations", exc_info=e)
+
+    def _listen(self) -> None:
+        """
+        Starts listening in the background, calling ``_dispatch`` for each message.
+        """
+        try:
+            listener = self._connect_listener()
+        except Exception as e:
+            # Connecting is retried in the background, so that subscribers don't fail
+            _logger.warning("Could not connect to listen to invalidations: %s", e)
+            listener = None
+        Thread(
+            target=self._receive_forever,
+            args=(listener,),
+            name="thornfield-invalidator",
+            daemon=True,
+        ).start()
+
+    def _receive_forever(self, listener) -> None:
+        while True:
+            if listener is not None:
+                try:
+                    self._receive(listener)
+                except Exception as e:
+                    _logger.exception("Lost the invalidation connection", exc_info=e)
+            listener = self._reconnect()
+            for callback in list(self._reconnect_callbacks):
+                try:
+                    callback()
+                except Exception as e:
+                    _logger.exception("Error handling reconnection", exc_info=e)
+
+    def _reconnect(self):
+        delay = _MIN_RECONNECT_DELAY
+        while True:
+            sleep(delay)
+            try:
+                return self._connect_listener()
+            except Exception as e:
+                _logger.warning("Could not reconnect to listen to invalidations: %s", e)
+            delay = min(delay * 2, _MAX_RECONNECT_DELAY)
+
+    @abstractmethod
+    def _connect_listener(self):
+        """
+        :return: A new connection, already listening to the channel.
+        """
+        pass
+
+    @abstractmethod
+    def _receive(self, listener) -> None:
+        """
+        Calls ``_dispatch`` for each message received by ``listener``, until it fails.
+        Closes ``listener`` before returning.
+        """
+        pass
+
+    def _dispatch(self, message: str) -> None:
+        for callback in list(self._callbacks):
+            try:
+                callback(message)
+            except Exception as e:
+                _logger.exception("Error handling invalidation message", exc_info=e)
+
+
+class RedisInvalidator(Invalidator):
+    """
+    Uses Redis pub/sub.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        password: Optional[str] = None,
+        channel: str = "thornfield:invalidate",
+        **kwargs,
+    ) -> None:
+        super().__init__()
+        if Redis is None:
+            raise CachingError('Package "redis" is not installed')
+        self._channel = channel
+        self._redis = Redis(
+            host=host, port=port, password=password, decode_responses=True, **kwargs
+        )
+
+    def publish(self, message: str) -> None:
+        try:
+            self._redis.publish(self._channel, message)
+        except Exception as e:
+            raise CachingError(f"Could not publish {message}", exc=e)
+
+    def _connect_listener(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self._channel)
+        except Exception:
+            pubsub.close()
+            raise
+        return pubsub
+
+    def _receive(self, pubsub) -> None:
+        try:
+            for message in pubsub.listen():
+                if message["type"] == "message":
+                    self._dispatch(message["data"])
+        finally:
+            pubsub.close()
+
+
+class PostgresqlInvalidator(Invalidator):
+    """
+    Uses PostgreSQL ``LISTEN``/``NOTIFY``.
+
+    :param connection_pool: Used for sending notifications.
+    :param connect: Creates the connection dedicated to listening, e.g. ``partial(psycopg2.connect, dsn)``.
+    """
+
+    def __init__(
+        self,
+        connection_pool: ConnectionPool,
+        connect: Callable[[], object],
+        channel: str = "thornfield_invalidate",
+    ) -> None:
+        super().__init__()
+        self._pool = ConnectionPoolWrapper(connection_pool)
+        self._connect = connect
+        self._channel = channel
+
+    def publish(self, message: str) -> None:
+        try:
+            with self._pool.getconn() as connection:
+                connection.execute_query(
+                    "select pg_notify(%s, %s)", FetchAmount.ZERO, self._channel, message
+                )
+        except Exception as e:
+            raise CachingError(f"Could not publish {message}", exc=e)
+
+    def _connect_listener(self):
+        connection = self._connect()
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"listen {self._channel}")
+        except Exception:
+            _close_quietly(connection)
+            raise
+        return connection
+
+    def _receive(self, connection) -> None:
+        try:
+            while True:
+                if select([connection], [], [], 5) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    self._dispatch(connection.notifies.pop(0).payload)
+        finally:
+            _close_quietly(connection)
+
+
+def _close_quietly(connection) -> None:
+    try:
+        connection.close()
+    except Exception:
+        pass
@@ -0,0 +1,28 @@
+import json
+from typing import Any, Callable
+
+from ..errors import CachingError
+
+try:
+    from yasoo import serialize
+except ImportError:
+    serialize = None
+
+
+def key_serializer() -> Callable[[Any], bytes]:
+    """
+    :return: A function that converts keys to JSON with ``yasoo``, like ``CacheSerializationDecorator``.
+        Equal keys are always converted the same, unlike with pickle, whose output depends on
+        which objects of the key are the same object.
+    :raise CachingError: If ``yasoo`` is not installed.
+    """
+    if serialize is None:
+        raise CachingError('Package "yasoo" is not installed')
+    return _serialize_key
+
+
+def _serialize_key(key) -> bytes:
+    try:
+        return json.dumps(serialize(key, preserve_iterable_types=True)).encode()
+    except Exception as e:
+        raise CachingError(f"Could not serialize {key}", exc=e)
@@ -1,24 +1,377 @@
-from typing import Any
+import logging
+import pickle
+from math import inf
+from threading import Lock
+from itertools import islice
+from time import time
+from typing import Any, Sequence, List, Tuple, Optional, Union, Iterator
 
 from .cache import Cache
+from .eviction import EvictionPolicy, SizeEstimator, create_policy, estimate_size
+from .expiry import ExpiryWheel
+from .snapshot import Record, write_snapshot, read_snapshot
 from .volatile_value import VolatileValue
 from ..constants import NOT_FOUND
+from ..fork_safety import reset_after_fork
+
+_logger = logging.getLogger("thornfield.memory_cache")
+# The maximal number of expired entries reclaimed by a write
+_RECLAIM_LIMIT = 16
+# The expiration of restored entries that don't expire
+_NEVER = 2**62
+# The number of snapshot records restored at a time
+_RESTORE_CHUNK = 1000
+
+
+class _Pickled(VolatileValue):
+    """
+    An entry restored lazily from a snapshot, whose value is still pickled.
+    """
+
+    __slots__ = ()
 
 
 class MemoryCache(Cache):
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        policy: Union[str, EvictionPolicy] = "lru",
+        size_estimator: SizeEstimator = estimate_size,
+        time_to_idle: Optional[int] = None,
+        expiry_resolution: int = 1000,
+    ) -> None:
+        """
+        Without ``max_entries`` and ``max_bytes`` the cache is unbounded.
+        Expired entries are reclaimed a few at a time by writes, see ``expire``.
+
+        :param max_entries: The maximal number of entries.
+        :param max_bytes: The maximal total size of the entries, as estimated by ``size_estimator``.
+        :param policy: Chooses the entries to evict - ``"lru"``, ``"lfu"``, ``"tinylfu"``
+            or an ``EvictionPolicy``.
+        :param size_estimator: Estimates the size in bytes of a key and its value.
+        :param time_to_idle: If set, entries expire after not being read for this many milliseconds.
+            Entries set with an expiration still expire by it, even if they are read.
+        :param expiry_resolution: How late expired entries may be reclaimed, in milliseconds.
+        """
         super().__init__()
+        if time_to_idle is not None and time_to_idle <= 0:
+            raise ValueError("time_to_idle must be positive")
         self._cache = {}
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._policy: Optional[EvictionPolicy] = None
+        self._time_to_idle = time_to_idle
+        # The expiration of entries whose time to idle is extended by reads
+        self._deadlines = {}
+        self._wheel = ExpiryWheel(expiry_resolution)
+        self._lock = Lock()
+        self.evictions = 0
+        self.expirations = 0
+        if max_entries is not None or max_bytes is not None:
+            self._policy = create_policy(policy, max_entries)
+            self._size_estimator = size_estimator
+            self._sizes = {}
+            self._total_bytes = 0
+        reset_after_fork(self)
+
+    @property
+    def size(self) -> int:
+        """
+        The number of entries, including expired entries that weren't reclaimed yet.
+        """
+        return len(self._cache)
+
+    @property
+    def total_bytes(self) -> int:
+        """
+        The estimated size of the entries if ``max_bytes`` is set, otherwise ``0``.
+        """
+        return self._total_bytes if self._max_bytes is not None else 0
 
     def get(self, key: str) -> Any:
-        if key not in self._cache:
-            return NOT_FOUND
-        value = self._cache[key]
+        if self._policy is not None:
+            with self._lock:
+                return self._bounded_get(key)
+        value = self._cache.get(key, NOT_FOUND)
         if isinstance(value, VolatileValue):
-            return self._from_volatile(value)
+            # Expired entries are left for the writes to reclaim, so reads don't lock
+            now = time() * 1000
+            if now > value.expiration:
+                return NOT_FOUND
+            if self._time_to_idle is not None:
+                self._touch(key, value, now)
+            if type(value) is _Pickled:
+                return self._unpickle(key, value)
+            return value.value
         return value
 
     def set(self, key: str, value: Any, expiration: int) -> None:
-        if expiration:
-            value = self._to_volatile(value, expiration)
+        if self._is_static(expiration):
+            self._cache[key] = value
+            return
+        with self._lock:
+            now = time() * 1000
+            # Before writing, so that expired entries are removed rather than evicting live ones
+            if now >= self._wheel.next_due:
+                self._reclaim(now, _RECLAIM_LIMIT)
+            if self._policy is not None:
+                self._bounded_set(key, value, expiration, now)
+            else:
+                if expiration or self._time_to_idle is not None:
+                    value = self._entry(key, value, expiration, now)
+                self._cache[key] = value
+
+    def get_many(self, keys: Sequence) -> List:
+        if self._policy is not None:
+            with self._lock:
+                return [self._bounded_get(key) for key in keys]
+        get = self.get
+        return [get(key) for key in keys]
+
+    def set_many(self, items: Sequence[Tuple[Any, Any]], expiration: int) -> None:
+        if self._is_static(expiration):
+            self._cache.update(items)
+            return
+        with self._lock:
+            now = time() * 1000
+            if now >= self._wheel.next_due:
+                self._reclaim(now, _RECLAIM_LIMIT + len(items))
+            if self._policy is not None:
+                for key, value in items:
+                    self._bounded_set(key, value, expiration, now)
+            elif expiration or self._time_to_idle is not None:
+                entry = self._entry
+                self._cache.update((k, entry(k, v, expiration, now)) for k, v in items)
+            else:
+                self._cache.update(items)
+
+    def expire(self) -> None:
+        """
+        Removes all the expired entries.
+        Writes reclaim expired entries gradually, so this is needed only for freeing the memory
+        of a cache that isn't written to.
+        """
+        with self._lock:
+            self._reclaim(time() * 1000, len(self._cache) + 1)
+
+    def snapshot(self, path: str) -> int:
+        """
+        Saves the entries that didn't expire to the file ``path``, to be restored by ``restore``,
+        e.g. by the next process after a deploy. Values that can't be pickled are skipped.
+
+        :return: The number of saved entries.
+        """
+        return write_snapshot(path, self._snapshot_records(time() * 1000))
+
+    def restore(self, path: str, lazy: bool = False) -> int:
+        """
+        Adds the entries saved by ``snapshot`` that didn't expire since, with their remaining time
+        to live. Keys that are already in the cache are kept. Entries are evicted as usual if the
+        cache is bounded.
+
+        :param lazy: Whether to unpickle the values on their first read instead of now,
+            which makes restoring faster when only some of the entries are read.
+        :return: The number of restored entries.
+        """
+        records = read_snapshot(path)
+        restored = 0
+        while True:
+            chunk = list(islice(records, _RESTORE_CHUNK))
+            if not chunk:
+                return restored
+            restored += self._restore_records(chunk, lazy)
+
+    def _snapshot_records(self, now: float) -> Iterator[Record]:
+        with self._lock:
+            items = list(self._cache.items())
+        skipped = 0
+        for key, value in items:
+            expires_at = 0
+            if isinstance(value, VolatileValue):
+                if now > value.expiration:
+                    continue
+                if self._time_to_idle is not None:
+                    # Idle time starts again when restored
+                    expires_at = self._deadlines.get(key, 0)
+                elif value.expiration != _NEVER:
+                    expires_at = value.expiration
+                if type(value) is _Pickled:
+                    yield key, expires_at, value.value
+                    continue
+                value = value.value
+            try:
+                data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                skipped += 1
+                continue
+            yield key, expires_at, data
+        if skipped:
+            _logger.warning("Skipped %d entries that can't be pickled", skipped)
+
+    def _restore_records(self, records: Sequence[Record], lazy: bool) -> int:
+        now = time() * 1000
+        restored = 0
+        if not lazy:
+            for key, expires_at, data in records:
+                if (expires_at and expires_at <= now) or key in self._cache:
+                    continue
+                expiration = max(1, expires_at - round(now)) if expires_at else 0
+                self.set(key, pickle.loads(data), expiration)
+                restored += 1
+            return restored
+        # The lock is taken once for the whole chunk
+        with self._lock:
+            for key, expires_at, data in records:
+                if (expires_at and expires_at <= now) or key in self._cache:
+                    continue
+                expiration = max(1, expires_at - round(now)) if expires_at else 0
+                if self._policy is None:
+                    self._cache[key] = self._entry(key, data, expiration, now, True)
+                else:
+                    self._bounded_set(key, data, expiration, now, True)
+                    if key not in self._cache:
+                        continue
+                restored += 1
+        return restored
+
+    def _unpickle(self, key, entry: _Pickled) -> Any:
+        unpickled = self._unpickled(entry)
+        with self._lock:
+            if self._cache.get(key) is entry:
+                self._cache[key] = unpickled
+        return unpickled.value if isinstance(unpickled, VolatileValue) else unpickled
+
+    @staticmethod
+    def _unpickled(entry: _Pickled) -> Any:
+        """
+        :return: What is stored for ``entry`` once its value is unpickled.
+        """
+        value = pickle.loads(entry.value)
+        if entry.expiration == _NEVER:
+            return value
+        return VolatileValue(value, entry.expiration)
+
+    def _is_static(self, expiration: int) -> bool:
+        """
+        Whether a write needs neither the lock nor the time - the cache is unbounded
+        and has no expiring entries, as is typical for a function cached without an expiration.
+        """
+        return (
+            not expiration
+            and self._policy is None
+            and self._time_to_idle is None
+            and self._wheel.next_due == inf
+        )
+
+    def _entry(
+        self, key, value, expiration: int, now: float, pickled: bool = False
+    ) -> Any:
+        """
+        :param pickled: Whether ``value`` is pickled, and should be unpickled on its first read.
+        :return: What is stored for ``value`` - itself if it doesn't expire, otherwise a ``VolatileValue``.
+        """
+        now = round(now)
+        if self._time_to_idle is None:
+            if not expiration:
+                return _Pickled(value, _NEVER) if pickled else value
+            expires_at = now + expiration
+        else:
+            expires_at = now + self._time_to_idle
+            if expiration:
+                # Reads extend the time to idle up to the expiration
+                deadline = self._deadlines[key] = now + expiration
+                expires_at = min(expires_at, deadline)
+            else:
+                self._deadlines.pop(key, None)
+        previous = self._cache.get(key)
+        if isinstance(previous, VolatileValue):
+            self._wheel.schedule(key, expires_at, previous.expiration)
+        else:
+            self._wheel.schedule(key, expires_at)
+        return (_Pickled if pickled else VolatileValue)(value, expires_at)
+
+    def _touch(self, key, value: VolatileValue, now: float) -> None:
+        expires_at = round(now) + self._time_to_idle
+        deadline = self._deadlines.get(key)
+        if deadline is not None and deadline < expires_at:
+            expires_at = deadline
+        # The wheel finds the new expiration when it reaches the old one
+        value.expiration = expires_at
+
+    def _reclaim(self, now: float, limit: int) -> None:
+        cache = self._cache
+        for key in self._wheel.take_due(int(now), limit):
+            value = cache.get(key)
+            if not isinstance(value, VolatileValue):
+                continue
+            if now > value.expiration:
+                self._remove(key)
+                if self._policy is not None:
+                    self._policy.remove(key)
+                self.expirations += 1
+            else:
+                self._wheel.schedule(key, value.expiration)
+
+    def _bounded_get(self, key) -> Any:
+        value = self._cache.get(key, NOT_FOUND)
+        if value is NOT_FOUND:
+            self._policy.miss(key)
+            return NOT_FOUND
+        if isinstance(value, VolatileValue):
+            now = time() * 1000
+            if now > value.expiration:
+                self._remove(key)
+                self._policy.remove(key)
+                self._policy.miss(key)
+                self.expirations += 1
+                return NOT_FOUND
+            if self._time_to_idle is not None:
+                self._touch(key, value, now)
+            if type(value) is _Pickled:
+                value = self._cache[key] = self._unpickled(value)
+            if isinstance(value, VolatileValue):
+                value = value.value
+        self._policy.access(key)
+        return value
+
+    def _bounded_set(
+        self, key, value, expiration: int, now: float, pickled: bool = False
+    ) -> None:
+        size = 0
+        if self._max_bytes is not None:
+            size = self._size_estimator(key, value)
+            if size > self._max_bytes:
+                # Would evict everything else and then itself
+                if key in self._cache:
+                    self._remove(key)
+                    self._policy.remove(key)
+                self.evictions += 1
+                return
+        value = self._entry(key, value, expiration, now, pickled)
+        if key in self._cache:
+            self._policy.access(key)
+        else:
+            self._policy.add(key)
         self._cache[key] = value
+        if self._max_bytes is not None:
+            self._total_bytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+        while self._is_full():
+            self._remove(self._policy.evict())
+            self.evictions += 1
+
+    def _is_full(self) -> bool:
+        if self._max_entries is not None and len(self._cache) > self._max_entries:
+            return True
+        return self._max_bytes is not None and self._total_bytes > self._max_bytes
+
+    def _remove(self, key) -> None:
+        del self._cache[key]
+        if self._deadlines:
+            self._deadlines.pop(key, None)
+        if self._max_bytes is not None:
+            self._total_bytes -= self._sizes.pop(key)
+
+    def _after_fork(self) -> None:
+        self._lock = Lock()
@@ -1,5 +1,5 @@
 from time import time
-from typing import AnyStr
+from typing import AnyStr, Sequence, List, Tuple
 
 from .cache import Cache
 from ..constants import NOT_FOUND
@@ -13,7 +13,7 @@ from ..postgresql_key_value_adapter import (
 class PostgresqlCache(Cache):
     def __init__(self, connection_pool: ConnectionPool, table: str) -> None:
         super().__init__()
-        self._adapter = PostgresqlKeyValueAdapter(connection_pool, table)
+        self._adapter = self._create_adapter(connection_pool, table)
 
     def get(self, key: str):
         t = self._get_curr_time()
@@ -33,6 +33,37 @@ class PostgresqlCache(Cache):
         except Exception as e:
             raise CachingError(f"Could not set {key} as {value}", exc=e)
 
+    def get_many(self, keys: Sequence[str]) -> List:
+        t = self._get_curr_time()
+        try:
+            values = self._adapter.get_many(keys, t)
+        except Exception as e:
+            raise CachingError(f"Could not get {len(keys)} keys", exc=e)
+        return [NOT_FOUND if v is None else v for v in values]
+
+    def set_many(self, items: Sequence[Tuple[str, AnyStr]], expiration: int) -> None:
+        if expiration:
+            expiration = self._get_curr_time() + expiration
+        try:
+            self._adapter.set_many(items, expiration)
+        except Exception as e:
+            raise CachingError(f"Could not set {len(items)} keys", exc=e)
+
+    def hottest_keys(self, count: int) -> List[str]:
+        """
+        PostgreSQL doesn't track reads, so these are the keys that expire last, and among
+        those that don't expire, the last added - usually the most recently set keys.
+        """
+        try:
+            return self._adapter.latest_keys(count, self._get_curr_time())
+        except Exception as e:
+            raise CachingError("Could not get the latest keys", exc=e)
+
+    def _create_adapter(
+        self, connection_pool: ConnectionPool, table: str
+    ) -> PostgresqlKeyValueAdapter:
+        return PostgresqlKeyValueAdapter(connection_pool, table)
+
     @staticmethod
     def _get_curr_time():
         return round(time() * 1000)
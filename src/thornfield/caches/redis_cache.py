@@ -1,13 +1,19 @@
-from typing import Optional, AnyStr
+import heapq
+import re
+from itertools import islice
+from typing import Optional, AnyStr, Sequence, List, Tuple, Union
 
 from .cache import Cache
 from ..constants import NOT_FOUND
 from ..errors import CachingError
 
 try:
-    from redis import Redis
+    from redis import Redis, ResponseError
 except ModuleNotFoundError:
-    Redis = None
+    Redis = ResponseError = None
+
+# The number of keys scanned, and asked about, in one round trip
+_SCAN_BATCH = 1000
 
 
 class RedisCache(Cache):
@@ -17,23 +23,36 @@ class RedisCache(Cache):
         port: int = 6379,
         db: int = 0,
         password: Optional[str] = None,
+        prefix: str = "",
+        client: Optional["Redis"] = None,
+        binary: bool = False,
         **kwargs,
     ) -> None:
+        """
+        :param prefix: Prepended to the keys, so that caches sharing a database don't overlap.
+        :param client: A client to use instead of connecting to ``host``, so that caches share
+            its connection pool. Its ``decode_responses`` must be the opposite of ``binary``.
+        :param binary: Whether values are returned as they are stored, as ``bytes``,
+            instead of decoded as UTF-8 text. Use it for compressed or pickled values.
+        """
         super().__init__()
         if Redis is None:
             raise CachingError('Package "redis" is not installed')
-        self._redis = Redis(
-            host=host,
-            port=port,
-            db=db,
-            password=password,
-            decode_responses=True,
-            **kwargs,
-        )
+        self._prefix = prefix
+        if client is None:
+            client = Redis(
+                host=host,
+                port=port,
+                db=db,
+                password=password,
+                decode_responses=not binary,
+                **kwargs,
+            )
+        self._redis = client
 
     def get(self, key: str) -> AnyStr:
         try:
-            value = self._redis.get(key)
+            value = self._redis.get(self._prefix + key)
             if value is None:
                 return NOT_FOUND
             return value
@@ -42,6 +61,85 @@ class RedisCache(Cache):
 
     def set(self, key: str, value: AnyStr, expiration: int) -> None:
         try:
-            self._redis.set(key, value, px=expiration or None)
+            self._redis.set(self._prefix + key, value, px=expiration or None)
         except Exception as e:
             raise CachingError(f"Could not set {key} as {value}", exc=e)
+
+    def get_many(self, keys: Sequence[str]) -> List[AnyStr]:
+        if not keys:
+            return []
+        try:
+            values = self._redis.mget([self._prefix + k for k in keys])
+        except Exception as e:
+            raise CachingError(f"Could not get {len(keys)} keys", exc=e)
+        return [NOT_FOUND if v is None else v for v in values]
+
+    def set_many(self, items: Sequence[Tuple[str, AnyStr]], expiration: int) -> None:
+        if not items:
+            return
+        try:
+            pipeline = self._redis.pipeline(transaction=False)
+            for key, value in items:
+                pipeline.set(self._prefix + key, value, px=expiration or None)
+            pipeline.execute()
+        except Exception as e:
+            raise CachingError(f"Could not set {len(items)} keys", exc=e)
+
+    def hottest_keys(self, count: int) -> List[str]:
+        """
+        Scans the database and ranks the keys by Redis' access frequency counter if the
+        ``maxmemory-policy`` is an LFU policy, or else by their idle time.
+        The scan takes a round trip per 1000 keys, so it is meant for startup.
+        """
+        try:
+            keys = self._redis.scan_iter(match=self._pattern, count=_SCAN_BATCH)
+            first = next(keys, None)
+            if first is None:
+                return []
+            try:
+                self._redis.object("freq", first)
+                command, sign = "freq", 1
+            except ResponseError:
+                # Frequencies are only kept by LFU policies
+                command, sign = "idletime", -1
+            ranked = []
+            batch = [first] + list(islice(keys, _SCAN_BATCH - 1))
+            while batch:
+                pipeline = self._redis.pipeline(transaction=False)
+                for key in batch:
+                    pipeline.object(command, key)
+                for key, score in zip(batch, pipeline.execute()):
+                    # A key deleted since the scan has no score
+                    if score is not None:
+                        ranked.append((sign * score, key))
+                ranked = heapq.nlargest(count, ranked)
+                batch = list(islice(keys, _SCAN_BATCH))
+        except Exception as e:
+            raise CachingError("Could not rank the keys", exc=e)
+        prefix = len(self._prefix)
+        return [_decode(key)[prefix:] for _, key in ranked]
+
+    def clear(self) -> None:
+        """
+        Deletes the keys of the cache - all the keys of the database if it has no ``prefix``.
+        Keys are scanned and unlinked a batch at a time, so Redis keeps serving other clients,
+        and keys set meanwhile may be kept.
+        """
+        try:
+            keys = self._redis.scan_iter(match=self._pattern, count=_SCAN_BATCH)
+            while True:
+                batch = list(islice(keys, _SCAN_BATCH))
+                if not batch:
+                    return
+                self._redis.unlink(*batch)
+        except Exception as e:
+            raise CachingError("Could not clear", exc=e)
+
+    @property
+    def _pattern(self) -> str:
+        # The prefix is matched literally
+        return re.sub(r"([\\*?\[\]])", r"\\\1", self._prefix) + "*"
+
+
+def _decode(key: Union[str, bytes]) -> str:
+    return key.decode() if isinstance(key, bytes) else key
@@ -0,0 +1,133 @@
+from collections import defaultdict
+from itertools import chain, islice
+from time import time
+from typing import Any, Sequence, List, Tuple, Optional, Union, Callable
+
+from .cache import Cache
+from .eviction import EvictionPolicy, SizeEstimator, estimate_size
+from .memory_cache import MemoryCache, _RESTORE_CHUNK
+from .snapshot import write_snapshot, read_snapshot
+
+
+class ShardedMemoryCache(Cache):
+    """
+    A ``MemoryCache`` split into shards by the hash of the key, each with its own lock,
+    so that threads accessing different keys rarely wait for each other.
+    This matters for bounded or expiring caches, whose writes lock,
+    and on free-threaded Python builds, where threads run in parallel.
+
+    Bounds are divided between the shards, and each shard evicts by its own policy,
+    so eviction is only approximately global.
+    """
+
+    def __init__(
+        self,
+        shards: int = 16,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        policy: Union[str, Callable[[], EvictionPolicy]] = "lru",
+        size_estimator: SizeEstimator = estimate_size,
+        time_to_idle: Optional[int] = None,
+        expiry_resolution: int = 1000,
+    ) -> None:
+        """
+        :param shards: The number of shards.
+        :param policy: Chooses the entries to evict - ``"lru"``, ``"lfu"``, ``"tinylfu"``
+            or a function returning a new ``EvictionPolicy`` for each shard.
+
+        See ``MemoryCache`` for the other parameters.
+        """
+        super().__init__()
+        if shards < 1:
+            raise ValueError("shards must be positive")
+        self._shards = [
+            MemoryCache(
+                max_entries=_divide(max_entries, shards),
+                max_bytes=_divide(max_bytes, shards),
+                policy=policy if isinstance(policy, str) else policy(),
+                size_estimator=size_estimator,
+                time_to_idle=time_to_idle,
+                expiry_resolution=expiry_resolution,
+            )
+            for _ in range(shards)
+        ]
+
+    @property
+    def size(self) -> int:
+        return sum(s.size for s in self._shards)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(s.total_bytes for s in self._shards)
+
+    @property
+    def evictions(self) -> int:
+        return sum(s.evictions for s in self._shards)
+
+    @property
+    def expirations(self) -> int:
+        return sum(s.expirations for s in self._shards)
+
+    def get(self, key) -> Any:
+        return self._shards[hash(key) % len(self._shards)].get(key)
+
+    def set(self, key, value, expiration: int) -> None:
+        self._shards[hash(key) % len(self._shards)].set(key, value, expiration)
+
+    def get_many(self, keys: Sequence) -> List:
+        # Each shard is accessed once, taking its lock once
+        indices = defaultdict(list)
+        for i, key in enumerate(keys):
+            indices[hash(key) % len(self._shards)].append(i)
+        values = [None] * len(keys)
+        for shard, shard_indices in indices.items():
+            shard_values = self._shards[shard].get_many(
+                [keys[i] for i in shard_indices]
+            )
+            for i, value in zip(shard_indices, shard_values):
+                values[i] = value
+        return values
+
+    def set_many(self, items: Sequence[Tuple[Any, Any]], expiration: int) -> None:
+        shard_items = defaultdict(list)
+        for item in items:
+            shard_items[hash(item[0]) % len(self._shards)].append(item)
+        for shard, items_of_shard in shard_items.items():
+            self._shards[shard].set_many(items_of_shard, expiration)
+
+    def expire(self) -> None:
+        """
+        Removes all the expired entries, see ``MemoryCache.expire``.
+        """
+        for shard in self._shards:
+            shard.expire()
+
+    def snapshot(self, path: str) -> int:
+        """
+        Saves the entries of all the shards to one file, see ``MemoryCache.snapshot``.
+        """
+        now = time() * 1000
+        records = chain.from_iterable(s._snapshot_records(now) for s in self._shards)
+        return write_snapshot(path, records)
+
+    def restore(self, path: str, lazy: bool = False) -> int:
+        """
+        See ``MemoryCache.restore``.
+        """
+        records = read_snapshot(path)
+        restored = 0
+        while True:
+            chunk = list(islice(records, _RESTORE_CHUNK))
+            if not chunk:
+                return restored
+            shard_records = defaultdict(list)
+            for record in chunk:
+                shard_records[hash(record[0]) % len(self._shards)].append(record)
+            for shard, records_of_shard in shard_records.items():
+                restored += self._shards[shard]._restore_records(records_of_shard, lazy)
+
+
+def _divide(bound: Optional[int], shards: int) -> Optional[int]:
+    if bound is None:
+        return None
+    return max(1, -(-bound // shards))
@@ -0,0 +1,125 @@
+from collections import defaultdict
+from itertools import zip_longest
+from typing import Optional, AnyStr, Sequence, List, Tuple, Dict
+
+from .cache import Cache
+from .hash_ring import HashRing
+from .redis_cache import RedisCache
+from ..errors import CachingError
+
+
+class ShardedRedisCache(Cache):
+    """
+    Spreads the keys over several Redis nodes, which aren't a Redis Cluster, by consistent hashing.
+    Keys are mapped by a ``HashRing``, so removing a node only moves the keys of that node,
+    and adding a node only moves keys to it. ``get_many`` and ``set_many`` make one round trip per node.
+
+    All the processes must use the same node addresses, in any order.
+    """
+
+    def __init__(
+        self,
+        nodes: Sequence[str],
+        virtual_nodes: int = 160,
+        db: int = 0,
+        password: Optional[str] = None,
+        prefix: str = "",
+        binary: bool = False,
+        **kwargs,
+    ) -> None:
+        """
+        :param nodes: The addresses of the nodes, as ``"host:port"``.
+        :param virtual_nodes: The number of points of each node on the ring, see ``HashRing``.
+
+        See ``RedisCache`` for the other parameters, which are the same for all the nodes.
+        """
+        super().__init__()
+        if not nodes:
+            raise ValueError("nodes must not be empty")
+        self._node_kwargs = dict(
+            db=db, password=password, prefix=prefix, binary=binary, **kwargs
+        )
+        self._caches: Dict[str, RedisCache] = {}
+        self._ring = HashRing(virtual_nodes=virtual_nodes)
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return self._ring.nodes
+
+    def add_node(self, node: str) -> None:
+        """
+        Starts using ``node``. The keys that move to it are missing until they are set again.
+        """
+        host, _, port = node.rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f'The node address "{node}" is not "host:port"')
+        self._caches[node] = RedisCache(
+            host=host.strip("[]"), port=int(port), **self._node_kwargs
+        )
+        self._ring.add(node)
+
+    def remove_node(self, node: str) -> None:
+        """
+        Stops using ``node``, e.g. when it fails. Its keys move to the other nodes.
+        """
+        self._ring.remove(node)
+        del self._caches[node]
+
+    def get(self, key: str) -> AnyStr:
+        return self._cache_of(key).get(key)
+
+    def set(self, key: str, value: AnyStr, expiration: int) -> None:
+        self._cache_of(key).set(key, value, expiration)
+
+    def get_many(self, keys: Sequence[str]) -> List[AnyStr]:
+        indices = defaultdict(list)
+        for i, key in enumerate(keys):
+            indices[self._node_of(key)].append(i)
+        values = [None] * len(keys)
+        for node, node_indices in indices.items():
+            node_keys = [keys[i] for i in node_indices]
+            node_values = self._cache_of_node(node).get_many(node_keys)
+            for i, value in zip(node_indices, node_values):
+                values[i] = value
+        return values
+
+    def set_many(self, items: Sequence[Tuple[str, AnyStr]], expiration: int) -> None:
+        node_items = defaultdict(list)
+        for item in items:
+            node_items[self._node_of(item[0])].append(item)
+        for node, items_of_node in node_items.items():
+            self._cache_of_node(node).set_many(items_of_node, expiration)
+
+    def hottest_keys(self, count: int) -> List[str]:
+        """
+        The hottest keys of each node, alternately - keys are spread evenly between the nodes,
+        and the scores of different nodes aren't comparable.
+        """
+        per_node = [c.hottest_keys(count) for c in list(self._caches.values())]
+        keys = [k for keys in zip_longest(*per_node) for k in keys if k is not None]
+        return keys[:count]
+
+    def clear(self) -> None:
+        """
+        Clears all the nodes, see ``RedisCache.clear``.
+        """
+        for cache in list(self._caches.values()):
+            cache.clear()
+
+    def _node_of(self, key: str) -> str:
+        try:
+            return self._ring.node(key)
+        except LookupError as e:
+            raise CachingError("All the nodes were removed", exc=e)
+
+    def _cache_of(self, key: str) -> RedisCache:
+        return self._cache_of_node(self._node_of(key))
+
+    def _cache_of_node(self, node: str) -> RedisCache:
+        try:
+            return self._caches[node]
+        except KeyError as e:
+            # Removed by another thread after the key was mapped to it
+            raise CachingError(f"The node {node} was removed", exc=e)
@@ -0,0 +1,320 @@
+import mmap
+import os
+import pickle
+import struct
+from hashlib import blake2b
+from threading import Lock
+from time import time
+from typing import Any, Optional
+from weakref import WeakValueDictionary
+
+from .cache import Cache
+from .key_serialization import key_serializer
+from ..constants import NOT_FOUND
+from ..errors import CachingError
+from ..fork_safety import reset_after_fork
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_MAGIC = b"THSC0001"
+# Magic, slot size, ways, number of buckets and stripes, padded to 64 bytes
+_HEADER = struct.Struct("<8sIIQI")
+_HEADER_SIZE = 64
+# Expiration and last access in milliseconds since the epoch, key length and value length
+_SLOT = struct.Struct("<qqII")
+_ACCESS = struct.Struct("<q")
+_TAG = struct.Struct("<Q")
+# The file offset locked while initializing the file, followed by the offsets of the stripes
+_INIT_LOCK = 0
+
+_tables: "WeakValueDictionary[str, _SharedTable]" = WeakValueDictionary()
+_tables_lock = Lock()
+
+
+class SharedMemoryCache(Cache):
+    """
+    A cache in a memory-mapped file, shared by all the processes that open the same file -
+    e.g. the workers of a pre-fork server - without a network hop.
+
+    The file holds a fixed-size hash table: each key hashes to a bucket of ``ways`` slots
+    of ``slot_size`` bytes. A new key takes an empty or expired slot of its bucket,
+    or evicts the least recently used one. Keys are converted to JSON with ``yasoo``, so that
+    equal keys of different processes match, values are pickled, and entries larger than
+    a slot aren't stored. Buckets are locked in stripes, with ``fcntl`` record locks between
+    processes - readers share the lock and writers hold it exclusively.
+
+    Only POSIX systems are supported. Put the file on a memory-backed file system,
+    e.g. under ``/dev/shm``, so that the pages aren't written back to disk.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = 64 * 1024 * 1024,
+        slot_size: int = 512,
+        ways: int = 8,
+        stripes: int = 64,
+        namespace: str = "",
+    ) -> None:
+        """
+        :param path: The file, created if it doesn't exist.
+        :param size: The maximal size of the file in bytes.
+        :param slot_size: The size of a slot in bytes, including a 24 bytes header,
+            the serialized key and the pickled value.
+        :param ways: The number of slots in a bucket.
+            More ways evict less recently used entries, but make lookups slower.
+        :param stripes: The number of locks the buckets are divided between.
+        :param namespace: Keeps the keys of caches sharing the file apart,
+            e.g. the name of the cached function.
+
+        All the processes must open the file with the same ``size``, ``slot_size``, ``ways`` and ``stripes``.
+        """
+        super().__init__()
+        if fcntl is None:
+            raise CachingError(
+                "SharedMemoryCache requires fcntl, which is not available"
+            )
+        self._serialize_key = key_serializer()
+        self._table = _open_table(path, size, slot_size, ways, stripes)
+        self._prefix = namespace.encode() + b"\0"
+
+    @property
+    def evictions(self) -> int:
+        """
+        The entries this process evicted from the file, in all namespaces.
+        """
+        return sum(self._table.evictions)
+
+    @property
+    def expirations(self) -> int:
+        """
+        The expired entries this process replaced in the file, in all namespaces.
+        """
+        return sum(self._table.expirations)
+
+    def get(self, key) -> Any:
+        key = self._encode(key)
+        value = self._table.get(key, _hash(key), _now())
+        return NOT_FOUND if value is None else pickle.loads(value)
+
+    def set(self, key, value, expiration: int) -> None:
+        key = self._encode(key)
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        now = _now()
+        self._table.set(
+            key, _hash(key), value, now + expiration if expiration else 0, now
+        )
+
+    def clear(self) -> None:
+        """
+        Removes all the entries of the file, in all namespaces.
+        """
+        self._table.clear()
+
+    def _encode(self, key) -> bytes:
+        return self._prefix + self._serialize_key(key)
+
+
+class _SharedTable:
+    """
+    The mapping of a file, shared by the ``SharedMemoryCache`` instances of a process.
+    ``fcntl`` locks belong to the process, so the threads of a process must not lock
+    the same stripe at the same time, and the file must not be opened twice.
+    """
+
+    def __init__(
+        self, path: str, size: int, slot_size: int, ways: int, stripes: int
+    ) -> None:
+        super().__init__()
+        self.geometry = (size, slot_size, ways, stripes)
+        if slot_size <= _SLOT.size:
+            raise ValueError(f"slot_size must be larger than {_SLOT.size}")
+        self._slot_size = slot_size
+        self._ways = ways
+        self._tags = struct.Struct(f"<{ways}Q")
+        self._bucket_size = self._tags.size + ways * slot_size
+        self._buckets = (size - _HEADER_SIZE) // self._bucket_size
+        if self._buckets < 1:
+            raise ValueError(
+                f"size must be at least {_HEADER_SIZE + self._bucket_size}"
+            )
+        self._stripes = min(stripes, self._buckets)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            length = _HEADER_SIZE + self._buckets * self._bucket_size
+            self._initialize(path, length)
+            self._mmap = mmap.mmap(self._fd, length)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._locks = [Lock() for _ in range(self._stripes)]
+        self.evictions = [0] * self._stripes
+        self.expirations = [0] * self._stripes
+        reset_after_fork(self)
+
+    def __del__(self) -> None:
+        mapping = getattr(self, "_mmap", None)
+        if mapping is not None:
+            mapping.close()
+            os.close(self._fd)
+
+    def get(self, key: bytes, hashed: int, now: int) -> Optional[bytes]:
+        bucket = hashed % self._buckets
+        stripe = bucket % len(self._locks)
+        with self._locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_SH, 1, 1 + stripe)
+            try:
+                base = _HEADER_SIZE + bucket * self._bucket_size
+                offset = self._find(base, key, hashed)
+                if offset is None:
+                    return None
+                mapping = self._mmap
+                expires_at, _, key_length, value_length = _SLOT.unpack_from(
+                    mapping, offset
+                )
+                if expires_at and now > expires_at:
+                    return None
+                # Concurrent readers may overwrite each other's access time, which is harmless
+                _ACCESS.pack_into(mapping, offset + 8, now)
+                start = offset + _SLOT.size + key_length
+                return mapping[start : start + value_length]
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 1 + stripe)
+
+    def set(
+        self, key: bytes, hashed: int, value: bytes, expires_at: int, now: int
+    ) -> None:
+        bucket = hashed % self._buckets
+        stripe = bucket % len(self._locks)
+        with self._locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, 1 + stripe)
+            try:
+                base = _HEADER_SIZE + bucket * self._bucket_size
+                offset = self._find(base, key, hashed)
+                if _SLOT.size + len(key) + len(value) > self._slot_size:
+                    # Doesn't fit, but the previous value mustn't be returned anymore
+                    if offset is not None:
+                        self._set_tag(base, offset, 0)
+                    self.evictions[stripe] += 1
+                    return
+                if offset is None:
+                    offset = self._choose_slot(base, stripe, now)
+                # Marked as empty while written, in case the process dies in the middle
+                self._set_tag(base, offset, 0)
+                mapping = self._mmap
+                _SLOT.pack_into(mapping, offset, expires_at, now, len(key), len(value))
+                start = offset + _SLOT.size
+                mapping[start : start + len(key)] = key
+                start += len(key)
+                mapping[start : start + len(value)] = value
+                self._set_tag(base, offset, hashed)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 1 + stripe)
+
+    def clear(self) -> None:
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, len(self._locks), 1)
+            try:
+                tags = bytes(self._tags.size)
+                for bucket in range(self._buckets):
+                    base = _HEADER_SIZE + bucket * self._bucket_size
+                    self._mmap[base : base + len(tags)] = tags
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, len(self._locks), 1)
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+    def _find(self, base: int, key: bytes, hashed: int) -> Optional[int]:
+        tags = self._tags.unpack_from(self._mmap, base)
+        if hashed not in tags:
+            return None
+        for i, tag in enumerate(tags):
+            if tag != hashed:
+                continue
+            offset = base + self._tags.size + i * self._slot_size
+            key_length = _SLOT.unpack_from(self._mmap, offset)[2]
+            start = offset + _SLOT.size
+            if key_length == len(key) and self._mmap[start : start + key_length] == key:
+                return offset
+        return None
+
+    def _choose_slot(self, base: int, stripe: int, now: int) -> int:
+        """
+        :return: The offset of an empty slot, or else of an expired slot,
+            or else of the least recently used slot, of the bucket at ``base``.
+        """
+        tags = self._tags.unpack_from(self._mmap, base)
+        slots = base + self._tags.size
+        if 0 in tags:
+            return slots + tags.index(0) * self._slot_size
+        victim, victim_access = 0, None
+        for i in range(self._ways):
+            offset = slots + i * self._slot_size
+            expires_at, access, _, _ = _SLOT.unpack_from(self._mmap, offset)
+            if expires_at and now > expires_at:
+                self.expirations[stripe] += 1
+                return offset
+            if victim_access is None or access < victim_access:
+                victim, victim_access = offset, access
+        self.evictions[stripe] += 1
+        return victim
+
+    def _set_tag(self, base: int, offset: int, tag: int) -> None:
+        index = (offset - base - self._tags.size) // self._slot_size
+        _TAG.pack_into(self._mmap, base + index * _TAG.size, tag)
+
+    def _initialize(self, path: str, length: int) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, _INIT_LOCK)
+        try:
+            header = _HEADER.pack(
+                _MAGIC, self._slot_size, self._ways, self._buckets, self._stripes
+            )
+            existing = os.pread(self._fd, _HEADER.size, 0)
+            if existing == header:
+                return
+            if existing[: len(_MAGIC)] == _MAGIC:
+                raise CachingError(
+                    f"{path} was created with a different size, slot_size, ways or stripes"
+                )
+            # A new file, or one whose initialization didn't finish - the header is written last
+            os.ftruncate(self._fd, 0)
+            os.ftruncate(self._fd, length)
+            os.pwrite(self._fd, header, 0)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, _INIT_LOCK)
+
+    def _after_fork(self) -> None:
+        # The mapping and the file descriptor are inherited, but the locks of the parent are not
+        self._locks = [Lock() for _ in self._locks]
+
+
+def _open_table(
+    path: str, size: int, slot_size: int, ways: int, stripes: int
+) -> _SharedTable:
+    real_path = os.path.realpath(path)
+    with _tables_lock:
+        table = _tables.get(real_path)
+        if table is None:
+            table = _tables[real_path] = _SharedTable(
+                real_path, size, slot_size, ways, stripes
+            )
+        elif table.geometry != (size, slot_size, ways, stripes):
+            raise CachingError(
+                f"{path} is already open with a different size, slot_size, ways or stripes"
+            )
+        return table
+
+
+def _hash(key: bytes) -> int:
+    # Not ``hash``, which differs between processes. Never 0, which marks an empty slot.
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), "little") | 1
+
+
+def _now() -> int:
+    return int(time() * 1000)
@@ -0,0 +1,46 @@
+"""
+The file format of ``MemoryCache`` snapshots - a header followed by pickled records
+of a key, its expiration time in milliseconds since the epoch (``0`` if it doesn't expire)
+and its pickled value.
+"""
+
+import os
+import pickle
+from typing import Iterable, Iterator, Tuple, Any
+
+_MAGIC = b"THSNAP01"
+
+Record = Tuple[Any, int, bytes]
+
+
+def write_snapshot(path: str, records: Iterable[Record]) -> int:
+    """
+    Replaces ``path`` atomically, so a snapshot that fails midway doesn't corrupt the previous one.
+
+    :return: The number of records written.
+    """
+    written = 0
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(_MAGIC)
+            for record in records:
+                pickle.dump(record, f, pickle.HIGHEST_PROTOCOL)
+                written += 1
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return written
+
+
+def read_snapshot(path: str) -> Iterator[Record]:
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a cache snapshot")
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
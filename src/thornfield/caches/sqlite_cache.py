@@ -0,0 +1,282 @@
+import pickle
+import sqlite3
+from contextlib import contextmanager
+from threading import local
+from time import time
+from typing import Any, Sequence, List, Tuple, Optional
+
+from .cache import Cache
+from .key_serialization import key_serializer
+from ..constants import NOT_FOUND
+from ..errors import CachingError
+from ..fork_safety import reset_after_fork
+
+# Expired entries are deleted once in this many writes of a process
+_PURGE_INTERVAL = 100
+# The maximal number of parameters of a statement in old SQLite versions
+_MAX_PARAMS = 999
+
+
+class SqliteCache(Cache):
+    """
+    A cache in an SQLite database file, which survives restarts and can be shared by
+    the processes of a host. The database is in WAL mode, so reads don't wait for writes.
+
+    Keys are converted to JSON with ``yasoo``, so that equal keys always match,
+    and values are pickled. Expired entries are deleted by writes, periodically
+    and when the cache is full. When ``max_entries`` or ``max_bytes`` is exceeded,
+    the least recently read entries are evicted, down to 99% of the bound - reading time is
+    updated at most once in ``access_resolution`` milliseconds per entry, so that most reads
+    don't write.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        table: str = "cache",
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        timeout: float = 5,
+        access_resolution: int = 60000,
+    ) -> None:
+        """
+        :param path: The database file, created if it doesn't exist.
+        :param table: The table of the entries, created if it doesn't exist.
+        :param max_entries: The maximal number of entries in ``table``.
+        :param max_bytes: The maximal total size of the pickled values in ``table``.
+        :param timeout: Seconds to wait for a write lock held by another connection.
+        :param access_resolution: How often the reading time of an entry is updated, in milliseconds.
+        """
+        super().__init__()
+        self._path = path
+        self._name = table
+        self._table = _quote(table)
+        self._stats_table = _quote(f"{table}_stats")
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._timeout = timeout
+        self._access_resolution = access_resolution
+        self._local = local()
+        # The connection from before the last fork is kept, since closing it in the child
+        # could remove the write-ahead log of the parent.
+        # Only the last one is kept, so that processes forking repeatedly don't accumulate them.
+        self._inherited = None
+        self._writes = 0
+        self._serialize_key = key_serializer()
+        reset_after_fork(self)
+        try:
+            self._create_table()
+        except sqlite3.Error as e:
+            raise CachingError(f"Could not create table {table} in {path}", exc=e)
+
+    def get(self, key) -> Any:
+        return self.get_many([key])[0]
+
+    def set(self, key, value, expiration: int) -> None:
+        self.set_many([(key, value)], expiration)
+
+    def get_many(self, keys: Sequence) -> List:
+        if not keys:
+            return []
+        encoded = [self._serialize_key(k) for k in keys]
+        now = _now()
+        rows = {}
+        try:
+            connection = self._connection
+            for i in range(0, len(encoded), _MAX_PARAMS):
+                chunk = encoded[i : i + _MAX_PARAMS]
+                placeholders = ", ".join("?" * len(chunk))
+                rows.update(
+                    (row[0], row[1:])
+                    for row in connection.execute(
+                        f"select key, value, expires_at, accessed_at from {self._table} "
+                        f"where key in ({placeholders})",
+                        chunk,
+                    )
+                )
+            self._touch(connection, rows, now)
+        except sqlite3.Error as e:
+            raise CachingError(f"Could not get {len(keys)} keys", exc=e)
+        values = []
+        for key in encoded:
+            row = rows.get(key)
+            if row is None or (row[1] is not None and now > row[1]):
+                values.append(NOT_FOUND)
+            else:
+                values.append(pickle.loads(row[0]))
+        return values
+
+    def set_many(self, items: Sequence[Tuple[Any, Any]], expiration: int) -> None:
+        if not items:
+            return
+        now = _now()
+        expires_at = now + expiration if expiration else None
+        rows = []
+        for key, value in items:
+            value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            rows.append((self._serialize_key(key), value, expires_at, now, len(value)))
+        try:
+            with _transaction(self._connection) as connection:
+                connection.executemany(
+                    f"insert into {self._table} "
+                    f"(key, value, expires_at, accessed_at, size) values (?, ?, ?, ?, ?) "
+                    f"on conflict (key) do update set value=excluded.value, "
+                    f"expires_at=excluded.expires_at, accessed_at=excluded.accessed_at, "
+                    f"size=excluded.size",
+                    rows,
+                )
+                self._writes += 1
+                if self._writes % _PURGE_INTERVAL == 0:
+                    self._purge(connection, now)
+                if self._max_entries is not None or self._max_bytes is not None:
+                    self._evict(connection, now)
+        except sqlite3.Error as e:
+            raise CachingError(f"Could not set {len(items)} keys", exc=e)
+
+    def expire(self) -> None:
+        """
+        Deletes all the expired entries.
+        """
+        try:
+            with _transaction(self._connection) as connection:
+                self._purge(connection, _now())
+        except sqlite3.Error as e:
+            raise CachingError("Could not delete expired keys", exc=e)
+
+    def clear(self) -> None:
+        try:
+            with _transaction(self._connection) as connection:
+                connection.execute(f"delete from {self._table}")
+        except sqlite3.Error as e:
+            raise CachingError("Could not clear", exc=e)
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self._path, timeout=self._timeout, isolation_level=None
+        )
+        connection.execute("pragma journal_mode=wal")
+        # Committed transactions may be lost on power failure, which is fine for a cache
+        connection.execute("pragma synchronous=normal")
+        return connection
+
+    def _create_table(self) -> None:
+        name, table, stats = self._name, self._table, self._stats_table
+        with _transaction(self._connection) as connection:
+            connection.execute(
+                f"create table if not exists {table} (key blob primary key, "
+                f"value blob not null, expires_at integer, accessed_at integer not null, "
+                f"size integer not null)"
+            )
+            connection.execute(
+                f"create index if not exists {_quote(name + '_expires_at')} "
+                f"on {table} (expires_at) where expires_at is not null"
+            )
+            connection.execute(
+                f"create index if not exists {_quote(name + '_accessed_at')} "
+                f"on {table} (accessed_at)"
+            )
+            # The number and size of the entries, kept by triggers so that they aren't counted
+            connection.execute(
+                f"create table if not exists {stats} "
+                f"(entries integer not null, bytes integer not null)"
+            )
+            connection.execute(
+                f"insert into {stats} select 0, 0 where not exists (select * from {stats})"
+            )
+            connection.execute(
+                f"create trigger if not exists {_quote(name + '_insert')} after insert on {table} "
+                f"begin update {stats} set entries=entries + 1, bytes=bytes + new.size; end"
+            )
+            connection.execute(
+                f"create trigger if not exists {_quote(name + '_delete')} after delete on {table} "
+                f"begin update {stats} set entries=entries - 1, bytes=bytes - old.size; end"
+            )
+            connection.execute(
+                f"create trigger if not exists {_quote(name + '_update')} "
+                f"after update of size on {table} "
+                f"begin update {stats} set bytes=bytes + new.size - old.size; end"
+            )
+
+    def _touch(self, connection: sqlite3.Connection, rows: dict, now: int) -> None:
+        stale = [
+            (now, key)
+            for key, (_, _, accessed_at) in rows.items()
+            if now - accessed_at > self._access_resolution
+        ]
+        if not stale:
+            return
+        # Reads don't wait for the write lock - the reading time is only a hint,
+        # so it isn't updated if another connection is writing
+        connection.execute("pragma busy_timeout=0")
+        try:
+            with _transaction(connection):
+                connection.executemany(
+                    f"update {self._table} set accessed_at=? where key=?", stale
+                )
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            connection.execute(f"pragma busy_timeout={int(self._timeout * 1000)}")
+
+    def _purge(self, connection: sqlite3.Connection, now: int) -> None:
+        connection.execute(f"delete from {self._table} where expires_at <= ?", (now,))
+
+    def _evict(self, connection: sqlite3.Connection, now: int) -> None:
+        purged = False
+        while True:
+            entries, size = connection.execute(
+                f"select entries, bytes from {self._stats_table}"
+            ).fetchone()
+            excess = 0
+            if self._max_entries is not None:
+                excess = entries - self._max_entries
+            if self._max_bytes is not None and size > self._max_bytes:
+                # Estimated by the average size, and checked again after deleting
+                excess = max(excess, -(-(size - self._max_bytes) * entries // size))
+            if excess <= 0:
+                return
+            if not purged:
+                self._purge(connection, now)
+                purged = True
+                continue
+            # Another 1% is evicted, so that the next writes don't need to evict
+            deleted = connection.execute(
+                f"delete from {self._table} where key in "
+                f"(select key from {self._table} order by accessed_at limit ?)",
+                (excess + entries // 100,),
+            ).rowcount
+            if not deleted:
+                return
+
+    def _after_fork(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            self._inherited = connection
+        self._local = local()
+
+
+@contextmanager
+def _transaction(connection: sqlite3.Connection):
+    # Takes the write lock at the start, rather than upgrading a read lock, which can deadlock
+    connection.execute("begin immediate")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("rollback")
+        raise
+    connection.execute("commit")
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _now() -> int:
+    return round(time() * 1000)
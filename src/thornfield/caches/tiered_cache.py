@@ -0,0 +1,158 @@
+import json
+import logging
+from collections import OrderedDict
+from threading import Lock
+from time import time
+from typing import Optional, Any, Sequence, List, Tuple
+from uuid import uuid4
+
+from .cache import Cache
+from .invalidators import Invalidator
+from ..constants import NOT_FOUND
+from ..fork_safety import reset_after_fork
+
+_logger = logging.getLogger("thornfield.tiered_cache")
+
+
+class TieredCache(Cache):
+    """
+    Keeps a bounded in-process LRU cache in front of another, usually remote, cache.
+    Values found in the remote cache are kept in the local cache as they are,
+    so decorate the remote cache with serialization before passing it,
+    and then hits in the local cache skip deserialization.
+
+    When ``invalidator`` is passed, setting a key removes it from the local caches
+    of all the ``TieredCache`` instances with the same ``namespace`` in other processes.
+    """
+
+    def __init__(
+        self,
+        cache: Cache,
+        max_entries: int = 1024,
+        local_ttl: int = 1000,
+        invalidator: Optional[Invalidator] = None,
+        namespace: str = "",
+        promoted_ttl: int = 60000,
+    ) -> None:
+        """
+        :param cache: The remote cache.
+        :param max_entries: The maximal number of entries in the local cache.
+        :param local_ttl: Maximal time in milliseconds to keep a value in the local cache,
+            or ``0`` to keep it until it expires, is evicted or invalidated.
+        :param promoted_ttl: Maximal time in milliseconds to keep a value read from the remote cache
+            in the local cache, since its remaining time to expire isn't known.
+        :param invalidator: Broadcasts invalidations to other processes.
+        :param namespace: Identifies the caches that share invalidations,
+            e.g. the name of the cached function.
+        """
+        super().__init__()
+        self._cache = cache
+        self._max_entries = max_entries
+        self._local_ttl = local_ttl
+        if promoted_ttl <= 0:
+            raise ValueError("promoted_ttl must be positive")
+        self._promoted_ttl = promoted_ttl
+        self._local = OrderedDict()
+        self._lock = Lock()
+        self._invalidator = invalidator
+        self._namespace = namespace
+        self._node_id = uuid4().hex
+        reset_after_fork(self)
+        if invalidator is not None:
+            # Invalidations sent while the invalidator reconnects are lost
+            try:
+                invalidator.subscribe(self._on_invalidation, self.clear_local)
+            except Exception as e:
+                _logger.exception("Could not subscribe to invalidations", exc_info=e)
+
+    def _after_fork(self) -> None:
+        # Invalidations sent between the fork and the child's subscription are lost,
+        # and the parent's messages must not be taken as the child's own
+        self._lock = Lock()
+        self._local.clear()
+        self._node_id = uuid4().hex
+
+    def get(self, key):
+        value = self._get_local(key)
+        if value is NOT_FOUND:
+            value = self._cache.get(key)
+            if value is not NOT_FOUND:
+                self._set_local(key, value, self._promoted_ttl)
+        return value
+
+    def set(self, key, value, expiration: int) -> None:
+        self._cache.set(key, value, expiration)
+        self._set_local(key, value, expiration)
+        self._publish([key])
+
+    def get_many(self, keys: Sequence) -> List:
+        values = [self._get_local(k) for k in keys]
+        missing = [i for i, v in enumerate(values) if v is NOT_FOUND]
+        if missing:
+            remote_values = self._cache.get_many([keys[i] for i in missing])
+            for i, value in zip(missing, remote_values):
+                if value is not NOT_FOUND:
+                    self._set_local(keys[i], value, self._promoted_ttl)
+                values[i] = value
+        return values
+
+    def set_many(self, items: Sequence[Tuple[Any, Any]], expiration: int) -> None:
+        self._cache.set_many(items, expiration)
+        for key, value in items:
+            self._set_local(key, value, expiration)
+        self._publish([k for k, _ in items])
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return NOT_FOUND
+            value, expires_at = entry
+            if expires_at and time() * 1000 > expires_at:
+                del self._local[key]
+                return NOT_FOUND
+            self._local.move_to_end(key)
+            return value
+
+    def _set_local(self, key, value, expiration: int) -> None:
+        ttl = expiration or self._local_ttl
+        if expiration and self._local_ttl:
+            ttl = min(expiration, self._local_ttl)
+        expires_at = time() * 1000 + ttl if ttl else 0
+        with self._lock:
+            self._local[key] = (value, expires_at)
+            self._local.move_to_end(key)
+            if len(self._local) > self._max_entries:
+                self._local.popitem(last=False)
+
+    def _publish(self, keys: List) -> None:
+        if self._invalidator is None:
+            return
+        try:
+            message = json.dumps([self._node_id, self._namespace, keys])
+        except TypeError:
+            # Keys that can't be sent invalidate the whole local cache
+            message = json.dumps([self._node_id, self._namespace, None])
+        self._invalidator.publish(message)
+
+    def _on_invalidation(self, message: str) -> None:
+        node_id, namespace, keys = json.loads(message)
+        if node_id == self._node_id or namespace != self._namespace:
+            return
+        if keys is None:
+            self.clear_local()
+            return
+        with self._lock:
+            for key in keys:
+                self._local.pop(self._to_key(key), None)
+
+    @classmethod
+    def _to_key(cls, obj):
+        # JSON turns the tuples of the key into lists
+        if isinstance(obj, list):
+            return tuple(cls._to_key(o) for o in obj)
+        return obj
@@ -4,5 +4,7 @@ from typing import Any
 
 @dataclass
 class VolatileValue:
+    # Without a __dict__, since a cache can hold millions of them
+    __slots__ = ("value", "expiration")
     value: Any
     expiration: int
@@ -0,0 +1,32 @@
+from .cache import Cache
+from ..constants import NOT_FOUND
+
+
+def warm_up(
+    cache: Cache,
+    source: Cache,
+    count: int = 1000,
+    expiration: int = 0,
+    batch_size: int = 100,
+) -> int:
+    """
+    Copies the hottest entries of ``source``, usually a remote cache, to ``cache``,
+    e.g. to fill the ``MemoryCache`` of a new process before it serves requests.
+    ``source`` must implement ``Cache.hottest_keys``, like ``RedisCache`` and ``PostgresqlCache``,
+    and be decorated like the cache it was filled through, so that the keys and values match.
+
+    :param count: The maximal number of entries to copy.
+    :param expiration: Expiration time of the copied entries in ``cache``, in milliseconds.
+    :param batch_size: The number of entries read from ``source`` at a time.
+    :return: The number of copied entries.
+    :raise CachingError: If ``source`` doesn't support ``hottest_keys``.
+    """
+    keys = source.hottest_keys(count)
+    copied = 0
+    for i in range(0, len(keys), batch_size):
+        batch = keys[i : i + batch_size]
+        values = source.get_many(batch)
+        items = [(k, v) for k, v in zip(batch, values) if v is not NOT_FOUND]
+        cache.set_many(items, expiration)
+        copied += len(items)
+    return copied
@@ -1,14 +1,15 @@
 from dataclasses import dataclass
-from typing import List, Dict, Any, Optional
+from typing import Optional
 
 from thornfield.caches.cache import Cache
+from thornfield.key_builder import KeyBuilder
+from thornfield.result_policy import ResultPolicy
 from thornfield.typing import NormalCallable
 
 
 @dataclass
 class CachingData:
-    func_args: List[str]
-    func_annotations: Dict[str, Any]
-    func_defaults: Dict[str, Any]
+    make_key: KeyBuilder
+    policy: ResultPolicy
     cache: Optional[Cache]
     func_passed_to_cache: Optional[NormalCallable]
@@ -0,0 +1,32 @@
+"""
+Lets objects reset what can't be shared with a child process created by ``os.fork`` -
+locks, threads and connections - so that cached functions keep working in forked workers,
+e.g. of ``multiprocessing`` or ``ProcessPoolExecutor``.
+"""
+
+import logging
+import os
+from weakref import WeakSet
+
+_logger = logging.getLogger("thornfield.fork_safety")
+_objects = WeakSet()
+
+
+def reset_after_fork(obj) -> None:
+    """
+    Registers ``obj``, whose ``_after_fork`` method will be called in child processes after a fork.
+    ``obj`` is referenced weakly.
+    """
+    _objects.add(obj)
+
+
+def _after_fork_in_child() -> None:
+    for obj in list(_objects):
+        try:
+            obj._after_fork()
+        except Exception as e:
+            _logger.exception("Error resetting %r after fork", obj, exc_info=e)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
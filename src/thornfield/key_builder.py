@@ -0,0 +1,112 @@
+from inspect import getfullargspec
+from operator import itemgetter
+from types import FunctionType
+from typing import Callable, Any, Dict, List, Tuple, NamedTuple
+
+from .typing import NotCached, Cached
+
+KeyBuilder = Callable[[tuple, dict], tuple]
+_METHOD_FIRST_ARGS = ("self", "cls")
+
+
+def create_key_builder(func: Callable) -> KeyBuilder:
+    """
+    Inspects ``func`` once and returns a function that builds a cache key
+    from the ``args`` and ``kwargs`` of a call to ``func``.
+
+    The first argument is omitted from the key if it is named ``self`` or ``cls``.
+    """
+    spec = get_arg_spec(func)
+    func_args = spec.args
+    if spec.defaults:
+        defaults = dict(zip(func_args[-len(spec.defaults) :], spec.defaults))
+    else:
+        defaults = {}
+    return _compile(_get_key_args(spec), len(func_args), defaults)
+
+
+def get_key_arg_names(func: Callable) -> List[str]:
+    """
+    :return: The names of the arguments of ``func`` that are part of the key,
+        in the order they appear in the key.
+    """
+    return [a for _, a in _get_key_args(get_arg_spec(func))]
+
+
+class ArgSpec(NamedTuple):
+    args: List[str]
+    defaults: Tuple
+    annotations: Dict[str, Any]
+
+
+def get_arg_spec(func: Callable) -> ArgSpec:
+    """
+    :return: The positional arguments of ``func``, their defaults and the annotations of ``func``.
+        Read from the code object of plain functions, which is much faster than ``getfullargspec``.
+    """
+    if type(func) is FunctionType:
+        code = func.__code__
+        args = list(code.co_varnames[: code.co_argcount])
+        return ArgSpec(args, func.__defaults__ or (), func.__annotations__)
+    spec = getfullargspec(func)
+    return ArgSpec(spec.args, spec.defaults or (), spec.annotations)
+
+
+def _get_key_args(spec: ArgSpec) -> List[Tuple[int, str]]:
+    func_args = spec.args
+    start = 1 if func_args and func_args[0] in _METHOD_FIRST_ARGS else 0
+    is_key_arg = _create_key_arg_predicate(spec.annotations)
+    return [(i, a) for i, a in enumerate(func_args) if i >= start and is_key_arg(a)]
+
+
+def _create_key_arg_predicate(annotations: Dict[str, Any]) -> Callable[[str], bool]:
+    if any(a is NotCached for a in annotations.values()):
+        return lambda arg: annotations.get(arg) is not NotCached
+    elif any(a is Cached for a in annotations.values()):
+        return lambda arg: annotations.get(arg) is Cached
+    return lambda arg: True
+
+
+def _compile(
+    key_args: List[Tuple[int, str]], args_count: int, defaults: Dict[str, Any]
+) -> KeyBuilder:
+    def build_slow(args: tuple, kwargs: dict) -> tuple:
+        n = len(args)
+        return tuple(
+            args[i] if i < n else kwargs[a] if a in kwargs else defaults[a]
+            for i, a in key_args
+        )
+
+    indices = tuple(i for i, _ in key_args)
+    if indices == tuple(range(args_count)):
+        get_fast = None
+    elif indices == tuple(range(1, args_count)):
+        get_fast = itemgetter(slice(1, None))
+    elif len(indices) > 1:
+        get_fast = itemgetter(*indices)
+    elif indices:
+        i = indices[0]
+
+        def get_fast(args: tuple) -> tuple:
+            return (args[i],)
+
+    else:
+
+        def get_fast(_: tuple) -> tuple:
+            return ()
+
+    if get_fast is None:
+
+        def build(args: tuple, kwargs: dict) -> tuple:
+            if not kwargs and len(args) == args_count:
+                return args
+            return build_slow(args, kwargs)
+
+    else:
+
+        def build(args: tuple, kwargs: dict) -> tuple:
+            if not kwargs and len(args) == args_count:
+                return get_fast(args)
+            return build_slow(args, kwargs)
+
+    return build
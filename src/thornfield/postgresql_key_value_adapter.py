@@ -1,12 +1,32 @@
+import re
 from enum import Enum, auto
-from typing import Callable, Optional, List, Union, AnyStr
+from hashlib import blake2b
+from threading import Lock
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Optional,
+    List,
+    Union,
+    AnyStr,
+    Awaitable,
+    Sequence,
+    Tuple,
+)
+from weakref import WeakKeyDictionary
 
-try:
+from .errors import CachingError
+from .fork_safety import reset_after_fork
+
+# The pools are only used for type hints, and importing them is slow
+if TYPE_CHECKING:
     from psycopg2.pool import AbstractConnectionPool
-except ImportError:
-    AbstractConnectionPool = None
+    from psycopg_pool import AsyncConnectionPool as AbstractAsyncConnectionPool
 
-ConnectionPool = Union[AbstractConnectionPool, Callable[[], AbstractConnectionPool]]
+ConnectionPool = Union["AbstractConnectionPool", Callable[[], "AbstractConnectionPool"]]
+AsyncConnectionPool = Union[
+    "AbstractAsyncConnectionPool", Callable[[], "AbstractAsyncConnectionPool"]
+]
 
 
 class FetchAmount(Enum):
@@ -15,18 +35,60 @@ class FetchAmount(Enum):
     ZERO = auto()
 
 
+class PreparedStatements:
+    """
+    The names of the statements prepared on a connection.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.names = set()
+        self._generation = 0
+
+    def name(self, query: str) -> str:
+        digest = blake2b(query.encode(), digest_size=8).hexdigest()
+        return f"thornfield_{digest}_{self._generation}"
+
+    def invalidate(self) -> None:
+        """
+        Forgets the statements, which are prepared again under new names
+        in case the old ones exist after all.
+        """
+        self.names.clear()
+        self._generation += 1
+
+
+# The statements prepared on each connection, shared by all the pools and adapters using it
+_prepared_statements: "WeakKeyDictionary[object, PreparedStatements]" = (
+    WeakKeyDictionary()
+)
+_prepared_statements_lock = Lock()
+
+
 class ConnectionWrapper:
     def __init__(
-        self, connection, release_callback: Callable[["ConnectionWrapper"], None]
+        self,
+        connection,
+        release_callback: Callable[["ConnectionWrapper"], None],
+        prepared: Optional[PreparedStatements] = None,
     ) -> None:
         super().__init__()
         self._connection = connection
         self._callback = release_callback
+        self._prepared = PreparedStatements() if prepared is None else prepared
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            # The transaction failed, and the connection can't be used before rolling it back.
+            # Statements prepared in it may have been removed.
+            self._prepared.invalidate()
+            try:
+                self._connection.rollback()
+            except Exception:
+                pass
         self._callback(self._connection)
 
     def execute_query(self, query: str, fetch: FetchAmount, *params: str):
@@ -38,24 +100,133 @@ class ConnectionWrapper:
                 return cursor.fetchall()
         self._connection.commit()
 
+    def execute_prepared(self, query: str, fetch: FetchAmount, *params):
+        """
+        Like ``execute_query``, but ``query`` is parsed and planned by the server once per connection,
+        with ``PREPARE``, and then executed with ``EXECUTE``.
+        """
+        name = self._prepared.name(query)
+        if name not in self._prepared.names:
+            with self._connection.cursor() as cursor:
+                cursor.execute(f"prepare {name} as {_number_params(query)}", ())
+            self._prepared.names.add(name)
+        if params:
+            name += f" ({', '.join(['%s'] * len(params))})"
+        return self.execute_query(f"execute {name}", fetch, *params)
+
+
+class AsyncConnectionWrapper:
+    def __init__(
+        self,
+        connection,
+        release_callback: Callable[["AsyncConnectionWrapper"], Awaitable[None]],
+    ) -> None:
+        super().__init__()
+        self._connection = connection
+        self._callback = release_callback
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            try:
+                await self._connection.rollback()
+            except Exception:
+                pass
+        await self._callback(self._connection)
+
+    async def execute_query(self, query: str, fetch: FetchAmount, *params: str):
+        return await self._execute(query, fetch, params, False)
+
+    async def execute_prepared(self, query: str, fetch: FetchAmount, *params):
+        """
+        Like ``execute_query``, but the query is prepared by ``psycopg``, once per connection.
+        """
+        return await self._execute(query, fetch, params, True)
+
+    async def _execute(self, query: str, fetch: FetchAmount, params, prepare: bool):
+        result = None
+        async with self._connection.cursor() as cursor:
+            await cursor.execute(query, params, prepare=prepare)
+            if fetch is FetchAmount.ONE:
+                result = await cursor.fetchone() if cursor.rowcount > 0 else None
+            elif fetch is FetchAmount.ALL:
+                result = await cursor.fetchall()
+        # Reads are committed too, so that the connection returns to the pool idle
+        # rather than being rolled back by it
+        await self._connection.commit()
+        return result
+
 
 class ConnectionPoolWrapper:
+    """
+    Creates the pool on first use if it's passed as a function that creates it.
+
+    The connections of a pool can't be used by a forked child process,
+    so after a fork the pool is created again by that function,
+    or by calling the pool's class with the same arguments if it's a ``psycopg2`` pool.
+    """
+
     def __init__(self, pool: ConnectionPool) -> None:
         super().__init__()
         self._raw_pool = pool
+        self._create_pool = pool if isinstance(pool, Callable) else None
+        # The pool from before the last fork is kept, since closing its connections
+        # would close the connections of the parent process.
+        # Only the last one is kept, so that processes forking repeatedly don't accumulate them.
+        self._inherited_pool = None
+        reset_after_fork(self)
 
     @property
     def _pool(self):
         if isinstance(self._raw_pool, Callable):
             self._raw_pool = self._raw_pool()
+        elif self._raw_pool is None:
+            raise CachingError(
+                "The connection pool can't be used after a fork, "
+                "pass a function that creates it instead"
+            )
         return self._raw_pool
 
     def getconn(self) -> ConnectionWrapper:
-        return ConnectionWrapper(self._pool.getconn(), self.putconn)
+        connection = self._pool.getconn()
+        return ConnectionWrapper(
+            connection, self.putconn, _prepared_statements_of(connection)
+        )
 
     def putconn(self, conn):
         self._pool.putconn(conn)
 
+    def _after_fork(self) -> None:
+        pool = self._raw_pool
+        if isinstance(pool, Callable):
+            return
+        self._inherited_pool = pool
+        if self._create_pool is not None:
+            self._raw_pool = self._create_pool
+        elif self._is_psycopg2_pool(pool):
+            self._raw_pool = lambda: type(pool)(
+                pool.minconn, pool.maxconn, *pool._args, **pool._kwargs
+            )
+        else:
+            self._raw_pool = None
+
+    @staticmethod
+    def _is_psycopg2_pool(pool) -> bool:
+        return all(hasattr(pool, a) for a in ("minconn", "maxconn", "_args", "_kwargs"))
+
+
+class AsyncConnectionPoolWrapper(ConnectionPoolWrapper):
+    def __init__(self, pool: AsyncConnectionPool) -> None:
+        super().__init__(pool)
+
+    async def getconn(self) -> AsyncConnectionWrapper:
+        return AsyncConnectionWrapper(await self._pool.getconn(), self.putconn)
+
+    async def putconn(self, conn):
+        await self._pool.putconn(conn)
+
 
 class PostgresqlKeyValueAdapter:
     def __init__(
@@ -84,22 +255,58 @@ class PostgresqlKeyValueAdapter:
             self._create_table_if_not_exists(isinstance(value, bytes))
             self._table_exists = True
         with self._pool.getconn() as connection:
-            if self._exists(connection, self._table, self._key_col, key):
-                self._update(connection, key, value, ts)
-            else:
-                self._add(connection, key, value, ts)
+            connection.execute_prepared(
+                self._upsert_query(), FetchAmount.ZERO, key, value, *self._ts_params(ts)
+            )
 
     def get(self, key: str, min_ts: Optional[int] = None) -> Optional[AnyStr]:
         if not self._table_exists:
             return None
 
-        query = f"select {self._value_col} from {self._table} where {self._key_col}=%s"
-        if min_ts is not None:
-            assert self._ts_col
-            query += f" and ({self._ts_col}>{min_ts} or {self._ts_col}=0)"
         with self._pool.getconn() as connection:
-            result = connection.execute_query(query, FetchAmount.ONE, key)
-        return result[0] if result else None
+            result = connection.execute_prepared(
+                self._get_query(min_ts is not None),
+                FetchAmount.ONE,
+                key,
+                *self._min_ts_params(min_ts),
+            )
+        return _from_db(result[0]) if result else None
+
+    def get_many(
+        self, keys: Sequence[str], min_ts: Optional[int] = None
+    ) -> List[Optional[AnyStr]]:
+        if not self._table_exists or not keys:
+            return [None] * len(keys)
+
+        with self._pool.getconn() as connection:
+            rows = connection.execute_prepared(
+                self._get_many_query(min_ts is not None),
+                FetchAmount.ALL,
+                list(keys),
+                *self._min_ts_params(min_ts),
+            )
+        values = {k: _from_db(v) for k, v in rows}
+        return [values.get(k) for k in keys]
+
+    def set_many(self, items: Sequence[Tuple[str, AnyStr]], ts: Optional[int] = None):
+        if not items:
+            return
+        if self._ts_col:
+            assert ts is not None
+        binary = isinstance(items[0][1], bytes)
+        if not self._table_exists:
+            self._create_table_if_not_exists(binary)
+            self._table_exists = True
+        # A key can't be updated twice in the same statement
+        items = dict(items)
+        with self._pool.getconn() as connection:
+            connection.execute_prepared(
+                self._upsert_many_query(binary),
+                FetchAmount.ZERO,
+                *self._ts_params(ts),
+                list(items),
+                list(items.values()),
+            )
 
     def keys(self) -> List[str]:
         if not self._table_exists:
@@ -111,6 +318,47 @@ class PostgresqlKeyValueAdapter:
             )
         return [t[0] for t in result]
 
+    def get_or_allocate(self, key: str) -> str:
+        """
+        Sets the value of ``key`` to the next number of a sequence, unless it's already set.
+        The value is inserted by a single statement, so concurrent callers get the same number.
+
+        :return: The value of ``key``.
+        """
+        assert not self._ts_col
+        value = self.get(key)
+        if value is not None:
+            return value
+        if not self._table_exists:
+            self._create_table_if_not_exists(False)
+            self._table_exists = True
+        with self._pool.getconn() as connection:
+            self._create_sequence_if_not_exists(connection)
+            connection.execute_query(
+                f"insert into {self._table} ({self._key_col}, {self._value_col})"
+                f" values (%s, nextval('{self._sequence}')::text)"
+                f" on conflict ({self._key_col}) do nothing",
+                FetchAmount.ZERO,
+                key,
+            )
+        return self.get(key)
+
+    def latest_keys(self, count: int, min_ts: Optional[int] = None) -> List[str]:
+        """
+        :return: Up to ``count`` keys, by descending ``ts`` and then descending insertion order.
+        """
+        if not self._table_exists:
+            return []
+
+        with self._pool.getconn() as connection:
+            result = connection.execute_query(
+                self._latest_keys_query(min_ts is not None),
+                FetchAmount.ALL,
+                *self._min_ts_params(min_ts),
+                count,
+            )
+        return [t[0] for t in result]
+
     def _create_table_if_not_exists(self, binary: bool):
         with self._pool.getconn() as connection:
             exists = self._exists(
@@ -118,36 +366,106 @@ class PostgresqlKeyValueAdapter:
             )
             if exists:
                 return
-            value_col_type = "bytes" if binary else "text"
-            structure = f"id serial primary key, {self._key_col} text unique, {self._value_col} {value_col_type}"
-            if self._ts_col:
-                structure += f", {self._ts_col} bigint"
-            connection.execute_query(
-                f"create table {self._table} ({structure})", FetchAmount.ZERO
-            )
+            connection.execute_query(self._create_table_query(binary), FetchAmount.ZERO)
 
-    def _update(self, connection: ConnectionWrapper, key, value, ts):
-        values_str = f"{self._value_col}=%s"
-        if self._ts_col:
-            values_str += f", {self._ts_col}={ts}"
+    @property
+    def _sequence(self) -> str:
+        return f"{self._table}_seq"
+
+    def _create_sequence_if_not_exists(self, connection: ConnectionWrapper):
+        exists = connection.execute_query(
+            "select to_regclass(%s) is not null", FetchAmount.ONE, self._sequence
+        )
+        if exists[0]:
+            return
+        # Serializes the creation, since concurrent "create if not exists" statements may fail.
+        # The lock is released when the sequence is created and the transaction is committed.
         connection.execute_query(
-            f"update {self._table} set {values_str} where {self._key_col}=%s",
+            "select pg_advisory_xact_lock(hashtext(%s))",
+            FetchAmount.ONE,
+            self._sequence,
+        )
+        # Numbers set before the sequence existed, by older versions, aren't reused
+        start = connection.execute_query(
+            f"select coalesce(max({self._value_col}::bigint), 0) + 1 from {self._table}"
+            f" where {self._value_col} ~ '^[0-9]+$'",
+            FetchAmount.ONE,
+        )
+        connection.execute_query(
+            f"create sequence if not exists {self._sequence} start with {start[0]}",
             FetchAmount.ZERO,
-            value,
-            key,
         )
 
-    def _add(self, connection: ConnectionWrapper, key, value, ts):
+    def _ts_params(self, ts: Optional[int]) -> tuple:
+        return (ts,) if self._ts_col else ()
+
+    def _min_ts_params(self, min_ts: Optional[int]) -> tuple:
+        if min_ts is None:
+            return ()
+        assert self._ts_col
+        return (min_ts,)
+
+    def _get_query(self, with_min_ts: bool) -> str:
+        query = f"select {self._value_col} from {self._table} where {self._key_col}=%s"
+        if with_min_ts:
+            query += f" and ({self._ts_col}>%s or {self._ts_col}=0)"
+        return query
+
+    def _get_many_query(self, with_min_ts: bool) -> str:
+        query = (
+            f"select {self._key_col}, {self._value_col} from {self._table}"
+            f" where {self._key_col}=any(%s)"
+        )
+        if with_min_ts:
+            query += f" and ({self._ts_col}>%s or {self._ts_col}=0)"
+        return query
+
+    def _latest_keys_query(self, with_min_ts: bool) -> str:
+        query = f"select {self._key_col} from {self._table}"
+        order = "id desc"
+        if with_min_ts:
+            query += f" where ({self._ts_col}>%s or {self._ts_col}=0)"
+        if self._ts_col:
+            order = f"{self._ts_col}=0 desc, {self._ts_col} desc, {order}"
+        return f"{query} order by {order} limit %s"
+
+    def _create_table_query(self, binary: bool) -> str:
+        value_col_type = "bytea" if binary else "text"
+        structure = f"id serial primary key, {self._key_col} text unique, {self._value_col} {value_col_type}"
+        if self._ts_col:
+            structure += f", {self._ts_col} bigint"
+        return f"create table if not exists {self._table} ({structure})"
+
+    def _upsert_query(self) -> str:
         columns = f"{self._key_col}, {self._value_col}"
         values = "%s, %s"
+        updates = f"{self._value_col}=excluded.{self._value_col}"
         if self._ts_col:
             columns += f", {self._ts_col}"
-            values += f", {ts}"
-        connection.execute_query(
-            f"insert into {self._table} ({columns}) values ({values})",
-            FetchAmount.ZERO,
-            key,
-            value,
+            values += ", %s"
+            updates += f", {self._ts_col}=excluded.{self._ts_col}"
+        return (
+            f"insert into {self._table} ({columns}) values ({values})"
+            f" on conflict ({self._key_col}) do update set {updates}"
+        )
+
+    def _upsert_many_query(self, binary: bool) -> str:
+        """
+        The keys and the values are passed as two arrays, so that the statement is the same
+        for any number of items, and is prepared once.
+        """
+        columns = f"{self._key_col}, {self._value_col}"
+        selected = "k, v"
+        updates = f"{self._value_col}=excluded.{self._value_col}"
+        if self._ts_col:
+            columns += f", {self._ts_col}"
+            selected += ", %s::bigint"
+            updates += f", {self._ts_col}=excluded.{self._ts_col}"
+        value_type = "bytea" if binary else "text"
+        return (
+            f"insert into {self._table} ({columns}) select {selected}"
+            f" from unnest(%s::text[], %s::{value_type}[]) as u(k, v)"
+            f" on conflict ({self._key_col}) do update set {updates}"
         )
 
     @classmethod
@@ -155,8 +473,117 @@ class PostgresqlKeyValueAdapter:
         cls, connection: ConnectionWrapper, table: str, column: str, value: str
     ) -> bool:
         exists = connection.execute_query(
-            f"select exists(select * from {table} where {column}=%s)",
-            FetchAmount.ONE,
-            value,
+            cls._exists_query(table, column), FetchAmount.ONE, value
         )
         return exists[0]
+
+    @staticmethod
+    def _exists_query(table: str, column: str) -> str:
+        return f"select exists(select * from {table} where {column}=%s)"
+
+
+class AsyncPostgresqlKeyValueAdapter(PostgresqlKeyValueAdapter):
+    """
+    Adds ``aget`` and ``aset``, which use an asyncio connection pool
+    (e.g. ``psycopg_pool.AsyncConnectionPool``) instead of blocking.
+    """
+
+    def __init__(
+        self,
+        connection_pool: ConnectionPool,
+        async_connection_pool: AsyncConnectionPool,
+        table_name: str,
+        key_col: str = "key",
+        value_col: str = "value",
+        ts_col: Optional[str] = "ts",
+    ) -> None:
+        super().__init__(connection_pool, table_name, key_col, value_col, ts_col)
+        self._async_pool = AsyncConnectionPoolWrapper(async_connection_pool)
+
+    async def aset(self, key: str, value: AnyStr, ts: Optional[int] = None):
+        if self._ts_col:
+            assert ts is not None
+        async with await self._async_pool.getconn() as connection:
+            if not self._table_exists:
+                await connection.execute_query(
+                    self._create_table_query(isinstance(value, bytes)),
+                    FetchAmount.ZERO,
+                )
+                self._table_exists = True
+            await connection.execute_prepared(
+                self._upsert_query(), FetchAmount.ZERO, key, value, *self._ts_params(ts)
+            )
+
+    async def aget(self, key: str, min_ts: Optional[int] = None) -> Optional[AnyStr]:
+        if not self._table_exists:
+            return None
+
+        async with await self._async_pool.getconn() as connection:
+            result = await connection.execute_prepared(
+                self._get_query(min_ts is not None),
+                FetchAmount.ONE,
+                key,
+                *self._min_ts_params(min_ts),
+            )
+        return result[0] if result else None
+
+    async def aget_many(
+        self, keys: Sequence[str], min_ts: Optional[int] = None
+    ) -> List[Optional[AnyStr]]:
+        if not self._table_exists or not keys:
+            return [None] * len(keys)
+
+        async with await self._async_pool.getconn() as connection:
+            rows = await connection.execute_prepared(
+                self._get_many_query(min_ts is not None),
+                FetchAmount.ALL,
+                list(keys),
+                *self._min_ts_params(min_ts),
+            )
+        values = dict(rows)
+        return [values.get(k) for k in keys]
+
+    async def aset_many(
+        self, items: Sequence[Tuple[str, AnyStr]], ts: Optional[int] = None
+    ):
+        if not items:
+            return
+        if self._ts_col:
+            assert ts is not None
+        binary = isinstance(items[0][1], bytes)
+        # A key can't be updated twice in the same statement
+        items = dict(items)
+        async with await self._async_pool.getconn() as connection:
+            if not self._table_exists:
+                await connection.execute_query(
+                    self._create_table_query(binary), FetchAmount.ZERO
+                )
+                self._table_exists = True
+            await connection.execute_prepared(
+                self._upsert_many_query(binary),
+                FetchAmount.ZERO,
+                *self._ts_params(ts),
+                list(items),
+                list(items.values()),
+            )
+
+
+def _from_db(value):
+    # psycopg2 returns bytea values as memoryview
+    return bytes(value) if isinstance(value, memoryview) else value
+
+
+def _number_params(query: str) -> str:
+    """
+    Replaces the ``%s`` placeholders of ``query`` by ``$1``, ``$2``... as ``PREPARE`` expects.
+    """
+    numbers = iter(range(1, query.count("%s") + 1))
+    return re.sub("%s", lambda _: f"${next(numbers)}", query)
+
+
+def _prepared_statements_of(connection) -> PreparedStatements:
+    with _prepared_statements_lock:
+        prepared = _prepared_statements.get(connection)
+        if prepared is None:
+            prepared = _prepared_statements[connection] = PreparedStatements()
+        return prepared
@@ -0,0 +1,72 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from typing import Optional, Callable, Any, Dict, Awaitable
+
+from .fork_safety import reset_after_fork
+
+_logger = logging.getLogger("thornfield.refresher")
+
+
+class Refresher:
+    """
+    Refreshes cached values in the background - in a bounded thread pool,
+    or in a task of the running event loop for async functions.
+    Each key is refreshed at most once at a time.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        super().__init__()
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = Lock()
+        self._in_progress: Dict[Any, Any] = {}
+        reset_after_fork(self)
+
+    def refresh(self, key, func: Callable[[], Any]) -> None:
+        if not self._is_hashable(key):
+            return
+        with self._lock:
+            if key in self._in_progress:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self._max_workers, thread_name_prefix="thornfield-refresh"
+                )
+            future = self._in_progress[key] = self._executor.submit(func)
+        future.add_done_callback(partial(self._done, key))
+
+    def arefresh(self, key, func: Callable[[], Awaitable]) -> None:
+        # Imported here, so that asyncio is imported only if it's used
+        from asyncio import ensure_future
+
+        if not self._is_hashable(key):
+            return
+        with self._lock:
+            if key in self._in_progress:
+                return
+            # Keeping a reference to the task, so it's not garbage collected
+            task = self._in_progress[key] = ensure_future(func())
+        task.add_done_callback(partial(self._done, key))
+
+    def _after_fork(self) -> None:
+        # The threads of the executor don't exist in the child process
+        self._lock = Lock()
+        self._executor = None
+        self._in_progress = {}
+
+    @staticmethod
+    def _is_hashable(key) -> bool:
+        # Values with unhashable keys are not refreshed, and just expire
+        try:
+            hash(key)
+            return True
+        except TypeError:
+            return False
+
+    def _done(self, key, future) -> None:
+        with self._lock:
+            del self._in_progress[key]
+        if not future.cancelled() and future.exception() is not None:
+            _logger.error("Error refreshing value", exc_info=future.exception())
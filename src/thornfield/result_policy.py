@@ -0,0 +1,136 @@
+from importlib import import_module
+from random import random
+from time import time
+from typing import Optional, Callable, Any, Tuple, Type
+
+from .constants import NOT_FOUND
+from .errors import CachingError
+
+Entry = Tuple[Any, int]
+
+# Wrapped values are tagged, so that values stored before the policy wrapped them aren't misread
+_MARKER = "__thornfield__"
+_RESULT = "result"
+_EXCEPTION = "exception"
+
+
+class ResultPolicy:
+    """
+    Decides whether and how the results of a cached function are stored in its cache.
+
+    Results are stored as is, unless ``stale_ttl`` is set or exceptions are cached.
+    Then each result is stored in a tagged envelope together with the time it stops being fresh
+    (``0`` if it never becomes stale), and is kept in the cache for ``stale_ttl`` more milliseconds.
+    An exception is stored as its type and arguments, and raised again when read.
+    Values that aren't such envelopes, e.g. stored before the policy wrapped results, are read as misses.
+    """
+
+    def __init__(
+        self,
+        validator: Optional[Callable[[Any], bool]],
+        expiration: int,
+        stale_ttl: int = 0,
+        expiration_jitter: float = 0,
+        negative_ttl: int = 0,
+        cache_exceptions: Tuple[Type[BaseException], ...] = (),
+        exception_ttl: int = 0,
+    ) -> None:
+        super().__init__()
+        if stale_ttl and not expiration:
+            raise CachingError("stale_ttl can be used only with an expiration")
+        if not 0 <= expiration_jitter < 1:
+            raise CachingError("expiration_jitter must be between 0 and 1")
+        if cache_exceptions and exception_ttl <= 0:
+            raise CachingError(
+                "cache_exceptions can be used only with an exception_ttl"
+            )
+        self._validator = validator
+        self._expiration = expiration
+        self._stale_ttl = stale_ttl
+        self._jitter = expiration_jitter
+        self._negative_ttl = negative_ttl
+        self._exception_ttl = exception_ttl
+        self.cached_exceptions = tuple(cache_exceptions)
+        self.wraps = bool(stale_ttl or cache_exceptions)
+
+    def to_entry(self, result) -> Optional[Entry]:
+        """
+        :return: The value to store and its expiration, or ``None`` if ``result`` shouldn't be cached.
+        """
+        if self._validator is None or self._validator(result):
+            expiration = self._jittered(self._expiration)
+            stale_ttl = self._stale_ttl
+        elif self._negative_ttl:
+            expiration = self._jittered(self._negative_ttl)
+            stale_ttl = 0
+        else:
+            return None
+
+        if not self.wraps:
+            return result, expiration
+        fresh_until = self._now() + expiration if stale_ttl else 0
+        return (_MARKER, _RESULT, fresh_until, result), expiration + stale_ttl
+
+    def exception_to_entry(self, exc: BaseException) -> Entry:
+        exc_type = type(exc)
+        type_name = f"{exc_type.__module__}:{exc_type.__qualname__}"
+        entry = (_MARKER, _EXCEPTION, type_name, exc.args)
+        return entry, self._jittered(self._exception_ttl)
+
+    def from_entry(self, entry) -> Tuple[Any, bool]:
+        """
+        :param entry: A value stored in the cache by a policy that ``wraps``.
+        :return: The result and whether it is stale.
+            The result is ``NOT_FOUND`` if ``entry`` isn't a valid envelope,
+            or if it's a cached exception that can't be raised.
+        :raise: The exception stored in ``entry``, if there is one.
+        """
+        if _is_envelope(entry, _EXCEPTION):
+            _, _, type_name, args = entry
+            if not isinstance(type_name, str) or not isinstance(args, (list, tuple)):
+                return NOT_FOUND, False
+            exc = self._create_exception(type_name, args)
+            if exc is None:
+                return NOT_FOUND, False
+            raise exc
+
+        if not _is_envelope(entry, _RESULT) or not isinstance(entry[2], int):
+            return NOT_FOUND, False
+        _, _, fresh_until, result = entry
+        return result, bool(fresh_until) and self._now() > fresh_until
+
+    def _create_exception(self, type_name: str, args) -> Optional[BaseException]:
+        module_name, _, qualname = type_name.partition(":")
+        try:
+            exc_type = import_module(module_name)
+            for attr in qualname.split("."):
+                exc_type = getattr(exc_type, attr)
+        except (ImportError, AttributeError):
+            return None
+        # Only cached exception types are created, since the entry comes from outside
+        if not isinstance(exc_type, type) or not issubclass(
+            exc_type, self.cached_exceptions
+        ):
+            return None
+        try:
+            return exc_type(*args)
+        except Exception:
+            return None
+
+    def _jittered(self, expiration: int) -> int:
+        if expiration and self._jitter:
+            expiration -= int(expiration * self._jitter * random())
+        return expiration
+
+    @staticmethod
+    def _now() -> int:
+        return round(time() * 1000)
+
+
+def _is_envelope(entry, kind: str) -> bool:
+    return (
+        isinstance(entry, (list, tuple))
+        and len(entry) == 4
+        and entry[0] == _MARKER
+        and entry[1] == kind
+    )
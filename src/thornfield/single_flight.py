@@ -0,0 +1,61 @@
+from threading import Lock, Event
+from typing import Callable, Dict, Any, Optional, TypeVar
+
+from .fork_safety import reset_after_fork
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self) -> None:
+        super().__init__()
+        self.done = Event()
+        self.result = None
+        self.exc: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Makes sure only one thread at a time runs a function for a given key.
+    Other threads calling with the same key wait for the running call and get its result.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = Lock()
+        self._calls: Dict[Any, _Call] = {}
+        reset_after_fork(self)
+
+    def do(self, key, func: Callable[[], T]) -> T:
+        try:
+            hash(key)
+        except TypeError:
+            return func()
+
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if not is_leader:
+            call.done.wait()
+            if call.exc is not None:
+                raise call.exc
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.exc = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def _after_fork(self) -> None:
+        # The threads running the calls don't exist in the child process
+        self._lock = Lock()
+        self._calls = {}
@@ -0,0 +1,320 @@
+import logging
+from dataclasses import dataclass
+from functools import wraps
+from inspect import iscoroutinefunction
+from threading import Lock, Thread, Event
+from time import perf_counter
+from typing import Callable, Dict, Optional, Sequence, List, Tuple, Any
+
+from .caches.async_cache import AsyncCache
+from .caches.cache import Cache
+from .constants import NOT_FOUND
+from .errors import CachingError
+from .fork_safety import reset_after_fork
+from .typing import NormalCallable
+
+_logger = logging.getLogger("thornfield.stats")
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """
+    A snapshot of the statistics of a cached function.
+    Times are in seconds.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    rejections: int = 0
+    errors: int = 0
+    get_time: float = 0
+    set_time: float = 0
+    compute_time: float = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+
+StatsExporter = Callable[[Dict[str, CacheStats]], None]
+
+
+class FunctionStats:
+    """
+    Thread-safe counters of a cached function.
+    """
+
+    __slots__ = (
+        "_lock",
+        "hits",
+        "misses",
+        "rejections",
+        "errors",
+        "get_time",
+        "set_time",
+        "compute_time",
+    )
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = Lock()
+        self._reset()
+
+    def record_get(self, hits: int, misses: int, duration: float) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.get_time += duration
+
+    def record_set(self, duration: float) -> None:
+        with self._lock:
+            self.set_time += duration
+
+    def record_compute(self, duration: float) -> None:
+        with self._lock:
+            self.compute_time += duration
+
+    def record_rejection(self) -> None:
+        with self._lock:
+            self.rejections += 1
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self, reset: bool = False) -> CacheStats:
+        with self._lock:
+            stats = CacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                rejections=self.rejections,
+                errors=self.errors,
+                get_time=self.get_time,
+                set_time=self.set_time,
+                compute_time=self.compute_time,
+            )
+            if reset:
+                self._reset()
+        return stats
+
+    def _reset(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.rejections = 0
+        self.errors = 0
+        self.get_time = 0.0
+        self.set_time = 0.0
+        self.compute_time = 0.0
+
+
+class StatsRegistry:
+    """
+    Holds the statistics of the functions cached by a ``Cacher``,
+    and optionally exports them periodically in a daemon thread.
+    """
+
+    def __init__(
+        self, exporter: Optional[StatsExporter] = None, export_interval: float = 60
+    ) -> None:
+        super().__init__()
+        self._exporter = exporter
+        self._export_interval = export_interval
+        self._lock = Lock()
+        self._stats: Dict[str, FunctionStats] = {}
+        self._exporting: Optional[Thread] = None
+        self._stopped = Event()
+        reset_after_fork(self)
+
+    def register(self, func: NormalCallable) -> FunctionStats:
+        """
+        :return: The statistics of ``func``. Functions with the same qualified name share them.
+        """
+        name = f"{func.__module__}.{func.__qualname__}"
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = FunctionStats()
+            if self._exporter is not None and self._exporting is None:
+                self._start_exporting()
+        return stats
+
+    def snapshot(self, reset: bool = False) -> Dict[str, CacheStats]:
+        with self._lock:
+            stats = list(self._stats.items())
+        return {name: s.snapshot(reset) for name, s in stats}
+
+    def export(self) -> None:
+        if self._exporter is None:
+            return
+        try:
+            self._exporter(self.snapshot())
+        except Exception as e:
+            _logger.exception("Error exporting cache statistics", exc_info=e)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _start_exporting(self) -> None:
+        self._exporting = Thread(
+            target=self._export_periodically, name="thornfield-stats", daemon=True
+        )
+        self._exporting.start()
+
+    def _after_fork(self) -> None:
+        # The child starts counting from zero, so exported statistics aren't counted twice
+        self._lock = Lock()
+        for stats in self._stats.values():
+            stats._lock = Lock()
+            stats._reset()
+        if self._exporting is not None:
+            self._start_exporting()
+
+    def _export_periodically(self) -> None:
+        while not self._stopped.wait(self._export_interval):
+            self.export()
+
+
+def instrument_function(func: NormalCallable, stats: FunctionStats) -> NormalCallable:
+    """
+    :return: ``func``, recording its run time in ``stats``.
+    """
+    if iscoroutinefunction(func):
+
+        @wraps(func)
+        async def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                stats.record_compute(perf_counter() - start)
+
+    else:
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.record_compute(perf_counter() - start)
+
+    return timed
+
+
+def instrument_validator(
+    validator: Optional[Callable[[Any], bool]], stats: FunctionStats
+) -> Optional[Callable[[Any], bool]]:
+    """
+    :return: ``validator``, counting the values it rejects in ``stats``.
+    """
+    if validator is None:
+        return None
+
+    def counting(value) -> bool:
+        valid = validator(value)
+        if not valid:
+            stats.record_rejection()
+        return valid
+
+    return counting
+
+
+def instrument_cache(cache: Cache, stats: FunctionStats) -> Cache:
+    """
+    :return: A ``Cache`` recording the hits, misses, errors and access times of ``cache`` in ``stats``.
+    """
+    if isinstance(cache, AsyncCache):
+        return _AsyncStatsCache(cache, stats)
+    return _StatsCache(cache, stats)
+
+
+class _StatsCache(Cache):
+    def __init__(self, cache: Cache, stats: FunctionStats) -> None:
+        super().__init__()
+        self._cache = cache
+        self._stats = stats
+
+    def get(self, key):
+        start = perf_counter()
+        try:
+            value = self._cache.get(key)
+        except CachingError:
+            self._stats.record_error()
+            raise
+        found = value is not NOT_FOUND
+        self._stats.record_get(found, not found, perf_counter() - start)
+        return value
+
+    def set(self, key, value, expiration: int) -> None:
+        start = perf_counter()
+        try:
+            self._cache.set(key, value, expiration)
+        except CachingError:
+            self._stats.record_error()
+            raise
+        self._stats.record_set(perf_counter() - start)
+
+    def get_many(self, keys: Sequence) -> List:
+        start = perf_counter()
+        try:
+            values = self._cache.get_many(keys)
+        except CachingError:
+            self._stats.record_error()
+            raise
+        misses = sum(1 for v in values if v is NOT_FOUND)
+        self._stats.record_get(len(values) - misses, misses, perf_counter() - start)
+        return values
+
+    def set_many(self, items: Sequence[Tuple[Any, Any]], expiration: int) -> None:
+        start = perf_counter()
+        try:
+            self._cache.set_many(items, expiration)
+        except CachingError:
+            self._stats.record_error()
+            raise
+        self._stats.record_set(perf_counter() - start)
+
+
+class _AsyncStatsCache(_StatsCache, AsyncCache):
+    async def aget(self, key):
+        start = perf_counter()
+        try:
+            value = await self._cache.aget(key)
+        except CachingError:
+            self._stats.record_error()
+            raise
+        found = value is not NOT_FOUND
+        self._stats.record_get(found, not found, perf_counter() - start)
+        return value
+
+    async def aset(self, key, value, expiration: int) -> None:
+        start = perf_counter()
+        try:
+            await self._cache.aset(key, value, expiration)
+        except CachingError:
+            self._stats.record_error()
+            raise
+        self._stats.record_set(perf_counter() - start)
+
+    async def aget_many(self, keys: Sequence) -> List:
+        start = perf_counter()
+        try:
+            values = await self._cache.aget_many(keys)
+        except CachingError:
+            self._stats.record_error()
+            raise
+        misses = sum(1 for v in values if v is NOT_FOUND)
+        self._stats.record_get(len(values) - misses, misses, perf_counter() - start)
+        return values
+
+    async def aset_many(
+        self, items: Sequence[Tuple[Any, Any]], expiration: int
+    ) -> None:
+        start = perf_counter()
+        try:
+            await self._cache.aset_many(items, expiration)
+        except CachingError:
+            self._stats.record_error()
+            raise
+        self._stats.record_set(perf_counter() - start)
@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from benchmarks import BENCHMARKS
+from benchmarks import (
+    bench_cacher,
+    bench_memory_cache,
+    bench_decorators,
+    bench_backends,
+    bench_startup,
+    bench_concurrency,
+    bench_shared_memory,
+)
+from benchmarks.memory import LAYOUTS, measure
+from benchmarks.runner import run, compare
+
+
+class TestBenchmarks(TestCase):
+    def test_all_benchmarks_run(self):
+        results = run(BENCHMARKS.values(), repeat=1, min_time=0, log=lambda _: None)
+        self.assertEqual(set(BENCHMARKS), set(results['results']))
+        self.assertTrue(all(r['median_ns'] > 0 for r in results['results'].values()))
+
+    def test_compare(self):
+        base = {'environment': {}, 'results': {'a': {'median_ns': 100}, 'b': {'median_ns': 100}}}
+        new = {'environment': {}, 'results': {'a': {'median_ns': 105}, 'b': {'median_ns': 100}}}
+        self.assertTrue(compare(base, new, log=lambda _: None))
+        new['results']['b']['median_ns'] = 150
+        lines = []
+        self.assertFalse(compare(base, new, log=lines.append))
+        self.assertIn('REGRESSION', lines[-1])
+
+    def test_memory(self):
+        results = measure(entries=100, log=lambda _: None)
+        self.assertEqual(set(LAYOUTS), set(results))
+        self.assertLess(results['unbounded'], results['unbounded_expiring'])
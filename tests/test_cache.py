@@ -3,6 +3,7 @@ from unittest import TestCase
 
 from thornfield.caches.cache import Cache
 from thornfield.caches.volatile_value import VolatileValue
+from thornfield.constants import NOT_FOUND
 
 
 class TestCache(TestCase):
@@ -16,3 +17,19 @@ class TestCache(TestCase):
         self.assertEqual(original_value, value.value)
         self.assertGreaterEqual(value.expiration, before + expiration)
         self.assertLessEqual(value.expiration, after + expiration)
+
+    def test_default_get_many_and_set_many(self):
+        class DictCache(Cache):
+            def __init__(self):
+                self.data = {}
+
+            def get(self, key):
+                return self.data.get(key, NOT_FOUND)
+
+            def set(self, key, value, expiration: int) -> None:
+                self.data[key] = value
+
+        cache = DictCache()
+        cache.set_many([(1, 'a'), (2, 'b')], 0)
+        self.assertEqual({1: 'a', 2: 'b'}, cache.data)
+        self.assertEqual(['b', NOT_FOUND, 'a'], cache.get_many([2, 3, 1]))
@@ -1,8 +1,10 @@
 from unittest import TestCase
 from unittest.mock import create_autospec, MagicMock
 
+from tests.utils import async_mock, run_async
 from thornfield.caches.cache import Cache
-from thornfield.caches.cache_compression_decorator import CacheCompressionDecorator
+from thornfield.caches.cache_compression_decorator import CacheCompressionDecorator, AsyncCacheCompressionDecorator
+from thornfield.caches.memory_cache import MemoryCache
 from thornfield.constants import NOT_FOUND
 
 
@@ -36,6 +38,13 @@ class TestCacheCompressionDecorator(TestCase):
         result = decorator.get(1)
         self.assertEqual(self._cache.get.return_value, result)
 
+    def test_binary_compresses_bytes(self):
+        cache = MemoryCache()
+        decorator = CacheCompressionDecorator(cache, binary=True)
+        decorator.set(1, b'\xff' * 100, 0)
+        self.assertLess(len(cache.get(1)), 100)
+        self.assertEqual(b'\xff' * 100, decorator.get(1))
+
     def test_not_found(self):
         self._cache.get = MagicMock(return_value=NOT_FOUND)
         decompress = MagicMock()
@@ -43,3 +52,29 @@ class TestCacheCompressionDecorator(TestCase):
         result = CacheCompressionDecorator(self._cache, decompress=decompress).get(1)
         decompress.assert_not_called()
         self.assertIs(NOT_FOUND, result)
+
+    def test_get_many_and_set_many(self):
+        self._cache.set_many = MagicMock()
+        self._cache.get_many = MagicMock(return_value=['x', NOT_FOUND])
+
+        decorator = CacheCompressionDecorator(self._cache, compress=lambda x: x * 2, decompress=lambda x: x.upper())
+        decorator.set_many([(1, 2), (3, 4)], 0)
+        self._cache.set_many.assert_called_once_with([(1, 4), (3, 8)], 0)
+        self.assertEqual(['X', NOT_FOUND], decorator.get_many([1, 3]))
+
+    def test_async_value_compressed_when_set(self):
+        compress = MagicMock(return_value='x')
+        self._cache.aset = async_mock()
+        decorator = AsyncCacheCompressionDecorator(self._cache, compress=compress)
+        run_async(decorator.aset(1, 2, 0))
+        compress.assert_called_once_with(2)
+        self._cache.aset.mock.assert_called_once_with(1, 'x', 0)
+
+    def test_async_not_found(self):
+        self._cache.aget = async_mock(return_value=NOT_FOUND)
+        decompress = MagicMock()
+
+        decorator = AsyncCacheCompressionDecorator(self._cache, decompress=decompress)
+        result = run_async(decorator.aget(1))
+        decompress.assert_not_called()
+        self.assertIs(NOT_FOUND, result)
@@ -3,10 +3,11 @@ from importlib import reload
 from unittest import TestCase
 from unittest.mock import create_autospec, MagicMock, patch
 
-from tests.utils import mock_import
+from tests.utils import mock_import, async_mock, run_async
 from thornfield.caches import cache_serialization_decorator
 from thornfield.caches.cache import Cache
-from thornfield.caches.cache_serialization_decorator import CacheSerializationDecorator
+from thornfield.caches.memory_cache import MemoryCache
+from thornfield.caches.cache_serialization_decorator import CacheSerializationDecorator, AsyncCacheSerializationDecorator
 from thornfield.constants import NOT_FOUND
 from thornfield.errors import CachingError
 
@@ -43,6 +44,16 @@ class TestCacheSerializationDecorator(TestCase):
         deserialize.assert_called_once_with(2)
         self.assertEqual(deserialize.return_value, result)
 
+    def test_binary_pickles_values(self):
+        cache = MemoryCache()
+        decorator = CacheSerializationDecorator(cache, binary=True)
+        decorator.set((1, 'a'), {'x': b'\xff'}, 0)
+        key, value = next(iter(cache._cache.items()))
+        self.assertIsInstance(key, str)
+        self.assertIsInstance(value, bytes)
+        self.assertEqual({'x': b'\xff'}, decorator.get((1, 'a')))
+        self.assertEqual([{'x': b'\xff'}, NOT_FOUND], decorator.get_many([(1, 'a'), 2]))
+
     def test_no_action_when_init_with_none(self):
         self._cache.set = MagicMock()
         self._cache.get = MagicMock(return_value=2)
@@ -63,3 +74,36 @@ class TestCacheSerializationDecorator(TestCase):
         result = CacheSerializationDecorator(self._cache, serializer=serialize, deserializer=deserialize).get(1)
         deserialize.assert_not_called()
         self.assertIs(NOT_FOUND, result)
+
+    def test_get_many_and_set_many(self):
+        self._cache.set_many = MagicMock()
+        self._cache.get_many = MagicMock(return_value=['"y"', NOT_FOUND])
+
+        decorator = CacheSerializationDecorator(self._cache, serializer=str, deserializer=lambda x: x.strip('"'))
+        decorator.set_many([(1, 2), (3, 4)], 0)
+        self._cache.set_many.assert_called_once_with([('1', '2'), ('3', '4')], 0)
+
+        result = decorator.get_many([1, 3])
+        self._cache.get_many.assert_called_once_with(['1', '3'])
+        self.assertEqual(['y', NOT_FOUND], result)
+
+    def test_async_key_and_value_serialized_when_set(self):
+        serialize = MagicMock(return_value='x')
+        self._cache.aset = async_mock()
+
+        decorator = AsyncCacheSerializationDecorator(self._cache, serializer=serialize)
+        run_async(decorator.aset(1, 2, 0))
+        serialize.assert_any_call(1)
+        serialize.assert_any_call(2)
+        self._cache.aset.mock.assert_called_once_with('x', 'x', 0)
+
+    def test_async_key_serialized_and_value_deserialized_when_get(self):
+        serialize = MagicMock(return_value='x')
+        deserialize = MagicMock(return_value='y')
+        self._cache.aget = async_mock(return_value=2)
+
+        decorator = AsyncCacheSerializationDecorator(self._cache, serializer=serialize, deserializer=deserialize)
+        result = run_async(decorator.aget(1))
+        self._cache.aget.mock.assert_called_once_with('x')
+        deserialize.assert_called_once_with(2)
+        self.assertEqual('y', result)
@@ -1,15 +1,26 @@
 import asyncio
 import inspect
+import json
 import logging
+from threading import Thread, Event
+from time import sleep
 from unittest import TestCase
 from unittest.mock import create_autospec, MagicMock
 
 from thornfield import Cacher
+from thornfield.caches.async_cache import AsyncCache
 from thornfield.caches.cache import Cache
+from thornfield.caches.cache_serialization_decorator import CacheSerializationDecorator
+from thornfield.caches.memory_cache import MemoryCache
 from thornfield.constants import NOT_FOUND
 from thornfield.errors import CachingError
 from thornfield.typing import Cached, NotCached
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class TestCacher(TestCase):
     def setUp(self) -> None:
@@ -330,6 +341,34 @@ class TestCacher(TestCase):
         self.assertEqual({}, self.cache)
         self.assertNotEqual({}, data)
 
+    def test_caching_decorator_async_function_with_async_cache(self):
+        data = {}
+
+        class CustomCache(Cache, AsyncCache):
+            def get(self, key):
+                raise AssertionError('Sync get called')
+
+            def set(self, key, value, expiration):
+                raise AssertionError('Sync set called')
+
+            async def aget(self, key):
+                return data.get(key, NOT_FOUND)
+
+            async def aset(self, key, value, expiration):
+                data[key] = value
+
+        @self.cacher.cached(CustomCache())
+        async def bar(x):
+            bar.call_count += 1
+            return x
+
+        bar.call_count = 0
+        event_loop = asyncio.get_event_loop()
+        self.assertEqual(1, event_loop.run_until_complete(bar(1)))
+        self.assertEqual(1, event_loop.run_until_complete(bar(1)))
+        self.assertEqual(1, bar.call_count)
+        self.assertEqual({(1,): 1}, data)
+
     def test_cacher_creates_cache_only_once_per_function(self):
         cache = create_autospec(Cache)
         cache.get = MagicMock()
@@ -495,6 +534,310 @@ class TestCacher(TestCase):
             self.assertIsInstance(logs.records[1].exc_info[1], CachingError)
             self.assertEqual(('set',), logs.records[1].exc_info[1].args)
 
+    def test_caching_decorator_single_flight(self):
+        started = Event()
+        release = Event()
+
+        @self.cacher.cached(single_flight=True)
+        def bar(x):
+            bar.call_count += 1
+            started.set()
+            release.wait()
+            return x
+
+        bar.call_count = 0
+        results = []
+        threads = [Thread(target=lambda: results.append(bar(1))) for _ in range(4)]
+        threads[0].start()
+        started.wait()
+        for t in threads[1:]:
+            t.start()
+        sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual([1] * 4, results)
+        self.assertEqual(1, bar.call_count)
+        self.assertEqual(1, bar(1))
+        self.assertEqual(1, bar.call_count)
+
+    def test_caching_decorator_single_flight_async_function(self):
+        @self.cacher.cached(single_flight=True)
+        async def bar(x):
+            bar.call_count += 1
+            await asyncio.sleep(0.01)
+            return x
+
+        bar.call_count = 0
+
+        async def run():
+            return await asyncio.gather(*(bar(1) for _ in range(4)))
+
+        event_loop = asyncio.get_event_loop()
+        self.assertEqual([1] * 4, event_loop.run_until_complete(run()))
+        self.assertEqual(1, bar.call_count)
+        self.assertEqual(1, event_loop.run_until_complete(bar(1)))
+        self.assertEqual(1, bar.call_count)
+
+    def test_stale_value_returned_and_refreshed(self):
+        cacher = Cacher(lambda _: MemoryCache())
+
+        @cacher.cached(expiration=50, stale_ttl=1000)
+        def bar(x):
+            bar.call_count += 1
+            return bar.call_count
+
+        bar.call_count = 0
+        self.assertEqual(1, bar(1))
+        self.assertEqual(1, bar(1))
+        sleep(0.06)
+        self.assertEqual(1, bar(1))
+        cacher._refresher._executor.shutdown(wait=True)
+        self.assertEqual(2, bar.call_count)
+        self.assertEqual(2, bar(1))
+        self.assertEqual(2, cacher.get_cached_result(bar, 1))
+
+    def test_stale_value_refreshed_for_async_function(self):
+        cacher = Cacher(lambda _: MemoryCache())
+
+        @cacher.cached(expiration=50, stale_ttl=1000)
+        async def bar(x):
+            bar.call_count += 1
+            return bar.call_count
+
+        async def run():
+            first = await bar(1)
+            await asyncio.sleep(0.06)
+            stale = await bar(1)
+            await asyncio.sleep(0.01)
+            return first, stale, await bar(1)
+
+        bar.call_count = 0
+        self.assertEqual((1, 1, 2), asyncio.get_event_loop().run_until_complete(run()))
+
+    def test_negative_ttl(self):
+        cacher = Cacher(lambda _: MemoryCache())
+
+        @cacher.cached(validator=lambda x: x is not None, negative_ttl=50)
+        def bar(x):
+            bar.call_count += 1
+            return None
+
+        bar.call_count = 0
+        self.assertIsNone(bar(1))
+        self.assertIsNone(bar(1))
+        self.assertEqual(1, bar.call_count)
+        sleep(0.06)
+        self.assertIsNone(bar(1))
+        self.assertEqual(2, bar.call_count)
+
+    def test_cached_exceptions(self):
+        cacher = Cacher(lambda _: CacheSerializationDecorator(MemoryCache(), json.dumps, json.loads))
+
+        @cacher.cached(cache_exceptions=(KeyError,), exception_ttl=1000)
+        def bar(x):
+            bar.call_count += 1
+            if x:
+                raise KeyError(x)
+            raise ValueError(x)
+
+        bar.call_count = 0
+        for _ in range(2):
+            with self.assertRaises(KeyError) as cm:
+                bar(1)
+            self.assertEqual((1,), cm.exception.args)
+        self.assertEqual(1, bar.call_count)
+        self.assertRaises(ValueError, bar, 0)
+        self.assertRaises(ValueError, bar, 0)
+        self.assertEqual(3, bar.call_count)
+
+    def test_cached_exceptions_with_values_cached_before(self):
+        cache = CacheSerializationDecorator(MemoryCache(), json.dumps, json.loads)
+        cacher = Cacher(lambda _: cache)
+
+        def bar(x):
+            bar.call_count += 1
+            return 'ab'
+
+        bar.call_count = 0
+        self.assertEqual('ab', cacher.cached(bar)(1))
+        rewrapped = cacher.cached(cache_exceptions=(KeyError,), exception_ttl=1000)(bar)
+        self.assertEqual('ab', rewrapped(1))
+        self.assertEqual('ab', rewrapped(1))
+        self.assertEqual(2, bar.call_count)
+
+    def test_cached_exceptions_async_function(self):
+        cacher = Cacher(lambda _: MemoryCache())
+
+        @cacher.cached(cache_exceptions=(KeyError,), exception_ttl=1000)
+        async def bar(x):
+            bar.call_count += 1
+            raise KeyError(x)
+
+        bar.call_count = 0
+        event_loop = asyncio.get_event_loop()
+        self.assertRaises(KeyError, event_loop.run_until_complete, bar(1))
+        self.assertRaises(KeyError, event_loop.run_until_complete, bar(1))
+        self.assertEqual(1, bar.call_count)
+
+    def test_cached_batch_calls_only_missing_elements(self):
+        cacher = Cacher(lambda _: MemoryCache())
+
+        @cacher.cached_batch('ids')
+        def bar(prefix, ids):
+            bar.calls.append(list(ids))
+            return [f'{prefix}{i}' for i in ids]
+
+        bar.calls = []
+        self.assertEqual(['a1', 'a2'], bar('a', [1, 2]))
+        self.assertEqual(['a3', 'a2', 'a1', 'a3'], bar('a', [3, 2, 1, 3]))
+        self.assertEqual(['b1'], bar('b', ids=[1]))
+        self.assertEqual([[1, 2], [3], [1]], bar.calls)
+        self.assertEqual([], bar('a', []))
+        self.assertEqual(3, len(bar.calls))
+
+    def test_cached_batch_with_validator(self):
+        cacher = Cacher(lambda _: MemoryCache())
+
+        @cacher.cached_batch('ids', validator=lambda x: x is not None)
+        def bar(ids):
+            bar.calls.append(list(ids))
+            return [i if i % 2 else None for i in ids]
+
+        bar.calls = []
+        self.assertEqual([1, None], bar((1, 2)))
+        self.assertEqual([1, None], bar((1, 2)))
+        self.assertEqual([[1, 2], [2]], bar.calls)
+
+    def test_cached_batch_async_function(self):
+        cacher = Cacher(lambda _: MemoryCache())
+
+        @cacher.cached_batch('ids')
+        async def bar(ids):
+            bar.calls.append(list(ids))
+            return [i * 2 for i in ids]
+
+        bar.calls = []
+        event_loop = asyncio.get_event_loop()
+        self.assertEqual([2, 4], event_loop.run_until_complete(bar([1, 2])))
+        self.assertEqual([6, 2], event_loop.run_until_complete(bar([3, 1])))
+        self.assertEqual([[1, 2], [3]], bar.calls)
+
+    def test_cached_batch_numpy_array(self):
+        if numpy is None:
+            self.skipTest('numpy is not installed')
+        cacher = Cacher(lambda _: MemoryCache())
+
+        @cacher.cached_batch('ids')
+        def bar(ids):
+            bar.calls.append(ids.tolist())
+            return ids * 2
+
+        bar.calls = []
+        numpy.testing.assert_array_equal([2, 4], bar(numpy.array([1, 2])))
+        result = bar(numpy.array([2, 3]))
+        self.assertIsInstance(result, numpy.ndarray)
+        numpy.testing.assert_array_equal([4, 6], result)
+        self.assertEqual([[1, 2], [3]], bar.calls)
+
+    def test_cached_batch_errors_on_not_cached_batch_arg(self):
+        def bar(ids: NotCached):
+            pass
+
+        self.assertRaises(CachingError, self.cacher.cached_batch('ids'), bar)
+
+    def test_stats(self):
+        cacher = Cacher(lambda _: MemoryCache(), collect_stats=True)
+
+        @cacher.cached(validator=lambda x: x > 0)
+        def bar(x):
+            return x
+
+        for x in (1, 1, 1, -1, -1):
+            bar(x)
+        stats = cacher.stats()[f'{bar.__module__}.{bar.__qualname__}']
+        self.assertEqual(2, stats.hits)
+        self.assertEqual(3, stats.misses)
+        self.assertEqual(2, stats.rejections)
+        self.assertEqual(0, stats.errors)
+        self.assertAlmostEqual(0.4, stats.hit_ratio)
+        self.assertGreater(stats.compute_time, 0)
+        self.assertGreater(stats.get_time, 0)
+        self.assertGreater(stats.set_time, 0)
+
+    def test_stats_reset(self):
+        cacher = Cacher(lambda _: MemoryCache(), collect_stats=True)
+
+        @cacher.cached
+        def bar(x):
+            return x
+
+        bar(1)
+        self.assertEqual(1, list(cacher.stats(reset=True).values())[0].misses)
+        self.assertEqual(0, list(cacher.stats().values())[0].misses)
+
+    def test_stats_counts_errors(self):
+        class ErroneousCache(Cache):
+            def get(self, key):
+                raise CachingError('get')
+
+            def set(self, key, value, expiration: int) -> None:
+                raise CachingError('set')
+
+        cacher = Cacher(lambda _: ErroneousCache(), collect_stats=True)
+
+        @cacher.cached
+        def bar(x):
+            return x
+
+        with self.assertLogs(logging.getLogger('thornfield.cacher'), logging.ERROR):
+            bar(1)
+        self.assertEqual(2, list(cacher.stats().values())[0].errors)
+
+    def test_stats_async_cache_and_batch(self):
+        cacher = Cacher(None, collect_stats=True)
+
+        class AsyncMemoryCache(MemoryCache, AsyncCache):
+            async def aget(self, key):
+                return self.get(key)
+
+            async def aset(self, key, value, expiration: int) -> None:
+                self.set(key, value, expiration)
+
+        @cacher.cached_batch('ids', cache=AsyncMemoryCache())
+        async def bar(ids):
+            return ids
+
+        asyncio.run(bar([1, 2]))
+        asyncio.run(bar([2, 3]))
+        stats = list(cacher.stats().values())[0]
+        self.assertEqual(1, stats.hits)
+        self.assertEqual(3, stats.misses)
+
+    def test_stats_disabled(self):
+        @self.cacher.cached
+        def bar(x):
+            return x
+
+        bar(1)
+        self.assertEqual({}, self.cacher.stats())
+
+    def test_stats_exporter(self):
+        exported = Event()
+        cacher = Cacher(
+            lambda _: MemoryCache(),
+            stats_exporter=lambda stats: exported.set(),
+            stats_export_interval=0.01,
+        )
+
+        @cacher.cached
+        def bar(x):
+            return x
+
+        bar(1)
+        self.assertTrue(exported.wait(1))
+        cacher._stats.stop()
+
     @classmethod
     def _create_cacher(cls, cache: dict):
         get_func = lambda x: cache.get(x, NOT_FOUND)
@@ -0,0 +1,161 @@
+import random
+from unittest import TestCase
+
+from thornfield.caches.eviction import LruPolicy, LfuPolicy, TinyLfuPolicy, FrequencySketch, create_policy
+from thornfield.caches.memory_cache import MemoryCache
+from thornfield.constants import NOT_FOUND
+
+
+class TestLruPolicy(TestCase):
+    def test_evicts_least_recently_used(self):
+        policy = LruPolicy()
+        for key in 'abc':
+            policy.add(key)
+        policy.access('a')
+        self.assertEqual('b', policy.evict())
+        self.assertEqual('c', policy.evict())
+        self.assertEqual('a', policy.evict())
+
+    def test_remove(self):
+        policy = LruPolicy()
+        policy.add('a')
+        policy.add('b')
+        policy.remove('a')
+        self.assertEqual('b', policy.evict())
+
+
+class TestLfuPolicy(TestCase):
+    def test_evicts_least_frequently_used(self):
+        policy = LfuPolicy()
+        for key in 'abc':
+            policy.add(key)
+        policy.access('a')
+        policy.access('a')
+        policy.access('c')
+        self.assertEqual('b', policy.evict())
+        self.assertEqual('c', policy.evict())
+        self.assertEqual('a', policy.evict())
+
+    def test_remove_least_frequent(self):
+        policy = LfuPolicy()
+        policy.add('a')
+        policy.add('b')
+        policy.access('b')
+        policy.remove('a')
+        self.assertEqual('b', policy.evict())
+
+
+class TestFrequencySketch(TestCase):
+    def test_counts(self):
+        sketch = FrequencySketch(64)
+        for _ in range(5):
+            sketch.increment('a')
+        sketch.increment('b')
+        self.assertEqual(5, sketch.frequency('a'))
+        self.assertEqual(1, sketch.frequency('b'))
+        self.assertEqual(0, sketch.frequency('c'))
+
+    def test_counts_saturate_and_age(self):
+        sketch = FrequencySketch(64)
+        for _ in range(20):
+            sketch.increment('a')
+        self.assertEqual(15, sketch.frequency('a'))
+        for i in range(10 * sketch.width):
+            sketch.increment(('other', i))
+        self.assertLess(sketch.frequency('a'), 15)
+
+
+class TestTinyLfuPolicy(TestCase):
+    def test_rejects_new_key_less_frequent_than_victim(self):
+        policy = TinyLfuPolicy(16)
+        for key in range(10):
+            policy.add(key)
+            policy.access(key)
+        # The window keeps a single key, so 10 leaves it when 11 is added.
+        # Integers hash the same in every run, unlike strings, so counters don't collide by chance.
+        policy.add(10)
+        policy.add(11)
+        self.assertEqual(10, policy.evict())
+
+    def test_admits_new_key_more_frequent_than_victim(self):
+        policy = TinyLfuPolicy(16)
+        for key in range(10):
+            policy.add(key)
+        # 10 leaves the window when 11 is added, and is admitted since it was missed more often than 0
+        for _ in range(3):
+            policy.miss(10)
+        policy.add(10)
+        policy.add(11)
+        self.assertEqual(0, policy.evict())
+
+    def test_evicts_all_keys(self):
+        policy = TinyLfuPolicy(16)
+        for key in range(100):
+            policy.add(key)
+            if key % 3 == 0:
+                policy.access(key)
+        self.assertEqual(set(range(100)), {policy.evict() for _ in range(100)})
+
+    def test_unknown_policy(self):
+        self.assertRaises(ValueError, create_policy, 'nope', None)
+
+
+class TestBoundedMemoryCache(TestCase):
+    def test_max_entries(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set('a', 1, 0)
+        cache.set('b', 2, 0)
+        cache.get('a')
+        cache.set('c', 3, 0)
+        self.assertEqual([1, NOT_FOUND, 3], cache.get_many(['a', 'b', 'c']))
+        self.assertEqual(1, cache.evictions)
+        self.assertEqual(2, cache.size)
+
+    def test_max_bytes(self):
+        cache = MemoryCache(max_bytes=100, size_estimator=lambda k, v: len(v))
+        cache.set_many([('a', 'x' * 40), ('b', 'x' * 40)], 0)
+        cache.set('c', 'x' * 40, 0)
+        self.assertEqual(NOT_FOUND, cache.get('a'))
+        self.assertEqual(80, cache.total_bytes)
+        cache.set('b', 'x' * 10, 0)
+        self.assertEqual(50, cache.total_bytes)
+
+    def test_value_larger_than_max_bytes_not_cached(self):
+        cache = MemoryCache(max_bytes=100, size_estimator=lambda k, v: len(v))
+        cache.set('a', 'x' * 10, 0)
+        cache.set('b', 'x' * 200, 0)
+        self.assertEqual(['x' * 10, NOT_FOUND], cache.get_many(['a', 'b']))
+        self.assertEqual(1, cache.evictions)
+
+    def test_expired_entry_removed(self):
+        cache = MemoryCache(max_entries=10, max_bytes=1000)
+        cache.set('a', 1, -1)
+        self.assertEqual(NOT_FOUND, cache.get('a'))
+        self.assertEqual(0, cache.size)
+        self.assertEqual(0, cache.total_bytes)
+
+    def test_policies(self):
+        for policy in ('lru', 'lfu', 'tinylfu'):
+            cache = MemoryCache(max_entries=10, policy=policy)
+            for i in range(100):
+                cache.set(i, i, 0)
+                cache.get(i)
+            self.assertEqual(10, cache.size)
+            self.assertEqual(90, cache.evictions)
+
+    def test_tinylfu_resists_scans(self):
+        ratios = {}
+        for policy in ('lru', 'tinylfu'):
+            rnd = random.Random(0)
+            cache = MemoryCache(max_entries=100, policy=policy)
+            hits = 0
+            for i in range(20000):
+                # A hot set that fits in the cache, mixed with a scan of keys read once
+                key = rnd.randrange(80) if i % 2 else ('scan', i)
+                if cache.get(key) is NOT_FOUND:
+                    cache.set(key, i, 0)
+                elif i % 2:
+                    hits += 1
+            ratios[policy] = hits / 10000
+        self.assertGreater(ratios['tinylfu'], 0.9)
+        self.assertGreater(ratios['tinylfu'], ratios['lru'] + 0.2)
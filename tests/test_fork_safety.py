@@ -0,0 +1,131 @@
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from threading import Event, Thread
+from unittest import TestCase, skipUnless
+from unittest.mock import MagicMock, NonCallableMagicMock
+
+from thornfield import Cacher
+from thornfield.caches.memory_cache import MemoryCache
+from thornfield.caches.tiered_cache import TieredCache
+from thornfield.errors import CachingError
+from thornfield.postgresql_key_value_adapter import ConnectionPoolWrapper
+from thornfield.refresher import Refresher
+from thornfield.single_flight import SingleFlight
+
+cacher = Cacher(lambda _: MemoryCache())
+
+
+@cacher.cached
+def square(x):
+    return x * x
+
+
+@cacher.cached
+async def async_square(x):
+    return x * x
+
+
+@cacher.cached_batch('xs')
+def squares(xs):
+    return [x * x for x in xs]
+
+
+class Calculator:
+    @cacher.cached
+    def double(self, x):
+        return 2 * x
+
+
+def _pid_and_refresh(_):
+    refreshed = Event()
+    refresher.refresh('k', refreshed.set)
+    return os.getpid(), refreshed.wait(5)
+
+
+def _call_in_flight():
+    return flight.do('k', lambda: 1)
+
+
+refresher = Refresher(1)
+flight = SingleFlight()
+
+
+class TestPickling(TestCase):
+    def test_cached_functions_pickled_by_reference(self):
+        for func in (square, async_square, squares, Calculator.double):
+            self.assertIs(func, pickle.loads(pickle.dumps(func)))
+
+    def test_process_pool(self):
+        with ProcessPoolExecutor(2) as executor:
+            self.assertEqual([0, 1, 4, 9], list(executor.map(square, range(4))))
+            self.assertEqual([[0, 1, 4]], list(executor.map(squares, [[0, 1, 2]])))
+
+
+class TestForkSafety(TestCase):
+    @skipUnless(hasattr(os, 'fork'), 'fork is not available')
+    def test_refresher_works_in_forked_child(self):
+        # Starting the executor's thread in the parent
+        done = Event()
+        refresher.refresh('parent', done.set)
+        done.wait(5)
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('fork')) as executor:
+            pid, refreshed = executor.submit(_pid_and_refresh, 0).result(10)
+        self.assertNotEqual(os.getpid(), pid)
+        self.assertTrue(refreshed)
+
+    @skipUnless(hasattr(os, 'fork'), 'fork is not available')
+    def test_single_flight_forgets_calls_of_parent(self):
+        started = Event()
+        release = Event()
+        thread = Thread(target=flight.do, args=('k', lambda: started.set() or release.wait()))
+        thread.start()
+        started.wait()
+        try:
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('fork')) as executor:
+                self.assertEqual(1, executor.submit(_call_in_flight).result(10))
+        finally:
+            release.set()
+            thread.join()
+
+    def test_pool_created_by_function_created_again(self):
+        create_pool = MagicMock(side_effect=lambda: NonCallableMagicMock())
+        wrapper = ConnectionPoolWrapper(create_pool)
+        first = wrapper._pool
+        wrapper._after_fork()
+        self.assertIsNot(first, wrapper._pool)
+        self.assertEqual(2, create_pool.call_count)
+        self.assertIs(first, wrapper._inherited_pool)
+        second = wrapper._pool
+        wrapper._after_fork()
+        self.assertIs(second, wrapper._inherited_pool)
+
+    def test_psycopg2_pool_created_again_with_same_arguments(self):
+        class Pool:
+            def __init__(self, minconn, maxconn, *args, **kwargs):
+                self.minconn = minconn
+                self.maxconn = maxconn
+                self._args = args
+                self._kwargs = kwargs
+
+        pool = Pool(1, 5, 'dsn', sslmode='require')
+        wrapper = ConnectionPoolWrapper(pool)
+        wrapper._after_fork()
+        new_pool = wrapper._pool
+        self.assertIsNot(pool, new_pool)
+        self.assertEqual((1, 5, ('dsn',), {'sslmode': 'require'}), (new_pool.minconn, new_pool.maxconn, new_pool._args, new_pool._kwargs))
+
+    def test_unknown_pool_not_used_after_fork(self):
+        wrapper = ConnectionPoolWrapper(NonCallableMagicMock(spec=['getconn', 'putconn']))
+        wrapper._after_fork()
+        self.assertRaises(CachingError, wrapper.getconn)
+
+    def test_tiered_cache_reset(self):
+        cache = TieredCache(MemoryCache())
+        cache.set('a', 1, 0)
+        node_id = cache._node_id
+        cache._after_fork()
+        self.assertNotEqual(node_id, cache._node_id)
+        self.assertEqual({}, dict(cache._local))
+        self.assertEqual(1, cache.get('a'))
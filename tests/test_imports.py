@@ -0,0 +1,22 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+
+class TestImports(TestCase):
+    def test_backends_imported_lazily(self):
+        code = (
+            'import sys, thornfield, thornfield.caches, thornfield.cache_factories\n'
+            'from thornfield.caches import MemoryCache\n'
+            'print(sorted(m for m in ("redis", "psycopg2", "psycopg_pool", "asyncio") if m in sys.modules))'
+        )
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual('[]', output.strip())
+
+    def test_lazy_attributes(self):
+        from thornfield import caches
+
+        self.assertIn('RedisCache', dir(caches))
+        self.assertIsNotNone(caches.TieredCache)
+        with self.assertRaises(AttributeError):
+            caches.Nope
@@ -0,0 +1,99 @@
+from queue import Queue
+from threading import Event
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from thornfield.caches.invalidators import Invalidator, PostgresqlInvalidator, RedisInvalidator
+
+
+class FlakyInvalidator(Invalidator):
+    def __init__(self, failed_connections=(), lost_connections=()) -> None:
+        super().__init__()
+        # The numbers of the connections that can't be opened, and of those lost right away
+        self.failed_connections = set(failed_connections)
+        self.lost_connections = set(lost_connections)
+        self.connections = 0
+        self.messages = Queue()
+
+    def publish(self, message: str) -> None:
+        self.messages.put(message)
+
+    def _connect_listener(self):
+        self.connections += 1
+        if self.connections in self.failed_connections:
+            raise ConnectionError()
+        return self.connections
+
+    def _receive(self, listener) -> None:
+        if listener in self.lost_connections:
+            raise ConnectionError()
+        while True:
+            self._dispatch(self.messages.get())
+
+
+@patch('thornfield.caches.invalidators._MIN_RECONNECT_DELAY', 0.001)
+class TestInvalidator(TestCase):
+    def test_reconnects_after_connection_lost(self):
+        invalidator = FlakyInvalidator(failed_connections={2, 3}, lost_connections={1})
+        reconnected = Event()
+        received = Queue()
+        invalidator.subscribe(received.put, reconnected.set)
+
+        self.assertTrue(reconnected.wait(5))
+        self.assertEqual(4, invalidator.connections)
+        invalidator.publish('a')
+        self.assertEqual('a', received.get(timeout=5))
+
+    def test_redis_listener_reconnects(self):
+        with patch('thornfield.caches.invalidators.Redis') as redis:
+            broken = MagicMock()
+            broken.listen.side_effect = ConnectionError()
+            working = MagicMock()
+            working.listen.return_value = self._messages_until_closed(working, {'type': 'message', 'data': 'a'})
+            redis.return_value.pubsub.side_effect = [broken, working]
+            invalidator = RedisInvalidator()
+        reconnected = Event()
+        received = Queue()
+        invalidator.subscribe(received.put, reconnected.set)
+
+        self.assertTrue(reconnected.wait(5))
+        self.assertEqual('a', received.get(timeout=5))
+        broken.close.assert_called_once()
+        working.subscribe.assert_called_once_with('thornfield:invalidate')
+
+    def test_postgresql_listener_closed_when_listen_fails(self):
+        connection = MagicMock()
+        connection.cursor.return_value.__enter__.return_value.execute.side_effect = ConnectionError()
+        connected = Event()
+        connections = iter([connection, connection])
+
+        def connect():
+            connection = next(connections, None)
+            if connection is None:
+                connected.set()
+                Event().wait()
+            return connection
+
+        invalidator = PostgresqlInvalidator(MagicMock(), connect)
+        invalidator.subscribe(print)
+
+        self.assertTrue(connected.wait(5))
+        self.assertEqual(2, connection.close.call_count)
+
+    def test_first_connection_retried_in_background(self):
+        invalidator = FlakyInvalidator(failed_connections={1})
+        reconnected = Event()
+        received = Queue()
+        invalidator.subscribe(received.put, reconnected.set)
+
+        self.assertTrue(reconnected.wait(5))
+        self.assertEqual(2, invalidator.connections)
+        invalidator.publish('a')
+        self.assertEqual('a', received.get(timeout=5))
+
+    @staticmethod
+    def _messages_until_closed(pubsub, *messages):
+        yield from messages
+        closed = Event()
+        pubsub.close.side_effect = closed.set
+        closed.wait()
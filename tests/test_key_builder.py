@@ -0,0 +1,77 @@
+from inspect import getfullargspec
+from unittest import TestCase
+
+from thornfield.key_builder import create_key_builder, get_arg_spec
+from thornfield.typing import Cached, NotCached
+
+
+class TestKeyBuilder(TestCase):
+    def test_all_args(self):
+        def foo(x, y):
+            pass
+
+        make_key = create_key_builder(foo)
+        self.assertEqual((1, 2), make_key((1, 2), {}))
+        self.assertEqual((1, 2), make_key((1,), {'y': 2}))
+        self.assertEqual((1, 2), make_key((), {'y': 2, 'x': 1}))
+
+    def test_defaults(self):
+        def foo(x, y=5):
+            pass
+
+        make_key = create_key_builder(foo)
+        self.assertEqual((1, 5), make_key((1,), {}))
+        self.assertEqual((1, 2), make_key((1, 2), {}))
+
+    def test_self_omitted(self):
+        class Foo:
+            def bar(self, x):
+                pass
+
+        make_key = create_key_builder(Foo.bar)
+        self.assertEqual((1,), make_key((Foo(), 1), {}))
+        self.assertEqual((1,), make_key((Foo(),), {'x': 1}))
+
+    def test_cached_annotation(self):
+        def foo(x, y: Cached, z: Cached[int]):
+            pass
+
+        make_key = create_key_builder(foo)
+        self.assertEqual((2, 3), make_key((1, 2, 3), {}))
+        self.assertEqual((2, 3), make_key((1,), {'z': 3, 'y': 2}))
+
+    def test_single_not_cached_annotation(self):
+        def foo(x, y: NotCached):
+            pass
+
+        make_key = create_key_builder(foo)
+        self.assertEqual((1,), make_key((1, 2), {}))
+        self.assertEqual((1,), make_key((1,), {'y': 2}))
+
+    def test_no_key_args(self):
+        def foo(x: NotCached):
+            pass
+
+        make_key = create_key_builder(foo)
+        self.assertEqual((), make_key((1,), {}))
+
+    def test_var_args_ignored(self):
+        def foo(x, *args, **kwargs):
+            pass
+
+        make_key = create_key_builder(foo)
+        self.assertEqual((1,), make_key((1, 2, 3), {'y': 4}))
+
+    def test_arg_spec_matches_getfullargspec(self):
+        def foo(x: Cached, y=1, *args, z=2, **kwargs) -> int:
+            pass
+
+        spec = getfullargspec(foo)
+        self.assertEqual((spec.args, spec.defaults, spec.annotations), tuple(get_arg_spec(foo)))
+
+    def test_arg_spec_of_callable_object(self):
+        class Foo:
+            def __call__(self, x, y=1):
+                pass
+
+        self.assertEqual((['self', 'x', 'y'], (1,), {}), tuple(get_arg_spec(Foo())))
@@ -1,8 +1,13 @@
+import os
+from tempfile import TemporaryDirectory
+from threading import Lock
 from time import sleep
 from unittest import TestCase
 
 from thornfield.cacher import Cacher
+from thornfield.caches.expiry import ExpiryWheel
 from thornfield.caches.memory_cache import MemoryCache
+from thornfield.constants import NOT_FOUND
 
 
 class TestMemoryCache(TestCase):
@@ -51,6 +56,242 @@ class TestMemoryCache(TestCase):
         self.assertEqual(None, foo(5))
         self.assertEqual(1, foo.call_count)
 
+    def test_get_many_and_set_many(self):
+        cache = MemoryCache()
+        cache.set_many([(1, 'a'), (2, 'b')], 0)
+        cache.set_many([(3, 'c')], 100)
+        self.assertEqual(['a', NOT_FOUND, 'c', 'b'], cache.get_many([1, 4, 3, 2]))
+        sleep(0.11)
+        self.assertEqual(['a', NOT_FOUND], cache.get_many([1, 3]))
+
     @staticmethod
     def _create_cache(_):
         return MemoryCache()
+
+
+class TestExpiry(TestCase):
+    def test_writes_reclaim_expired_entries(self):
+        cache = MemoryCache(expiry_resolution=10)
+        cache.set_many([(i, i) for i in range(10)], 20)
+        cache.set('a', 'a', 0)
+        self.assertEqual(11, cache.size)
+        sleep(0.05)
+        cache.set('b', 'b', 0)
+        self.assertEqual(2, cache.size)
+        self.assertEqual(10, cache.expirations)
+        self.assertEqual(['a', 'b'], cache.get_many(['a', 'b']))
+
+    def test_reclamation_is_incremental(self):
+        cache = MemoryCache(expiry_resolution=10)
+        cache.set_many([(i, i) for i in range(100)], 20)
+        sleep(0.05)
+        cache.set('a', 'a', 0)
+        self.assertLess(1, cache.size)
+        self.assertLess(100 - cache.size, 50)
+        cache.expire()
+        self.assertEqual(1, cache.size)
+        self.assertEqual(100, cache.expirations)
+
+    def test_overwritten_entries_are_not_reclaimed(self):
+        cache = MemoryCache(expiry_resolution=10)
+        cache.set(1, 'a', 20)
+        cache.set(2, 'b', 20)
+        cache.set(1, 'c', 0)
+        cache.set(2, 'd', 1000)
+        sleep(0.05)
+        cache.expire()
+        self.assertEqual(['c', 'd'], cache.get_many([1, 2]))
+        self.assertEqual(0, cache.expirations)
+
+    def test_bounded_cache_reclaims_before_evicting(self):
+        cache = MemoryCache(max_entries=3, max_bytes=10000, expiry_resolution=10)
+        cache.set(1, 'a', 20)
+        cache.set(2, 'b', 0)
+        cache.set(3, 'c', 0)
+        sleep(0.05)
+        cache.set(4, 'd', 0)
+        self.assertEqual(0, cache.evictions)
+        self.assertEqual(1, cache.expirations)
+        self.assertEqual(['b', 'c', 'd'], cache.get_many([2, 3, 4]))
+        self.assertEqual(cache.total_bytes, sum(cache._sizes.values()))
+
+    def test_time_to_idle(self):
+        for max_entries in (None, 10):
+            cache = MemoryCache(
+                max_entries=max_entries, time_to_idle=100, expiry_resolution=10
+            )
+            cache.set('read', 1, 0)
+            cache.set('idle', 2, 0)
+            for _ in range(5):
+                sleep(0.04)
+                self.assertEqual(1, cache.get('read'))
+            cache.expire()
+            self.assertEqual(NOT_FOUND, cache.get('idle'))
+            self.assertEqual(1, cache.size)
+            sleep(0.15)
+            self.assertEqual(NOT_FOUND, cache.get('read'))
+
+    def test_time_to_idle_does_not_extend_expiration(self):
+        cache = MemoryCache(time_to_idle=100, expiry_resolution=10)
+        cache.set('a', 1, 150)
+        for _ in range(3):
+            sleep(0.04)
+            self.assertEqual(1, cache.get('a'))
+        sleep(0.1)
+        self.assertEqual(NOT_FOUND, cache.get('a'))
+        cache.expire()
+        self.assertEqual(0, cache.size)
+
+    def test_expiration_shorter_than_time_to_idle(self):
+        for max_entries in (None, 10):
+            cache = MemoryCache(max_entries=max_entries, time_to_idle=60000, expiry_resolution=10)
+            cache.set('a', 1, 100)
+            for _ in range(2):
+                sleep(0.04)
+                self.assertEqual(1, cache.get('a'))
+            sleep(0.05)
+            self.assertEqual(NOT_FOUND, cache.get('a'))
+
+    def test_invalid_time_to_idle(self):
+        with self.assertRaises(ValueError):
+            MemoryCache(time_to_idle=0)
+
+
+class TestSnapshot(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache.snapshot')
+
+    def test_restore(self):
+        for lazy in (False, True):
+            cache = MemoryCache()
+            cache.set('a', [1, 2], 0)
+            cache.set(('b', 1), 'b', 200)
+            cache.set('c', 'c', 20)
+            sleep(0.05)
+            self.assertEqual(2, cache.snapshot(self.path))
+
+            restored = MemoryCache()
+            restored.set('a', 'newer', 0)
+            self.assertEqual(1, restored.restore(self.path, lazy=lazy))
+            self.assertEqual(['newer', 'b', NOT_FOUND], restored.get_many(['a', ('b', 1), 'c']))
+            self.assertEqual('b', restored.get(('b', 1)))
+
+    def test_remaining_time_to_live(self):
+        for lazy in (False, True):
+            cache = MemoryCache()
+            cache.set('a', 1, 100)
+            cache.snapshot(self.path)
+            sleep(0.05)
+            restored = MemoryCache()
+            restored.restore(self.path, lazy=lazy)
+            self.assertEqual(1, restored.get('a'))
+            sleep(0.07)
+            self.assertEqual(NOT_FOUND, restored.get('a'))
+            sleep(0.1)
+            self.assertEqual(0, MemoryCache().restore(self.path, lazy=lazy))
+
+    def test_bounded(self):
+        cache = MemoryCache()
+        cache.set_many([(i, str(i)) for i in range(10)], 0)
+        cache.snapshot(self.path)
+        for lazy in (False, True):
+            restored = MemoryCache(max_entries=5)
+            restored.restore(self.path, lazy=lazy)
+            self.assertEqual(5, restored.size)
+            values = [v for v in restored.get_many(list(range(10))) if v is not NOT_FOUND]
+            self.assertEqual(5, len(values))
+            self.assertTrue(all(isinstance(v, str) for v in values))
+
+    def test_snapshot_of_restored_cache(self):
+        cache = MemoryCache()
+        cache.set('a', 1, 1000)
+        cache.set('b', 2, 0)
+        cache.snapshot(self.path)
+        restored = MemoryCache()
+        restored.restore(self.path, lazy=True)
+        self.assertEqual(2, restored.snapshot(self.path))
+        again = MemoryCache()
+        again.restore(self.path)
+        self.assertEqual([1, 2], again.get_many(['a', 'b']))
+
+    def test_time_to_idle(self):
+        cache = MemoryCache(time_to_idle=50, expiry_resolution=10)
+        cache.set('a', 1, 0)
+        cache.set('b', 2, 1000)
+        cache.set('c', 3, 30)
+        cache.snapshot(self.path)
+        restored = MemoryCache()
+        restored.restore(self.path)
+        sleep(0.07)
+        self.assertEqual([1, 2, NOT_FOUND], restored.get_many(['a', 'b', 'c']))
+
+    def test_unpicklable_values_are_skipped(self):
+        cache = MemoryCache()
+        cache.set('a', Lock(), 0)
+        cache.set('b', 1, 0)
+        with self.assertLogs('thornfield.memory_cache'):
+            self.assertEqual(1, cache.snapshot(self.path))
+
+    def test_not_a_snapshot(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'nope')
+        with self.assertRaises(ValueError):
+            MemoryCache().restore(self.path)
+
+
+class TestExpiryWheel(TestCase):
+    def test_take_due(self):
+        wheel = ExpiryWheel(10)
+        wheel.schedule('a', 105)
+        wheel.schedule('b', 119)
+        wheel.schedule('c', 120)
+        self.assertEqual([], wheel.take_due(109, 10))
+        self.assertEqual(['a'], wheel.take_due(110, 10))
+        self.assertEqual(['b'], wheel.take_due(125, 10))
+        self.assertEqual(['c'], wheel.take_due(130, 10))
+        self.assertEqual(0, len(wheel))
+
+    def test_limit(self):
+        wheel = ExpiryWheel(10)
+        for i in range(5):
+            wheel.schedule(i, 100)
+        wheel.schedule(5, 200)
+        self.assertEqual(3, len(wheel.take_due(1000, 3)))
+        self.assertEqual(3, len(wheel.take_due(1000, 3)))
+        self.assertEqual(0, len(wheel))
+
+    def test_empty_buckets_count_towards_limit(self):
+        wheel = ExpiryWheel(10)
+        for i in range(0, 100, 20):
+            wheel.schedule(i, i)
+        for i in range(1000, 1200, 10):
+            wheel.schedule(i, i)
+        self.assertEqual([0, 20], wheel.take_due(100, 4))
+        self.assertEqual([40, 60], wheel.take_due(100, 4))
+
+    def test_catching_up_after_idle_gap(self):
+        wheel = ExpiryWheel(10)
+        for i in range(0, 100000, 100):
+            wheel.schedule(i, i)
+        self.assertEqual([0, 100, 200], wheel.take_due(10 ** 9, 3))
+        self.assertEqual([300, 400, 500], wheel.take_due(10 ** 9, 3))
+        self.assertEqual(994, len(wheel._ticks))
+
+    def test_not_scheduled_twice_in_same_bucket(self):
+        wheel = ExpiryWheel(10)
+        wheel.schedule('a', 101)
+        wheel.schedule('a', 105, scheduled=101)
+        self.assertEqual(1, len(wheel))
+        wheel.schedule('a', 115, scheduled=105)
+        self.assertEqual(2, len(wheel))
+
+    def test_schedule_before_cursor(self):
+        wheel = ExpiryWheel(10)
+        wheel.schedule('a', 500)
+        self.assertEqual([], wheel.take_due(100, 10))
+        wheel.schedule('b', 50)
+        self.assertEqual(['b'], wheel.take_due(100, 10))
+        self.assertEqual(['a'], wheel.take_due(600, 10))
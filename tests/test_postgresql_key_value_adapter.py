@@ -0,0 +1,175 @@
+from unittest import TestCase
+from unittest.mock import AsyncMock, MagicMock, NonCallableMagicMock, call
+
+from tests.utils import run_async
+from thornfield.postgresql_key_value_adapter import (
+    AsyncPostgresqlKeyValueAdapter,
+    PostgresqlKeyValueAdapter,
+)
+
+
+class TestPostgresqlKeyValueAdapter(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.cursor = MagicMock()
+        self.cursor.__enter__.return_value = self.cursor
+        self.cursor.fetchone = MagicMock(return_value=(True,))
+        self.cursor.rowcount = 1
+        self.connection = MagicMock()
+        self.connection.cursor = MagicMock(return_value=self.cursor)
+        self.pool = NonCallableMagicMock()
+        self.pool.getconn = MagicMock(return_value=self.connection)
+        self.adapter = PostgresqlKeyValueAdapter(self.pool, 'table')
+
+    def test_get_many_single_query(self):
+        self.cursor.fetchall = MagicMock(return_value=[('b', 2), ('a', 1)])
+        self.cursor.execute.reset_mock()
+
+        self.assertEqual([1, None, 2], self.adapter.get_many(['a', 'c', 'b'], 5))
+        prepare, execute = self._executed()
+        self.assertIn('key=any($1) and (ts>$2 or ts=0)', prepare[0])
+        self.assertEqual((['a', 'c', 'b'], 5), execute[1])
+
+    def test_set_many_single_upsert(self):
+        self.cursor.execute.reset_mock()
+
+        self.adapter.set_many([('a', 1), ('b', 2), ('a', 3)], 5)
+        prepare, execute = self._executed()
+        self.assertIn('select k, v, $1::bigint from unnest($2::text[], $3::text[])', prepare[0])
+        self.assertIn('on conflict (key) do update', prepare[0])
+        self.assertEqual((5, ['a', 'b'], [3, 2]), execute[1])
+
+    def test_set_single_upsert(self):
+        self.cursor.execute.reset_mock()
+
+        self.adapter.set('a', 'x', 5)
+        prepare, execute = self._executed()
+        self.assertIn('values ($1, $2, $3) on conflict (key) do update set value=excluded.value, ts=excluded.ts', prepare[0])
+        self.assertEqual(('a', 'x', 5), execute[1])
+
+    def test_statements_are_prepared_once_per_connection(self):
+        self.cursor.execute.reset_mock()
+
+        self.adapter.get('a', 5)
+        self.adapter.get('b', 6)
+        (prepare, _), first, second = self._executed()
+        self.assertTrue(prepare.startswith('prepare thornfield_'))
+        self.assertTrue(prepare.endswith('where key=$1 and (ts>$2 or ts=0)'))
+        self.assertEqual(first[0], second[0])
+        self.assertEqual(('b', 6), second[1])
+
+        other_connection = MagicMock()
+        other_connection.cursor = MagicMock(return_value=self.cursor)
+        self.pool.getconn = MagicMock(return_value=other_connection)
+        self.adapter.get('c', 7)
+        self.assertTrue(self._executed()[-2][0].startswith('prepare '))
+
+    def test_adapters_sharing_pool_share_prepared_statements(self):
+        other = PostgresqlKeyValueAdapter(self.pool, 'table')
+        self.adapter.get('a', 5)
+        self.cursor.execute.reset_mock()
+
+        other.get('a', 5)
+        (query, _), = self._executed()
+        self.assertTrue(query.startswith('execute thornfield_'))
+
+    def test_failure_rolls_back_and_prepares_again(self):
+        self.adapter.get('a', 5)
+        self.cursor.execute.reset_mock()
+        self.cursor.execute.side_effect = [RuntimeError(), None, None]
+
+        with self.assertRaises(RuntimeError):
+            self.adapter.get('a', 5)
+        self.connection.rollback.assert_called_once()
+        self.adapter.get('a', 5)
+        failed, (prepare, _), _ = self._executed()
+        self.assertTrue(prepare.startswith('prepare '))
+        self.assertNotEqual(failed[0].split()[1], prepare.split()[1])
+
+    def test_latest_keys(self):
+        self.cursor.fetchall = MagicMock(return_value=[('b',), ('a',)])
+        self.cursor.execute.reset_mock()
+
+        self.assertEqual(['b', 'a'], self.adapter.latest_keys(2, 5))
+        query, params = self.cursor.execute.call_args[0]
+        self.assertIn('where (ts>%s or ts=0) order by ts=0 desc, ts desc, id desc limit %s', query)
+        self.assertEqual((5, 2), params)
+
+    def test_get_or_allocate(self):
+        adapter = PostgresqlKeyValueAdapter(self.pool, 'index', ts_col=None)
+        self.cursor.fetchone = MagicMock(side_effect=[None, (True,), ('3',)])
+        self.cursor.execute.reset_mock()
+
+        self.assertEqual('3', adapter.get_or_allocate('f'))
+        queries = [q for q, _ in self._executed()]
+        self.assertEqual(5, len(queries))
+        self.assertIn("values (%s, nextval('index_seq')::text) on conflict (key) do nothing", queries[3])
+
+    def test_get_or_allocate_existing(self):
+        adapter = PostgresqlKeyValueAdapter(self.pool, 'index', ts_col=None)
+        self.cursor.fetchone = MagicMock(return_value=('3',))
+        self.cursor.execute.reset_mock()
+
+        self.assertEqual('3', adapter.get_or_allocate('f'))
+        self.assertEqual(2, self.cursor.execute.call_count)
+
+    def test_sequence_starts_after_existing_numbers(self):
+        adapter = PostgresqlKeyValueAdapter(self.pool, 'index', ts_col=None)
+        self.cursor.fetchone = MagicMock(side_effect=[None, (False,), ('',), (5,), ('5',)])
+        self.cursor.execute.reset_mock()
+
+        self.assertEqual('5', adapter.get_or_allocate('f'))
+        queries = [q for q, _ in self._executed()]
+        self.assertIn('pg_advisory_xact_lock', queries[3])
+        self.assertEqual('create sequence if not exists index_seq start with 5', queries[5])
+
+    def test_binary_values(self):
+        self.cursor.fetchone = MagicMock(side_effect=[(False,), (False,), (memoryview(b'a'),)])
+        adapter = PostgresqlKeyValueAdapter(self.pool, 'table')
+        adapter.set_many([('k', b'a')], 5)
+        queries = [q for q, _ in self._executed()]
+        self.assertIn('value bytea', queries[-3])
+        self.assertIn('$3::bytea[]', queries[-2])
+        self.assertEqual(b'a', adapter.get('k', 5))
+
+    def _executed(self):
+        return [c[0] for c in self.cursor.execute.call_args_list]
+
+
+class TestAsyncPostgresqlKeyValueAdapter(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        cursor = MagicMock()
+        cursor.fetchone = MagicMock(return_value=(True,))
+        cursor.rowcount = 1
+        cursor.__enter__.return_value = cursor
+        connection = MagicMock()
+        connection.cursor = MagicMock(return_value=cursor)
+        pool = NonCallableMagicMock()
+        pool.getconn = MagicMock(return_value=connection)
+        self.async_cursor = AsyncMock()
+        self.async_cursor.rowcount = 1
+        self.async_cursor.fetchone.return_value = ('a',)
+        self.async_cursor.fetchall.return_value = [('k', 'a')]
+        self.async_cursor.__aenter__.return_value = self.async_cursor
+        self.async_connection = AsyncMock()
+        self.async_connection.cursor = MagicMock(return_value=self.async_cursor)
+        self.async_pool = NonCallableMagicMock()
+        self.async_pool.getconn = AsyncMock(return_value=self.async_connection)
+        self.async_pool.putconn = AsyncMock()
+        self.async_connection.attach_mock(self.async_pool.putconn, 'putconn')
+        self.adapter = AsyncPostgresqlKeyValueAdapter(pool, self.async_pool, 'table')
+
+    def test_reads_return_connection_idle(self):
+        self.assertEqual('a', run_async(self.adapter.aget('k', 5)))
+        self.assertEqual(['a'], run_async(self.adapter.aget_many(['k'], 5)))
+        self.assertEqual(
+            [call.commit(), call.putconn(self.async_connection)] * 2,
+            [c for c in self.async_connection.mock_calls if c[0] in ('commit', 'putconn')],
+        )
+
+    def test_failure_rolls_back(self):
+        self.async_cursor.execute.side_effect = RuntimeError()
+        self.assertRaises(RuntimeError, run_async, self.adapter.aget('k', 5))
+        self.async_connection.rollback.assert_awaited_once()
+        self.async_pool.putconn.assert_awaited_once_with(self.async_connection)
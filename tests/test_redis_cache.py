@@ -0,0 +1,96 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from redis import ResponseError
+
+from benchmarks.stand_ins import RespServer
+from thornfield.caches.cache_compression_decorator import CacheCompressionDecorator
+from thornfield.caches.cache_serialization_decorator import CacheSerializationDecorator
+
+from thornfield.caches.redis_cache import RedisCache
+from thornfield.constants import NOT_FOUND
+
+
+class TestRedisCache(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache = RedisCache()
+        self.cache._redis = MagicMock()
+
+    def test_get_many_uses_mget(self):
+        self.cache._redis.mget = MagicMock(return_value=['a', None])
+        self.assertEqual(['a', NOT_FOUND], self.cache.get_many(['x', 'y']))
+        self.cache._redis.mget.assert_called_once_with(['x', 'y'])
+
+    def test_set_many_uses_pipeline(self):
+        pipeline = self.cache._redis.pipeline.return_value
+        self.cache.set_many([('x', 'a'), ('y', 'b')], 100)
+        pipeline.set.assert_any_call('x', 'a', px=100)
+        pipeline.set.assert_any_call('y', 'b', px=100)
+        pipeline.execute.assert_called_once()
+
+    def test_empty(self):
+        self.assertEqual([], self.cache.get_many([]))
+        self.cache.set_many([], 0)
+        self.cache._redis.mget.assert_not_called()
+        self.cache._redis.pipeline.assert_not_called()
+
+    def test_hottest_keys_by_frequency(self):
+        self.cache._redis.scan_iter = MagicMock(return_value=iter(['a', 'b', 'c']))
+        self.cache._redis.pipeline.return_value.execute.return_value = [1, 5, 3]
+        self.assertEqual(['b', 'c'], self.cache.hottest_keys(2))
+        self.cache._redis.pipeline.return_value.object.assert_any_call('freq', 'a')
+
+    def test_hottest_keys_by_idle_time(self):
+        self.cache._redis.scan_iter = MagicMock(return_value=iter(['a', 'b', 'c']))
+        self.cache._redis.object.side_effect = ResponseError()
+        self.cache._redis.pipeline.return_value.execute.return_value = [10, 0, None]
+        self.assertEqual(['b', 'a'], self.cache.hottest_keys(5))
+        self.cache._redis.pipeline.return_value.object.assert_any_call('idletime', 'a')
+
+    def test_hottest_keys_of_empty_database(self):
+        self.cache._redis.scan_iter = MagicMock(return_value=iter([]))
+        self.assertEqual([], self.cache.hottest_keys(5))
+
+    def test_prefix(self):
+        cache = RedisCache(prefix='f:', client=self.cache._redis)
+        self.cache._redis.get = MagicMock(return_value='a')
+        self.cache._redis.mget = MagicMock(return_value=['a', None])
+        self.assertEqual('a', cache.get('x'))
+        self.assertEqual(['a', NOT_FOUND], cache.get_many(['x', 'y']))
+        cache.set('x', 'a', 0)
+        self.cache._redis.get.assert_called_once_with('f:x')
+        self.cache._redis.mget.assert_called_once_with(['f:x', 'f:y'])
+        self.cache._redis.set.assert_called_once_with('f:x', 'a', px=None)
+
+    def test_hottest_keys_without_prefix(self):
+        cache = RedisCache(prefix='f:', client=self.cache._redis)
+        self.cache._redis.scan_iter = MagicMock(return_value=iter(['f:a']))
+        self.cache._redis.pipeline.return_value.execute.return_value = [1]
+        self.assertEqual(['a'], cache.hottest_keys(5))
+        self.cache._redis.scan_iter.assert_called_once_with(match='f:*', count=1000)
+
+    def test_clear_unlinks_scanned_keys(self):
+        cache = RedisCache(prefix='f*[1]:', client=self.cache._redis)
+        keys = [f'f*[1]:{i}' for i in range(1500)]
+        self.cache._redis.scan_iter = MagicMock(return_value=iter(keys))
+        cache.clear()
+        self.cache._redis.scan_iter.assert_called_once_with(match='f\\*\\[1\\]:*', count=1000)
+        self.assertEqual(2, self.cache._redis.unlink.call_count)
+        self.cache._redis.unlink.assert_called_with(*keys[1000:])
+
+    def test_binary_values_round_trip(self):
+        with RespServer() as server:
+            redis_cache = RedisCache(port=server.port, binary=True)
+            cache = CacheSerializationDecorator(
+                CacheCompressionDecorator(redis_cache, binary=True), binary=True
+            )
+            cache.set((1, 'a'), {'x': b'\xff'}, 0)
+            self.assertIsInstance(redis_cache.get(next(iter(server.data)).decode()), bytes)
+            self.assertEqual([{'x': b'\xff'}, NOT_FOUND], cache.get_many([(1, 'a'), (2,)]))
+
+    def test_binary_hottest_keys_are_text(self):
+        cache = RedisCache(prefix='f:', binary=True, client=self.cache._redis)
+        self.cache._redis.scan_iter = MagicMock(return_value=iter([b'f:a']))
+        self.cache._redis.pipeline.return_value.execute.return_value = [1]
+        self.assertEqual(['a'], cache.hottest_keys(5))
@@ -0,0 +1,92 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from redis import ResponseError
+
+from thornfield.cache_factories.redis_cache_factory import RedisCacheFactory
+from thornfield.caches.async_redis_cache import AsyncRedisCache
+from thornfield.errors import CachingError
+
+
+def func():
+    pass
+
+
+def other_func():
+    pass
+
+
+class TestRedisCacheFactory(TestCase):
+    def test_key_prefix_shares_client(self):
+        factory = RedisCacheFactory(key_prefix=True)
+        cache, other = factory.create(func), factory.create(other_func)
+        self.assertIs(cache._redis, other._redis)
+        self.assertNotEqual(cache._prefix, other._prefix)
+        self.assertEqual(cache._prefix, factory.create(func)._prefix)
+        self.assertEqual(9, len(cache._prefix))
+
+    def test_key_prefix_asynchronous(self):
+        factory = RedisCacheFactory(key_prefix=True, asynchronous=True)
+        cache, other = factory.create(func), factory.create(other_func)
+        self.assertIsInstance(cache, AsyncRedisCache)
+        self.assertIs(cache._async_redis, other._async_redis)
+
+    def test_clear(self):
+        factory = RedisCacheFactory(key_prefix=True)
+        factory.create(func)
+        factory._client = MagicMock()
+        factory._client.scan_iter = MagicMock(return_value=iter(['k']))
+        factory.clear(func)
+        factory._client.scan_iter.assert_called_once_with(
+            match=RedisCacheFactory._prefix(RedisCacheFactory._func_to_key(func)) + '*', count=1000
+        )
+        factory._client.unlink.assert_called_once_with('k')
+
+    def test_existing_db(self):
+        factory = RedisCacheFactory()
+        factory._index = MagicMock()
+        factory._index.get = MagicMock(return_value=b'3')
+        self.assertEqual(3, factory.create(func)._redis.connection_pool.connection_kwargs['db'])
+        factory._index.incr.assert_not_called()
+
+    def test_allocates_db_by_script(self):
+        factory = RedisCacheFactory()
+        factory._index = MagicMock()
+        factory._index.config_get = MagicMock(return_value={'databases': '16'})
+        allocate = factory._index.register_script.return_value
+        allocate.return_value = 4
+        self.assertEqual(4, factory._allocate_db('f'))
+        allocate.assert_called_once_with(keys=['f', 'thornfield:last_db'], args=[16])
+        factory._index.incr.assert_not_called()
+        factory._index.scan_iter.assert_not_called()
+
+    def test_all_dbs_allocated(self):
+        factory = RedisCacheFactory()
+        factory._index = MagicMock()
+        factory._index.config_get = MagicMock(return_value={'databases': '16'})
+        factory._index.register_script.return_value.return_value = -1
+        self.assertRaises(CachingError, factory._allocate_db, 'f')
+
+    def test_counter_starts_after_existing_dbs(self):
+        factory = RedisCacheFactory()
+        factory._index = MagicMock()
+        factory._index.exists = MagicMock(return_value=0)
+        factory._index.config_get = MagicMock(return_value={'databases': '16'})
+        factory._index.scan_iter = MagicMock(return_value=iter([b'f', b'g', b'h']))
+        factory._index.mget = MagicMock(return_value=[b'2', b'7', None])
+        factory._index.incr = MagicMock(return_value=8)
+        factory._allocate_db('new')
+        factory._index.set.assert_any_call('thornfield:last_db', 7, nx=True)
+
+    def test_counter_ignores_cached_values(self):
+        factory = RedisCacheFactory()
+        factory._index = MagicMock()
+        factory._index.exists = MagicMock(return_value=0)
+        factory._index.config_get = MagicMock(side_effect=ResponseError())
+        prefixed = RedisCacheFactory._prefix('func').encode() + b'1'
+        factory._index.scan_iter = MagicMock(return_value=iter([b'f', b'g', prefixed]))
+        factory._index.mget = MagicMock(return_value=[b'3', b'12345'])
+        factory._index.incr = MagicMock(return_value=4)
+        factory._allocate_db('new')
+        factory._index.mget.assert_called_once_with([b'f', b'g'])
+        factory._index.set.assert_any_call('thornfield:last_db', 3, nx=True)
@@ -0,0 +1,82 @@
+import json
+from unittest import TestCase
+from unittest.mock import patch
+
+from thornfield.constants import NOT_FOUND
+from thornfield.errors import CachingError
+from thornfield.result_policy import ResultPolicy
+
+
+class TestResultPolicy(TestCase):
+    def test_result_stored_as_is_by_default(self):
+        policy = ResultPolicy(None, 100)
+        self.assertFalse(policy.wraps)
+        self.assertEqual((5, 100), policy.to_entry(5))
+
+    def test_validator(self):
+        policy = ResultPolicy(lambda x: x is not None, 100)
+        self.assertIsNone(policy.to_entry(None))
+        self.assertEqual((5, 100), policy.to_entry(5))
+
+    def test_stale_ttl(self):
+        policy = ResultPolicy(None, 100, stale_ttl=1000)
+        self.assertTrue(policy.wraps)
+        with patch.object(ResultPolicy, '_now', return_value=10):
+            entry, expiration = policy.to_entry(5)
+            self.assertEqual(1100, expiration)
+            self.assertEqual((5, False), policy.from_entry(entry))
+        with patch.object(ResultPolicy, '_now', return_value=111):
+            self.assertEqual((5, True), policy.from_entry(entry))
+
+    def test_untagged_value_not_read_as_stale_entry(self):
+        policy = ResultPolicy(None, 100, stale_ttl=1000)
+        self.assertEqual((NOT_FOUND, False), policy.from_entry((0, 5)))
+        self.assertEqual((NOT_FOUND, False), policy.from_entry(['__thornfield__', 'result', 'x', 5]))
+
+    def test_stale_ttl_requires_expiration(self):
+        self.assertRaises(CachingError, ResultPolicy, None, 0, stale_ttl=1000)
+
+    def test_jitter(self):
+        policy = ResultPolicy(None, 1000, expiration_jitter=0.2)
+        expirations = {policy.to_entry(5)[1] for _ in range(100)}
+        self.assertTrue(all(800 <= e <= 1000 for e in expirations))
+        self.assertGreater(len(expirations), 1)
+
+    def test_invalid_jitter(self):
+        self.assertRaises(CachingError, ResultPolicy, None, 1000, expiration_jitter=1)
+
+    def test_negative_ttl(self):
+        policy = ResultPolicy(lambda x: x is not None, 1000, negative_ttl=10)
+        self.assertEqual((None, 10), policy.to_entry(None))
+        self.assertEqual((5, 1000), policy.to_entry(5))
+
+    def test_exception_entry(self):
+        policy = ResultPolicy(None, 1000, cache_exceptions=(KeyError,), exception_ttl=10)
+        self.assertTrue(policy.wraps)
+        entry, expiration = policy.exception_to_entry(KeyError('x'))
+        self.assertEqual(10, expiration)
+        with self.assertRaises(KeyError) as cm:
+            policy.from_entry(entry)
+        self.assertEqual(('x',), cm.exception.args)
+
+    def test_exception_entry_after_json_round_trip(self):
+        policy = ResultPolicy(None, 1000, cache_exceptions=(LookupError,), exception_ttl=10)
+        entry, _ = policy.exception_to_entry(KeyError('x'))
+        entry = json.loads(json.dumps(entry))
+        self.assertRaises(KeyError, policy.from_entry, entry)
+        entry, _ = policy.to_entry(5)
+        self.assertEqual((5, False), policy.from_entry(json.loads(json.dumps(entry))))
+
+    def test_only_cached_exception_types_created(self):
+        policy = ResultPolicy(None, 1000, cache_exceptions=(KeyError,), exception_ttl=10)
+        for type_name, args in [('builtins:ValueError', []), ('os:system', ['ls']), ('no_such_module:X', [])]:
+            entry = ['__thornfield__', 'exception', type_name, args]
+            self.assertEqual((NOT_FOUND, False), policy.from_entry(entry))
+
+    def test_plain_values_read_as_misses(self):
+        policy = ResultPolicy(None, 1000, cache_exceptions=(KeyError,), exception_ttl=10)
+        for value in ['ab', 5, None, (0, 'builtins:KeyError', []), ['__thornfield__', 'exception', 'builtins:KeyError', 1]]:
+            self.assertEqual((NOT_FOUND, False), policy.from_entry(value))
+
+    def test_cache_exceptions_requires_exception_ttl(self):
+        self.assertRaises(CachingError, ResultPolicy, None, 0, cache_exceptions=(KeyError,))
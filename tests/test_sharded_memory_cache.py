@@ -0,0 +1,93 @@
+import os
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import sleep
+from unittest import TestCase
+
+from thornfield.cacher import Cacher
+from thornfield.caches.eviction import LfuPolicy
+from thornfield.caches.sharded_memory_cache import ShardedMemoryCache
+from thornfield.constants import NOT_FOUND
+
+
+class TestShardedMemoryCache(TestCase):
+    def test_basic(self):
+        cacher = Cacher(lambda _: ShardedMemoryCache())
+
+        @cacher.cached(expiration=100)
+        def foo(x):
+            foo.call_count += 1
+            return x
+
+        foo.call_count = 0
+        self.assertEqual(5, foo(5))
+        self.assertEqual(5, foo(5))
+        self.assertEqual(1, foo.call_count)
+        sleep(0.11)
+        self.assertEqual(5, foo(5))
+        self.assertEqual(2, foo.call_count)
+
+    def test_get_many_and_set_many(self):
+        cache = ShardedMemoryCache(shards=4)
+        cache.set_many([(i, str(i)) for i in range(100)], 0)
+        keys = list(range(99, -10, -3))
+        expected = [str(k) if k >= 0 else NOT_FOUND for k in keys]
+        self.assertEqual(expected, cache.get_many(keys))
+        self.assertEqual(100, cache.size)
+
+    def test_bounds_are_divided_between_shards(self):
+        cache = ShardedMemoryCache(shards=4, max_entries=40)
+        for i in range(100):
+            cache.set(i, i, 0)
+        self.assertEqual(40, cache.size)
+        self.assertEqual(60, cache.evictions)
+
+    def test_policy_factory(self):
+        cache = ShardedMemoryCache(shards=2, max_entries=2, policy=LfuPolicy)
+        self.assertIsNot(cache._shards[0]._policy, cache._shards[1]._policy)
+        self.assertIsInstance(cache._shards[0]._policy, LfuPolicy)
+
+    def test_expire(self):
+        cache = ShardedMemoryCache(shards=4, expiry_resolution=10)
+        cache.set_many([(i, i) for i in range(20)], 20)
+        sleep(0.05)
+        cache.expire()
+        self.assertEqual(0, cache.size)
+        self.assertEqual(20, cache.expirations)
+
+    def test_concurrent_access(self):
+        cache = ShardedMemoryCache(shards=8, max_entries=200, policy='tinylfu')
+        errors = []
+
+        def work(offset):
+            try:
+                for i in range(3000):
+                    key = (offset * 7 + i) % 500
+                    if cache.get(key) is NOT_FOUND:
+                        cache.set(key, key, 1000)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [Thread(target=work, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual([], errors)
+        self.assertLessEqual(cache.size, 200)
+        values = cache.get_many(list(range(500)))
+        self.assertTrue(all(v is NOT_FOUND or v == k for k, v in enumerate(values)))
+
+    def test_snapshot(self):
+        cache = ShardedMemoryCache(shards=4)
+        cache.set_many([(i, i) for i in range(100)], 1000)
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.snapshot')
+            self.assertEqual(100, cache.snapshot(path))
+            restored = ShardedMemoryCache(shards=3)
+            self.assertEqual(100, restored.restore(path, lazy=True))
+        self.assertEqual(list(range(100)), restored.get_many(list(range(100))))
+
+    def test_invalid_shards(self):
+        with self.assertRaises(ValueError):
+            ShardedMemoryCache(shards=0)
@@ -0,0 +1,99 @@
+from contextlib import ExitStack
+from unittest import TestCase
+from unittest.mock import patch
+
+from benchmarks.stand_ins import RespServer
+from thornfield.caches.hash_ring import HashRing
+from thornfield.caches.sharded_redis_cache import ShardedRedisCache
+from thornfield.constants import NOT_FOUND
+from thornfield.errors import CachingError
+
+
+class TestHashRing(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.keys = [f'key{i}' for i in range(10000)]
+
+    def test_keys_are_spread_evenly(self):
+        ring = HashRing(['a', 'b', 'c', 'd'])
+        counts = {}
+        for key in self.keys:
+            node = ring.node(key)
+            counts[node] = counts.get(node, 0) + 1
+        self.assertEqual({'a', 'b', 'c', 'd'}, set(counts))
+        self.assertLess(max(counts.values()), 1.25 * len(self.keys) / 4)
+
+    def test_removing_node_moves_only_its_keys(self):
+        ring = HashRing(['a', 'b', 'c', 'd'])
+        before = {key: ring.node(key) for key in self.keys}
+        ring.remove('b')
+        for key in self.keys:
+            if before[key] != 'b':
+                self.assertEqual(before[key], ring.node(key))
+            else:
+                self.assertNotEqual('b', ring.node(key))
+
+    def test_adding_node_moves_keys_only_to_it(self):
+        ring = HashRing(['a', 'b', 'c'])
+        before = {key: ring.node(key) for key in self.keys}
+        ring.add('d')
+        moved = [key for key in self.keys if ring.node(key) != before[key]]
+        self.assertTrue(all(ring.node(key) == 'd' for key in moved))
+        self.assertLess(len(moved), 0.35 * len(self.keys))
+
+    def test_order_of_nodes_does_not_matter(self):
+        ring, other = HashRing(['a', 'b', 'c']), HashRing(['c', 'a', 'b'])
+        self.assertTrue(all(ring.node(key) == other.node(key) for key in self.keys))
+
+    def test_empty(self):
+        with self.assertRaises(LookupError):
+            HashRing().node('key')
+
+
+class TestShardedRedisCache(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        stack = ExitStack()
+        self.addCleanup(stack.close)
+        self.servers = [stack.enter_context(RespServer()) for _ in range(3)]
+        self.nodes = [f'localhost:{s.port}' for s in self.servers]
+        self.cache = ShardedRedisCache(self.nodes)
+
+    def test_keys_are_spread_between_nodes(self):
+        self.cache.set_many([(f'key{i}', str(i)) for i in range(100)], 0)
+        self.assertEqual(100, sum(len(s.data) for s in self.servers))
+        self.assertTrue(all(s.data for s in self.servers))
+        self.assertEqual('5', self.cache.get('key5'))
+        keys = ['key1', 'missing', 'key50']
+        self.assertEqual(['1', NOT_FOUND, '50'], self.cache.get_many(keys))
+
+    def test_remove_node(self):
+        items = [(f'key{i}', str(i)) for i in range(100)]
+        self.cache.set_many(items, 0)
+        removed = self.servers[0]
+        removed_keys = {k.decode() for k in removed.data}
+        self.cache.remove_node(self.nodes[0])
+        self.assertEqual(self.nodes[1:], self.cache.nodes)
+        values = self.cache.get_many([k for k, _ in items])
+        for (key, value), found in zip(items, values):
+            self.assertEqual(NOT_FOUND if key in removed_keys else value, found)
+
+    def test_node_removed_after_mapping_key(self):
+        self.cache.remove_node(self.nodes[0])
+        # As if another thread removed the node after the keys were mapped to it
+        with patch.object(self.cache, '_node_of', return_value=self.nodes[0]):
+            self.assertRaises(CachingError, self.cache.get, 'key')
+            self.assertRaises(CachingError, self.cache.get_many, ['key'])
+            self.assertRaises(CachingError, self.cache.set_many, [('key', 'a')], 0)
+
+    def test_all_nodes_removed(self):
+        for node in self.nodes:
+            self.cache.remove_node(node)
+        with self.assertRaises(CachingError):
+            self.cache.get('key')
+
+    def test_invalid_node(self):
+        with self.assertRaises(ValueError):
+            ShardedRedisCache(['localhost'])
+        with self.assertRaises(ValueError):
+            ShardedRedisCache([])
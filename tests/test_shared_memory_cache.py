@@ -0,0 +1,139 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from tempfile import TemporaryDirectory
+from time import sleep
+from unittest import TestCase
+
+from thornfield.cache_factories.shared_memory_cache_factory import (
+    SharedMemoryCacheFactory,
+)
+from thornfield.cacher import Cacher
+from thornfield.caches.shared_memory_cache import SharedMemoryCache
+from thornfield.constants import NOT_FOUND
+from thornfield.errors import CachingError
+
+
+def _increment_all(path, keys, rounds):
+    cache = SharedMemoryCache(path, size=1 << 20)
+    for _ in range(rounds):
+        for key in keys:
+            value = cache.get(key)
+            cache.set(key, (value if value is not NOT_FOUND else 0) + 1, 0)
+    return os.getpid()
+
+
+def _read(path, key):
+    return SharedMemoryCache(path, size=1 << 20).get(key)
+
+
+class TestSharedMemoryCache(TestCase):
+    def setUp(self):
+        self._dir = TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, 'cache')
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_get_and_set(self):
+        cache = SharedMemoryCache(self.path, size=1 << 20)
+        cache.set(('a', 1), {'x': [1, 2]}, 0)
+        cache.set(('b',), None, 0)
+        self.assertEqual({'x': [1, 2]}, cache.get(('a', 1)))
+        self.assertIsNone(cache.get(('b',)))
+        self.assertEqual(NOT_FOUND, cache.get(('c',)))
+        cache.set(('a', 1), 'new', 0)
+        self.assertEqual(['new', None], cache.get_many([('a', 1), ('b',)]))
+
+    def test_equal_keys_match(self):
+        cache = SharedMemoryCache(self.path, size=1 << 20)
+        s = 'ab' * 3
+        cache.set((s, s), 'a', 0)
+        self.assertEqual('a', cache.get((s, ''.join(['ab'] * 3))))
+
+    def test_expiration(self):
+        cache = SharedMemoryCache(self.path, size=1 << 20)
+        cache.set_many([(1, 'a'), (2, 'b')], 50)
+        cache.set(3, 'c', 0)
+        self.assertEqual(['a', 'b', 'c'], cache.get_many([1, 2, 3]))
+        sleep(0.06)
+        self.assertEqual([NOT_FOUND, NOT_FOUND, 'c'], cache.get_many([1, 2, 3]))
+
+    def test_namespaces(self):
+        first = SharedMemoryCache(self.path, size=1 << 20, namespace='first')
+        second = SharedMemoryCache(self.path, size=1 << 20, namespace='second')
+        first.set(1, 'a', 0)
+        self.assertEqual(NOT_FOUND, second.get(1))
+        second.set(1, 'b', 0)
+        self.assertEqual('a', first.get(1))
+
+    def test_evicts_least_recently_used_of_bucket(self):
+        # A single bucket of 2 slots
+        cache = SharedMemoryCache(self.path, size=64 + 2 * 8 + 2 * 128, slot_size=128, ways=2)
+        cache.set(1, 'a', 0)
+        sleep(0.002)
+        cache.set(2, 'b', 0)
+        sleep(0.002)
+        cache.get(1)
+        sleep(0.002)
+        cache.set(3, 'c', 0)
+        self.assertEqual(['a', NOT_FOUND, 'c'], cache.get_many([1, 2, 3]))
+        self.assertEqual(1, cache.evictions)
+
+    def test_reuses_expired_slots(self):
+        cache = SharedMemoryCache(self.path, size=64 + 2 * 8 + 2 * 128, slot_size=128, ways=2)
+        cache.set(1, 'a', 0)
+        cache.set(2, 'b', 20)
+        sleep(0.03)
+        cache.get(1)
+        cache.set(3, 'c', 0)
+        self.assertEqual(['a', 'c'], cache.get_many([1, 3]))
+        self.assertEqual(0, cache.evictions)
+        self.assertEqual(1, cache.expirations)
+
+    def test_large_values_are_not_stored(self):
+        cache = SharedMemoryCache(self.path, size=1 << 20, slot_size=128)
+        cache.set(1, 'a', 0)
+        cache.set(1, 'a' * 200, 0)
+        self.assertEqual(NOT_FOUND, cache.get(1))
+
+    def test_clear(self):
+        cache = SharedMemoryCache(self.path, size=1 << 20)
+        cache.set_many([(i, i) for i in range(100)], 0)
+        cache.clear()
+        self.assertEqual([NOT_FOUND] * 100, cache.get_many(list(range(100))))
+
+    def test_different_geometry(self):
+        SharedMemoryCache(self.path, size=1 << 20)
+        with self.assertRaises(CachingError):
+            SharedMemoryCache(self.path, size=1 << 20, slot_size=1024)
+
+    def test_shared_between_processes(self):
+        cache = SharedMemoryCache(self.path, size=1 << 20)
+        keys = [('key', i) for i in range(50)]
+        with ProcessPoolExecutor(4, mp_context=get_context('spawn')) as executor:
+            pids = list(executor.map(_increment_all, [self.path] * 4, [keys] * 4, [20] * 4))
+            self.assertNotIn(os.getpid(), pids)
+            values = cache.get_many(keys)
+            # Increments may be lost between a get and a set, but every process wrote
+            self.assertTrue(all(20 <= v <= 80 for v in values))
+            cache.set('from parent', 'x', 0)
+            self.assertEqual('x', executor.submit(_read, self.path, 'from parent').result())
+
+    def test_factory(self):
+        cacher = Cacher(SharedMemoryCacheFactory(self.path, size=1 << 20).create)
+
+        @cacher.cached
+        def foo(x):
+            foo.call_count += 1
+            return x
+
+        @cacher.cached
+        def bar(x):
+            return -x
+
+        foo.call_count = 0
+        self.assertEqual(5, foo(5))
+        self.assertEqual(5, foo(5))
+        self.assertEqual(-5, bar(5))
+        self.assertEqual(1, foo.call_count)
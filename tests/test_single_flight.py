@@ -0,0 +1,150 @@
+import asyncio
+from threading import Thread, Event
+from time import sleep
+from unittest import TestCase
+
+from thornfield.async_single_flight import AsyncSingleFlight
+from thornfield.single_flight import SingleFlight
+
+
+class TestSingleFlight(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.flight = SingleFlight()
+
+    def test_concurrent_calls_share_result(self):
+        started = Event()
+        release = Event()
+        calls = []
+
+        def func():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return 5
+
+        results = []
+
+        def call():
+            results.append(self.flight.do('k', func))
+
+        threads = [Thread(target=call) for _ in range(5)]
+        threads[0].start()
+        started.wait()
+        for t in threads[1:]:
+            t.start()
+        sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(1, len(calls))
+        self.assertEqual([5] * 5, results)
+        self.assertEqual({}, self.flight._calls)
+
+    def test_exception_raised_to_all_callers(self):
+        started = Event()
+        release = Event()
+
+        def func():
+            started.set()
+            release.wait()
+            raise ValueError('x')
+
+        errors = []
+
+        def call():
+            try:
+                self.flight.do('k', func)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [Thread(target=call) for _ in range(3)]
+        threads[0].start()
+        started.wait()
+        for t in threads[1:]:
+            t.start()
+        sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(3, len(errors))
+        self.assertEqual({}, self.flight._calls)
+
+    def test_different_keys_not_shared(self):
+        self.assertEqual(1, self.flight.do('a', lambda: 1))
+        self.assertEqual(2, self.flight.do('b', lambda: 2))
+
+    def test_unhashable_key(self):
+        self.assertEqual(1, self.flight.do(([],), lambda: 1))
+
+
+class TestAsyncSingleFlight(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.flight = AsyncSingleFlight()
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self) -> None:
+        self.loop.close()
+        super().tearDown()
+
+    def test_concurrent_calls_share_result(self):
+        calls = []
+
+        async def func():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 5
+
+        async def run():
+            return await asyncio.gather(*(self.flight.do('k', func) for _ in range(5)))
+
+        self.assertEqual([5] * 5, self.loop.run_until_complete(run()))
+        self.assertEqual(1, len(calls))
+        self.assertEqual({}, self.flight._calls)
+
+    def test_exception_raised_to_all_callers(self):
+        async def func():
+            await asyncio.sleep(0.01)
+            raise ValueError('x')
+
+        async def run():
+            return await asyncio.gather(
+                *(self.flight.do('k', func) for _ in range(3)), return_exceptions=True
+            )
+
+        results = self.loop.run_until_complete(run())
+        self.assertEqual(3, len(results))
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual({}, self.flight._calls)
+
+    def test_cancelling_one_waiter_does_not_cancel_others(self):
+        async def func():
+            await asyncio.sleep(0.02)
+            return 5
+
+        async def run():
+            first = asyncio.ensure_future(self.flight.do('k', func))
+            second = asyncio.ensure_future(self.flight.do('k', func))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second, first.cancelled()
+
+        self.assertEqual((5, True), self.loop.run_until_complete(run()))
+
+    def test_cancelling_all_waiters_cancels_call(self):
+        finished = []
+
+        async def func():
+            await asyncio.sleep(0.02)
+            finished.append(1)
+
+        async def run():
+            task = asyncio.ensure_future(self.flight.do('k', func))
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.sleep(0.04)
+
+        self.loop.run_until_complete(run())
+        self.assertEqual([], finished)
+        self.assertEqual({}, self.flight._calls)
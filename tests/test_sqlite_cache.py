@@ -0,0 +1,158 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import sleep, time
+from unittest import TestCase
+
+from thornfield.cache_factories.sqlite_cache_factory import SqliteCacheFactory
+from thornfield.cacher import Cacher
+from thornfield.caches.sqlite_cache import SqliteCache
+from thornfield.constants import NOT_FOUND
+
+
+def _set_range(path, start, count):
+    cache = SqliteCache(path)
+    for i in range(start, start + count):
+        cache.set(i, str(i), 0)
+
+
+class TestSqliteCache(TestCase):
+    def setUp(self):
+        self._dir = TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, 'cache.db')
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_get_and_set(self):
+        cache = SqliteCache(self.path)
+        cache.set(('a', 1), {'x': [1, 2]}, 0)
+        cache.set(('b',), None, 0)
+        self.assertEqual({'x': [1, 2]}, cache.get(('a', 1)))
+        self.assertIsNone(cache.get(('b',)))
+        self.assertEqual(NOT_FOUND, cache.get(('c',)))
+        cache.set(('a', 1), 'new', 0)
+        self.assertEqual('new', cache.get(('a', 1)))
+
+    def test_equal_keys_match(self):
+        cache = SqliteCache(self.path)
+        s = 'ab' * 3
+        cache.set((s, s), 'a', 0)
+        self.assertEqual('a', cache.get((s, ''.join(['ab'] * 3))))
+
+    def test_get_many_and_set_many(self):
+        cache = SqliteCache(self.path)
+        cache.set_many([(i, i * 2) for i in range(1500)], 0)
+        keys = list(range(-5, 1500, 7))
+        expected = [k * 2 if k >= 0 else NOT_FOUND for k in keys]
+        self.assertEqual(expected, cache.get_many(keys))
+        self.assertEqual([], cache.get_many([]))
+
+    def test_expiration(self):
+        cache = SqliteCache(self.path)
+        cache.set_many([(1, 'a'), (2, 'b')], 50)
+        cache.set(3, 'c', 0)
+        self.assertEqual(['a', 'b', 'c'], cache.get_many([1, 2, 3]))
+        sleep(0.06)
+        self.assertEqual([NOT_FOUND, NOT_FOUND, 'c'], cache.get_many([1, 2, 3]))
+        cache.expire()
+        self.assertEqual((1, ), self._stats(cache)[:1])
+
+    def test_survives_reopening(self):
+        SqliteCache(self.path, table='t').set('key', 'value', 0)
+        self.assertEqual('value', SqliteCache(self.path, table='t').get('key'))
+        self.assertEqual(NOT_FOUND, SqliteCache(self.path, table='other').get('key'))
+
+    def test_max_entries_evicts_least_recently_read(self):
+        cache = SqliteCache(self.path, max_entries=3, access_resolution=0)
+        for i in range(3):
+            cache.set(i, i, 0)
+            sleep(0.002)
+        cache.get(0)
+        cache.set(3, 3, 0)
+        self.assertEqual([0, NOT_FOUND, 2, 3], cache.get_many([0, 1, 2, 3]))
+        self.assertEqual(3, self._stats(cache)[0])
+
+    def test_max_entries_removes_expired_first(self):
+        cache = SqliteCache(self.path, max_entries=2)
+        cache.set(1, 'a', 0)
+        cache.set(2, 'b', 20)
+        sleep(0.03)
+        cache.set(3, 'c', 0)
+        self.assertEqual(['a', 'c'], cache.get_many([1, 3]))
+
+    def test_max_bytes(self):
+        cache = SqliteCache(self.path, max_bytes=1000)
+        for i in range(100):
+            cache.set(i, 'x' * 90, 0)
+        entries, size = self._stats(cache)
+        self.assertLessEqual(size, 1000)
+        self.assertGreater(entries, 5)
+        self.assertEqual('x' * 90, cache.get(99))
+
+    def test_reads_dont_wait_for_writer(self):
+        cache = SqliteCache(self.path, access_resolution=0)
+        cache.set(1, 'a', 0)
+        writer = SqliteCache(self.path)._connection
+        writer.execute('begin immediate')
+        try:
+            start = time()
+            self.assertEqual('a', cache.get(1))
+            self.assertLess(time() - start, 1)
+        finally:
+            writer.execute('rollback')
+        cache.set(2, 'b', 0)
+
+    def test_only_last_inherited_connection_kept(self):
+        cache = SqliteCache(self.path)
+        first = cache._connection
+        cache._after_fork()
+        second = cache._connection
+        cache._after_fork()
+        self.assertIs(second, cache._inherited)
+        self.assertIsNot(first, second)
+        cache.set(1, 'a', 0)
+        self.assertEqual('a', cache.get(1))
+
+    def test_concurrent_threads(self):
+        cache = SqliteCache(self.path)
+        threads = [
+            Thread(target=lambda s=s: [cache.set(i, i, 0) for i in range(s, s + 50)])
+            for s in range(0, 200, 50)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(list(range(200)), cache.get_many(list(range(200))))
+
+    def test_concurrent_processes(self):
+        cache = SqliteCache(self.path)
+        with ProcessPoolExecutor(4, mp_context=get_context('spawn')) as executor:
+            list(executor.map(_set_range, [self.path] * 4, range(0, 200, 50), [50] * 4))
+        self.assertEqual([str(i) for i in range(200)], cache.get_many(list(range(200))))
+        self.assertEqual((200, ), self._stats(cache)[:1])
+
+    def test_factory(self):
+        cacher = Cacher(SqliteCacheFactory(self.path).create)
+
+        @cacher.cached
+        def foo(x):
+            foo.call_count += 1
+            return x
+
+        @cacher.cached
+        def bar(x):
+            return -x
+
+        foo.call_count = 0
+        self.assertEqual(5, foo(5))
+        self.assertEqual(5, foo(5))
+        self.assertEqual(-5, bar(5))
+        self.assertEqual(1, foo.call_count)
+
+    @staticmethod
+    def _stats(cache):
+        return cache._connection.execute(f'select entries, bytes from {cache._stats_table}').fetchone()
@@ -0,0 +1,115 @@
+from time import sleep
+from unittest import TestCase
+from unittest.mock import create_autospec, MagicMock
+
+from thornfield.caches.cache import Cache
+from thornfield.caches.invalidators import Invalidator
+from thornfield.caches.memory_cache import MemoryCache
+from thornfield.caches.tiered_cache import TieredCache
+from thornfield.constants import NOT_FOUND
+
+
+class LocalInvalidator(Invalidator):
+    def publish(self, message: str) -> None:
+        self._dispatch(message)
+
+    def _listen(self) -> None:
+        pass
+
+    def _connect_listener(self):
+        pass
+
+    def _receive(self, listener) -> None:
+        pass
+
+
+class BrokenInvalidator(LocalInvalidator):
+    def _listen(self) -> None:
+        raise ConnectionError()
+
+
+class TestTieredCache(TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.remote = MemoryCache()
+        self.remote.get = MagicMock(wraps=self.remote.get)
+
+    def test_remote_hit_promoted(self):
+        self.remote.set((1,), 'a', 0)
+        cache = TieredCache(self.remote)
+        self.assertEqual('a', cache.get((1,)))
+        self.assertEqual('a', cache.get((1,)))
+        self.remote.get.assert_called_once_with((1,))
+
+    def test_set_writes_both(self):
+        cache = TieredCache(self.remote)
+        cache.set((1,), 'a', 0)
+        self.assertEqual('a', self.remote.get((1,)))
+        self.remote.get.reset_mock()
+        self.assertEqual('a', cache.get((1,)))
+        self.remote.get.assert_not_called()
+
+    def test_not_found(self):
+        cache = TieredCache(self.remote)
+        self.assertIs(NOT_FOUND, cache.get((1,)))
+
+    def test_bounded(self):
+        cache = TieredCache(self.remote, max_entries=2)
+        for i in range(3):
+            cache.set((i,), i, 0)
+        cache.get((2,))
+        self.assertEqual([(1,), (2,)], list(cache._local))
+
+    def test_promoted_values_expire_with_local_ttl_zero(self):
+        self.remote.set((1,), 'a', 0)
+        cache = TieredCache(self.remote, local_ttl=0, promoted_ttl=50)
+        self.assertEqual(['a'], cache.get_many([(1,)]))
+        self.remote.set((1,), 'b', 0)
+        self.assertEqual('a', cache.get((1,)))
+        sleep(0.06)
+        self.assertEqual('b', cache.get((1,)))
+
+    def test_local_ttl(self):
+        cache = TieredCache(self.remote, local_ttl=50)
+        cache.set((1,), 'a', 0)
+        sleep(0.06)
+        self.remote.get.reset_mock()
+        self.assertEqual('a', cache.get((1,)))
+        self.remote.get.assert_called_once_with((1,))
+
+    def test_get_many(self):
+        cache = TieredCache(self.remote)
+        cache.set((1,), 'a', 0)
+        self.remote.set((2,), 'b', 0)
+        self.remote.get_many = MagicMock(wraps=self.remote.get_many)
+        self.assertEqual(['a', 'b', NOT_FOUND], cache.get_many([(1,), (2,), (3,)]))
+        self.remote.get_many.assert_called_once_with([(2,), (3,)])
+
+    def test_invalidation(self):
+        invalidator = LocalInvalidator()
+        first = TieredCache(self.remote, invalidator=invalidator, namespace='foo')
+        second = TieredCache(self.remote, invalidator=invalidator, namespace='foo')
+        other = TieredCache(self.remote, invalidator=invalidator, namespace='bar')
+        for cache in (first, second, other):
+            cache._set_local((1, 'x'), 'a', 0)
+
+        first.set((1, 'x'), 'b', 0)
+        self.assertEqual('b', first.get((1, 'x')))
+        self.assertEqual('b', second.get((1, 'x')))
+        self.assertEqual('a', other.get((1, 'x')))
+
+    def test_invalidation_of_unserializable_key_clears_local_cache(self):
+        invalidator = LocalInvalidator()
+        first = TieredCache(create_autospec(Cache), invalidator=invalidator)
+        second = TieredCache(self.remote, invalidator=invalidator)
+        second._set_local((1,), 'a', 0)
+        first.set((object(),), 'b', 0)
+        self.assertEqual(0, len(second._local))
+
+    def test_invalidator_that_cannot_listen(self):
+        invalidator = BrokenInvalidator()
+        with self.assertLogs('thornfield.tiered_cache'):
+            cache = TieredCache(self.remote, invalidator=invalidator)
+        self.assertFalse(invalidator._listening)
+        cache.set((1,), 'a', 0)
+        self.assertEqual('a', cache.get((1,)))
@@ -0,0 +1,39 @@
+from ast import literal_eval
+from unittest import TestCase
+
+from thornfield.caches.cache_serialization_decorator import CacheSerializationDecorator
+from thornfield.caches.memory_cache import MemoryCache
+from thornfield.caches.warm_up import warm_up
+from thornfield.constants import NOT_FOUND
+from thornfield.errors import CachingError
+
+
+class _RankedCache(MemoryCache):
+    def __init__(self, ranking) -> None:
+        super().__init__()
+        self.ranking = ranking
+
+    def hottest_keys(self, count: int):
+        return self.ranking[:count]
+
+
+class TestWarmUp(TestCase):
+    def test_copies_hottest_entries(self):
+        source = _RankedCache(['c', 'missing', 'a', 'b'])
+        source.set_many([('a', 1), ('b', 2), ('c', 3)], 0)
+        cache = MemoryCache()
+        self.assertEqual(2, warm_up(cache, source, count=3, batch_size=2))
+        self.assertEqual([1, NOT_FOUND, 3], cache.get_many(['a', 'b', 'c']))
+
+    def test_deserializes_keys(self):
+        source = CacheSerializationDecorator(
+            _RankedCache(['(1, 2)']), serializer=repr, deserializer=literal_eval
+        )
+        source.set((1, 2), 'a', 0)
+        cache = MemoryCache()
+        self.assertEqual(1, warm_up(cache, source))
+        self.assertEqual('a', cache.get((1, 2)))
+
+    def test_not_supported(self):
+        with self.assertRaises(CachingError):
+            warm_up(MemoryCache(), MemoryCache())
@@ -1,4 +1,6 @@
+import asyncio
 from builtins import __import__
+from unittest.mock import MagicMock
 
 
 def mock_import(exclude):
@@ -8,3 +10,24 @@ def mock_import(exclude):
         return __import__(name, globals, locals, fromlist, level)
 
     return inner
+
+
+def async_mock(return_value=None):
+    mock = MagicMock(return_value=return_value)
+
+    async def inner(*args, **kwargs):
+        return mock(*args, **kwargs)
+
+    inner.mock = mock
+    return inner
+
+
+def run_async(coroutine):
+    """
+    Runs ``coroutine`` in a new event loop, and closes it without changing the current loop.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()